@@ -0,0 +1,117 @@
+# benchmarks/snowflake_keys.py
+#
+# Measures migration 7 (INTEGER snowflake keys, WITHOUT ROWID tables) on a
+# synthetic ladder: file size, the size of every table and index, and the
+# time of a `!fb history` page, before and after the migration. The "after"
+# database stops at migration 7, so later migrations (epoch timestamps,
+# character tracking, ladders) do not show up in the numbers, and both sides
+# run today's history query against the same TEXT timestamps.
+#
+#   python -m benchmarks.snowflake_keys [--guilds 20] [--players 5000] [--matches 200000]
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from cogs.history import NO_FILTERS, build_history_query
+from db.database import setup_database, migrate_database
+
+TEXT_KEYS_VERSION = 6  # Last migration with TEXT ids
+INTEGER_KEYS_VERSION = 7  # The migration measured here
+
+
+def snowflake(rng):
+    # Discord ids issued since 2021 are 18-19 digits long
+    return rng.randrange(10 ** 17, 2 ** 63)
+
+
+def populate(path, guilds, players, matches, seed=1):
+    """Creates a database at the TEXT-key schema with random players and matches."""
+    setup_database(path, target=TEXT_KEYS_VERSION)
+    rng = random.Random(seed)
+    roster = {guild_id: [str(snowflake(rng)) for _ in range(players // guilds)] for guild_id in range(1, guilds + 1)}
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO players (guild_id, discord_id, username, points, last_played) VALUES (?, ?, ?, ?, '2024-01-01 00:00:00')",
+        [(guild_id, discord_id, f"player{i}", rng.randrange(3000)) for guild_id, ids in roster.items() for i, discord_id in enumerate(ids)]
+    )
+    rows = []
+    for i in range(matches):
+        guild_id = rng.randrange(1, guilds + 1)
+        winner_id, loser_id = rng.sample(roster[guild_id], 2)
+        rows.append((
+            guild_id, winner_id, loser_id, 2, rng.randrange(2), f"2024-{1 + i * 12 // matches:02d}-01 00:00:00",
+            rng.choice((winner_id, loser_id)), 20, 10, 100, 50,
+        ))
+    conn.executemany("""
+        INSERT INTO matches (guild_id, winner_id, loser_id, winner_score, loser_score, timestamp, approved,
+                             approved_by, winner_points_gained, loser_points_lost, winner_points_after, loser_points_after)
+        VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return roster
+
+
+def measure(path, lookups, repeat):
+    """Returns (file size, {table or index: bytes}, median ms per history page)."""
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    sizes = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    timings = []
+    for _ in range(repeat):
+        for guild_id, discord_id in lookups:
+            started = time.perf_counter()
+            conn.execute(*build_history_query(guild_id, 1, discord_id, NO_FILTERS)).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    conn.close()
+    return os.path.getsize(path), sizes, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks migration 7 on a synthetic ladder")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--matches", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=500, help="History queries per run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="fightback-bench-")
+    try:
+        before_path = os.path.join(directory, "before.db")
+        after_path = os.path.join(directory, "after.db")
+        roster = populate(before_path, args.guilds, args.players, args.matches)
+        rng = random.Random(2)
+        lookups = [(guild_id, rng.choice(ids)) for guild_id, ids in rng.choices(list(roster.items()), k=args.lookups)]
+
+        shutil.copy(before_path, after_path)
+        started = time.perf_counter()
+        migrate_database(after_path, target=INTEGER_KEYS_VERSION)
+        migration_ms = (time.perf_counter() - started) * 1000
+
+        before = measure(before_path, lookups, args.repeat)
+        # After the migration the cogs pass ints; the TEXT ids also still work through column affinity
+        after = measure(after_path, [(guild_id, int(discord_id)) for guild_id, discord_id in lookups], args.repeat)
+        shim = measure(after_path, lookups, args.repeat)
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{args.guilds} guilds, {args.players} players, {args.matches} matches; migration took {migration_ms:.0f} ms\n")
+    print(f"{'':34} {'TEXT keys':>12} {'INTEGER keys':>14}")
+    print(f"{'file size':34} {before[0] / 1024:>10.0f} KB {after[0] / 1024:>12.0f} KB")
+    for name in sorted(set(before[1]) | set(after[1])):
+        if name in ("sqlite_schema", "sqlite_sequence"):
+            continue
+        print(f"{name:34} {before[1].get(name, 0) / 1024:>10.0f} KB {after[1].get(name, 0) / 1024:>12.0f} KB")
+    print(f"{'history join (median)':34} {before[2]:>10.3f} ms {after[2]:>12.3f} ms")
+    print(f"{'history join, TEXT id parameter':34} {'':>13} {shim[2]:>12.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
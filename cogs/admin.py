@@ -0,0 +1,203 @@
+import discord
+import asyncio
+import logging
+import time
+import tracemalloc
+from discord.ext import commands
+from db.writer import get_write_metrics
+from utils.checks import OWNER_ID, is_ladder_admin
+from utils.memprofile import TRACEBACK_FRAMES, diff_by_module, dump_snapshot, format_size, live_objects, take_snapshot
+from utils.state import carry_over_cooldowns, shared_state
+from utils.timestamps import discord_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Commands that act on the whole bot process rather than one server
+owner_only = commands.check(lambda ctx: ctx.author.id == OWNER_ID)
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        """Every command in this cog is restricted to ladder admins."""
+        return is_ladder_admin(ctx.author)
+
+    @commands.command()
+    async def writerstats(self, ctx):
+        """Shows the write queue's group-commit and back-pressure metrics."""
+        metrics = await get_write_metrics()
+        embed = discord.Embed(
+            title="🗄️ Write Queue",
+            description=(
+                f"✍️ **Writes:** {metrics['writes']} ({metrics['failed_writes']} failed)\n"
+                f"📦 **Batches:** {metrics['batches']} (avg **{metrics['avg_batch_size']}**, largest **{metrics['largest_batch']}**)\n"
+                f"📥 **Queue depth:** {metrics['queue_depth']} (max **{metrics['max_queue_depth']}**)\n"
+                f"🚧 **Blocked submits:** {metrics['blocked_submits']}\n"
+                f"⏱️ **Latency:** avg **{metrics['avg_latency_ms']} ms**, max **{metrics['max_latency_ms']} ms**\n"
+                f"💾 **Commit time:** avg **{metrics['avg_commit_ms']} ms**"
+            ),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @owner_only
+    async def reload(self, ctx, cog: str):
+        """Reloads a cog from disk, keeping its shared state and cooldowns. Bot owner only."""
+        extension = cog if cog.startswith("cogs.") else f"cogs.{cog}"
+        if extension not in self.bot.extensions:
+            embed = discord.Embed(
+                title="❌ Unknown Cog",
+                description=f"`{extension}` is not loaded. Loaded cogs: {', '.join(f'`{name[5:]}`' for name in sorted(self.bot.extensions))}",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        old_commands = {
+            command.qualified_name: command
+            for loaded in self.bot.cogs.values() if type(loaded).__module__ == extension
+            for command in loaded.walk_commands()
+        }
+        started = time.perf_counter()
+        try:
+            await self.bot.reload_extension(extension)
+        except commands.ExtensionError as e:
+            # discord.py keeps the previous version loaded when the new one fails
+            logger.exception("Could not reload %s", extension, extra={"extension": extension})
+            embed = discord.Embed(
+                title="❌ Reload Failed",
+                description=f"`{extension}` was not reloaded and the previous version is still running:\n`{e}`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        for loaded in self.bot.cogs.values():
+            if type(loaded).__module__ == extension:
+                carry_over_cooldowns(old_commands, loaded)
+        reload_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("Reloaded %s", extension, extra={"extension": extension, "duration_ms": reload_ms})
+        embed = discord.Embed(
+            title="🔄 Cog Reloaded",
+            description=(
+                f"`{extension}` reloaded in **{reload_ms} ms** on shards {sorted(self.bot.shards)}.\n"
+                "Queues, caches, cooldowns and pending approvals were kept."
+            ),
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.group(invoke_without_command=True)
+    @owner_only
+    async def memprofile(self, ctx):
+        """Shows whether allocations are being traced. Bot owner only."""
+        profile = shared_state(self.bot, "memprofile", dict)
+        if tracemalloc.is_tracing() and "baseline" in profile:
+            current, peak = tracemalloc.get_traced_memory()
+            description = (
+                f"Tracing since {discord_timestamp(profile['started_at'])}: **{format_size(current, signed=False)}** traced "
+                f"(peak **{format_size(peak, signed=False)}**).\nUse `!fb memprofile diff` to see what grew, `!fb memprofile stop` to end."
+            )
+        else:
+            description = "Not tracing. `!fb memprofile start [frames]` takes a baseline to compare against."
+        embed = discord.Embed(title="🧠 Memory Profiler", description=description, color=discord.Color.blue())
+        await ctx.send(embed=embed)
+
+    @memprofile.command(name="start")
+    async def memprofile_start(self, ctx, frames: int = TRACEBACK_FRAMES):
+        """Starts tracing allocations and takes the baseline snapshot."""
+        if tracemalloc.is_tracing():
+            embed = discord.Embed(
+                title="🧠 Already Tracing",
+                description="Use `!fb memprofile diff`, or `!fb memprofile stop` before starting again.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+        tracemalloc.start(max(1, min(frames, 100)))
+        # Kept in the shared registry so reloading this cog does not lose the baseline
+        profile = shared_state(self.bot, "memprofile", dict)
+        async with ctx.typing():
+            profile["baseline"] = await asyncio.to_thread(take_snapshot)
+        profile["started_at"] = int(time.time() * 1000)
+        logger.info("Memory profiling started", extra={"frames": frames})
+        embed = discord.Embed(
+            title="🧠 Memory Profiling Started",
+            description="Allocations from now on are traced (the bot runs somewhat slower meanwhile).\n"
+                        "Use `!fb memprofile diff` later to see what grew.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @memprofile.command(name="diff")
+    async def memprofile_diff(self, ctx):
+        """Reports the growth since the baseline by module and by line, and dumps the snapshot to disk."""
+        profile = shared_state(self.bot, "memprofile", dict)
+        if not tracemalloc.is_tracing() or "baseline" not in profile:
+            embed = discord.Embed(title="❌ Not Tracing", description="Start with `!fb memprofile start`.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+
+        async with ctx.typing():
+            snapshot = await asyncio.to_thread(take_snapshot)
+            modules, sites = await asyncio.to_thread(diff_by_module, profile["baseline"], snapshot)
+            path = await asyncio.to_thread(dump_snapshot, snapshot)
+            views, embeds = live_objects()
+        current, peak = tracemalloc.get_traced_memory()
+
+        embed = discord.Embed(
+            title="🧠 Memory Growth",
+            description=f"Since {discord_timestamp(profile['started_at'])}. Traced now: **{format_size(current, signed=False)}** (peak **{format_size(peak, signed=False)}**).",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="📦 By Module",
+            value="\n".join(f"`{module}` {format_size(size)} ({count:+} blocks)" for module, size, count in modules) or "No change.",
+            inline=False
+        )
+        embed.add_field(
+            name="📍 Top Lines",
+            value="\n".join(f"`{site}` {format_size(size)} ({count:+})" for site, size, count in sites) or "No change.",
+            inline=False
+        )
+        embed.add_field(
+            name="🪟 Live Objects",
+            value=(
+                "\n".join(f"`{name}` views: **{count}**" for name, count in sorted(views.items(), key=lambda item: -item[1]))
+                + f"\n`discord.Embed` objects: **{embeds}**"
+            ).strip(),
+            inline=False
+        )
+        embed.add_field(
+            name="🗃️ Shared State",
+            value="\n".join(
+                f"`{name}`: **{len(value)}** entries" for name, value in sorted(self.bot.shared_state.items())
+                if hasattr(value, "__len__") and name != "memprofile"
+            ) or "Empty.",
+            inline=False
+        )
+        embed.set_footer(text=f"Snapshot saved to {path}")
+        await ctx.send(embed=embed)
+
+    @memprofile.command(name="stop")
+    async def memprofile_stop(self, ctx):
+        """Stops tracing and frees the traces and the baseline."""
+        tracemalloc.stop()
+        shared_state(self.bot, "memprofile", dict).clear()
+        logger.info("Memory profiling stopped")
+        embed = discord.Embed(title="🧠 Memory Profiling Stopped", description="Tracing is off.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    async def cog_command_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            embed = discord.Embed(
+                title="❌ Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
@@ -0,0 +1,293 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from aiohttp import web
+from discord.ext import commands
+from db.database import get_connection, get_current_season, get_guild_settings
+from db.ranking import calculate_rank, rank_thresholds
+from cogs.history import NO_FILTERS, build_history_query, count_history
+from utils.checks import runs_global_tasks
+from utils.ladders import MAIN_LADDER
+from utils.state import shared_state
+from utils.timestamps import now_ms
+
+logger = logging.getLogger(__name__)
+
+# Read-only JSON API for stream overlays and the website, off unless a port is set
+API_PORT = int(os.getenv("FIGHTBACK_API_PORT", "0"))
+API_HOST = os.getenv("FIGHTBACK_API_HOST", "127.0.0.1")
+
+MAX_PAGE_SIZE = 100
+DEFAULT_LEADERBOARD_SIZE = 50
+DEFAULT_HISTORY_SIZE = 20
+MAX_CACHED_RESPONSES = 2048
+
+
+def rank_name(points, thresholds):
+    return calculate_rank(points, thresholds).split(" ", 1)[1]
+
+
+def page_size(request, default):
+    try:
+        size = int(request.query.get("limit", default))
+    except ValueError:
+        raise web.HTTPBadRequest(text="limit must be a number")
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def resolve_scope(guild_id, name):
+    """Scope id of the guild's ladder called `name`, or None if there is no such ladder.
+
+    Reads the database directly rather than through get_ladders(), whose
+    process-wide cache would keep an entry for every id a client tries."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if name.lower() == MAIN_LADDER:
+        cursor.execute("SELECT ? FROM players WHERE guild_id = ? LIMIT 1", (guild_id, guild_id))
+    else:
+        cursor.execute("SELECT id FROM ladders WHERE guild_id = ? AND name = ?", (guild_id, name.lower()))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def query_leaderboard(scope, limit, offset):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM players WHERE guild_id = ?", (scope,))
+    total = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT discord_id, username, points
+        FROM players
+        WHERE guild_id = ?
+        ORDER BY points DESC, discord_id
+        LIMIT ? OFFSET ?
+    """, (scope, limit, offset))
+    players = cursor.fetchall()
+    season = get_current_season(cursor, scope)
+    conn.close()
+
+    thresholds = rank_thresholds(get_guild_settings(scope)["rank_points"])
+    return {
+        "season": season,
+        "total": total,
+        "players": [
+            {"position": position, "discord_id": str(discord_id), "username": username,
+             "points": points, "rank": rank_name(points, thresholds)}
+            for position, (discord_id, username, points) in enumerate(players, start=offset + 1)
+        ],
+    }
+
+
+def query_player(scope, discord_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT username, points FROM players WHERE guild_id = ? AND discord_id = ?", (scope, discord_id))
+    player = cursor.fetchone()
+    if not player:
+        conn.close()
+        return None
+    username, points = player
+    # Same order as the leaderboard pages: ties go to the lower discord id
+    cursor.execute(
+        "SELECT COUNT(*) FROM players WHERE guild_id = ? AND (points > ? OR (points = ? AND discord_id < ?))",
+        (scope, points, points, discord_id)
+    )
+    position = cursor.fetchone()[0] + 1
+    season = get_current_season(cursor, scope)
+    wins = count_history(cursor, scope, season, discord_id, dict(NO_FILTERS, result="wins"))
+    losses = count_history(cursor, scope, season, discord_id, dict(NO_FILTERS, result="losses"))
+    conn.close()
+
+    thresholds = rank_thresholds(get_guild_settings(scope)["rank_points"])
+    higher = [(minimum, rank.split(" ", 1)[1]) for minimum, rank in thresholds if minimum > points]
+    return {
+        "discord_id": str(discord_id),
+        "username": username,
+        "points": points,
+        "rank": rank_name(points, thresholds),
+        "next_rank": {"name": higher[-1][1], "points": higher[-1][0]} if higher else None,
+        "position": position,
+        "season": season,
+        "wins": wins,
+        "losses": losses,
+    }
+
+
+def query_history(scope, discord_id, season, before, limit):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM players WHERE guild_id = ? AND discord_id = ?", (scope, discord_id))
+    if not cursor.fetchone():
+        conn.close()
+        return None
+    current_season = get_current_season(cursor, scope)
+    if season == "current":
+        season = current_season
+    elif season is None:
+        season = list(range(1, current_season + 1))
+    sql, params = build_history_query(scope, season, discord_id, NO_FILTERS, before, limit + 1)
+    cursor.execute(sql, params)
+    matches = cursor.fetchall()
+    conn.close()
+
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        next_cursor = f"{matches[-1][5]}:{matches[-1][0]}"
+    return {
+        "season": season if not isinstance(season, list) else "all",
+        "matches": [
+            {"id": match_id, "winner": winner_name, "loser": loser_name,
+             "winner_score": winner_score, "loser_score": loser_score, "played_at": played_at,
+             "winner_points_gained": points_gained, "loser_points_lost": abs(points_lost or 0)}
+            for match_id, winner_name, loser_name, winner_score, loser_score, played_at, points_gained, points_lost in matches
+        ],
+        "next": next_cursor,
+    }
+
+
+class ApiCog(commands.Cog):
+    """Serves leaderboards, player profiles and match history as JSON.
+
+    Every response carries an ETag made of the ladder's version, which is bumped
+    by each committed write to the ladder. A client polling with If-None-Match
+    gets a 304 without a database query, and repeated requests between two
+    writes are answered from the rendered-response cache. Queries run in worker
+    threads, so the bot's event loop never waits on the database."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # ladder scope -> version; the epoch keeps the ETags of an earlier process from matching
+        self.versions = shared_state(bot, "api_versions", dict)
+        self.epoch = shared_state(bot, "api_epoch", lambda: format(now_ms(), "x"))
+        # request path and query -> (ETag, body); shared so a reload keeps them
+        self.responses = shared_state(bot, "api_responses", OrderedDict)
+        self.pending = {}   # Requests being rendered, so concurrent misses share one query
+        # (guild id, ladder name) -> scope id, for ladders that exist
+        self.scopes = shared_state(bot, "api_scopes", OrderedDict)
+        self.runner = None
+
+    async def cog_load(self):
+        if not API_PORT or not runs_global_tasks(self.bot):
+            return
+        app = web.Application()
+        app.add_routes([
+            web.get("/api/guilds/{guild_id}/leaderboard", self.leaderboard),
+            web.get("/api/guilds/{guild_id}/players/{discord_id}", self.player),
+            web.get("/api/guilds/{guild_id}/players/{discord_id}/history", self.history),
+        ])
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, API_HOST, API_PORT).start()
+        logger.info("Read-only API listening on %s:%s", API_HOST, API_PORT)
+
+    async def cog_unload(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        scope = change.get("guild_id")
+        if scope is not None:
+            self.versions[scope] = self.versions.get(scope, 0) + 1
+        if change["op"] == "restore_snapshot":
+            # A restore can remove ladders created after the snapshot
+            self.scopes.clear()
+
+    async def scope(self, request):
+        """Ladder scope named by the request: the guild's own ladder, or `?ladder=<name>`.
+
+        Only ladders that exist are remembered, so unknown ids cost a query in a
+        worker thread but no memory."""
+        try:
+            guild_id = int(request.match_info["guild_id"])
+        except ValueError:
+            raise web.HTTPNotFound(text="Unknown guild")
+        key = (guild_id, request.query.get("ladder", MAIN_LADDER).lower())
+        scope = self.scopes.get(key)
+        if scope is None:
+            scope = await asyncio.to_thread(resolve_scope, *key)
+            if scope is None:
+                raise web.HTTPNotFound(text="Unknown guild or ladder")
+            self.scopes[key] = scope
+            if len(self.scopes) > MAX_CACHED_RESPONSES:
+                self.scopes.popitem(last=False)
+        return scope
+
+    def player_id(self, request):
+        try:
+            return int(request.match_info["discord_id"])
+        except ValueError:
+            raise web.HTTPNotFound(text="Unknown player")
+
+    async def respond(self, request, scope, render, *args):
+        """Answers from the ladder's version: 304 if the client is current, the cached body
+        if one was rendered at this version, otherwise `render(*args)` in a worker thread."""
+        etag = f'"{self.epoch}-{scope}-{self.versions.get(scope, 0)}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+
+        key = request.path_qs
+        cached = self.responses.get(key)
+        if cached and cached[0] == etag:
+            self.responses.move_to_end(key)
+            body = cached[1]
+        else:
+            task = self.pending.get((key, etag))
+            if task is None:
+                task = asyncio.ensure_future(asyncio.to_thread(render, *args))
+                self.pending[(key, etag)] = task
+                task.add_done_callback(lambda _: self.pending.pop((key, etag), None))
+            data = await asyncio.shield(task)
+            if data is None:
+                raise web.HTTPNotFound(text="Player not registered on this ladder")
+            body = json.dumps(data).encode()
+            # Stored under the version read before the query: a write that lands
+            # during it bumps the version, so the body is never served as newer
+            self.responses[key] = (etag, body)
+            if len(self.responses) > MAX_CACHED_RESPONSES:
+                self.responses.popitem(last=False)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    async def leaderboard(self, request):
+        """GET /api/guilds/{guild_id}/leaderboard?ladder=&limit=&offset="""
+        scope = await self.scope(request)
+        limit = page_size(request, DEFAULT_LEADERBOARD_SIZE)
+        try:
+            offset = max(int(request.query.get("offset", 0)), 0)
+        except ValueError:
+            raise web.HTTPBadRequest(text="offset must be a number")
+        return await self.respond(request, scope, query_leaderboard, scope, limit, offset)
+
+    async def player(self, request):
+        """GET /api/guilds/{guild_id}/players/{discord_id}?ladder="""
+        scope = await self.scope(request)
+        return await self.respond(request, scope, query_player, scope, self.player_id(request))
+
+    async def history(self, request):
+        """GET /api/guilds/{guild_id}/players/{discord_id}/history?ladder=&season=N|all&limit=&before=
+
+        `before` is the `next` cursor of the previous page."""
+        scope = await self.scope(request)
+        limit = page_size(request, DEFAULT_HISTORY_SIZE)
+        season = request.query.get("season", "current")
+        if season.isdigit():
+            season = int(season)
+        elif season == "all":
+            season = None
+        elif season != "current":
+            raise web.HTTPBadRequest(text="season must be a number, current or all")
+        before = None
+        if "before" in request.query:
+            played_at, _, match_id = request.query["before"].partition(":")
+            if not (played_at.isdigit() and match_id.isdigit()):
+                raise web.HTTPBadRequest(text="before must be the next cursor of a previous page")
+            before = (int(played_at), int(match_id))
+        return await self.respond(request, scope, query_history, scope, self.player_id(request), season, before, limit)
+
+async def setup(bot):
+    await bot.add_cog(ApiCog(bot))
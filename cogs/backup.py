@@ -0,0 +1,152 @@
+import discord
+import logging
+import asyncio
+import os
+import sqlite3
+from discord.ext import commands, tasks
+from db.backup import take_snapshot, list_snapshots
+from db.memory import IN_MEMORY, FLUSH_INTERVAL_MINUTES
+from db.writer import submit_write, flush_database, WriteError
+from utils.checks import is_ladder_admin, runs_global_tasks
+from utils.outbox import outbox, PRIORITY_HIGH
+
+BACKUP_INTERVAL_HOURS = float(os.getenv("FIGHTBACK_BACKUP_INTERVAL_HOURS", "6"))
+
+logger = logging.getLogger(__name__)
+
+
+class BackupCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.backup_task.start()
+        if IN_MEMORY:
+            self.flush_task.start()
+
+    def cog_unload(self):
+        self.backup_task.cancel()
+        self.flush_task.cancel()
+
+    @tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+    async def backup_task(self):
+        """Takes a scheduled snapshot of the whole database."""
+        if not runs_global_tasks(self.bot):
+            return
+        try:
+            await take_snapshot("scheduled")
+        except Exception:
+            logger.exception("Scheduled backup failed")
+
+    @backup_task.before_loop
+    async def before_backup_task(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=FLUSH_INTERVAL_MINUTES)
+    async def flush_task(self):
+        """Writes the in-memory database to disk, which also empties the write journal."""
+        try:
+            await flush_database()
+        except (sqlite3.Error, OSError):
+            logger.exception("Flushing the in-memory database failed")
+
+    @commands.command()
+    async def backups(self, ctx):
+        """Lists the available snapshots, newest first."""
+        if not await self.check_admin(ctx):
+            return
+        snapshots = list_snapshots()
+        embed = discord.Embed(
+            title="💾 Backups",
+            description="\n".join(f"`{name}`" for name in snapshots[:20]) or "No snapshots yet.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text="Restore this server's ladder with !fb restore <snapshot>.")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def restore(self, ctx, snapshot: str = None):
+        """Restores this server's players, matches and seasons from a snapshot, after confirmation."""
+        if not await self.check_admin(ctx):
+            return
+        if snapshot not in list_snapshots():
+            embed = discord.Embed(
+                title="❌ Unknown Snapshot",
+                description="Usage: `!fb restore <snapshot>`. Use `!fb backups` to list the snapshots.",
+                color=discord.Color.red()
+            )
+            await outbox.send(ctx.channel, embed=embed)
+            return
+
+        # Request confirmation; the outcome is edited into the same message
+        embed = discord.Embed(
+            title="⚠️ Confirm Restore",
+            description=f"Replace this server's **leaderboard, match history and seasons** with snapshot `{snapshot}`?\n\n"
+                        "Type `yes` to confirm or `no` to cancel within 60 seconds.",
+            color=discord.Color.orange()
+        )
+        prompt = await outbox.send(ctx.channel, priority=PRIORITY_HIGH, embed=embed)
+
+        def check(message):
+            return message.author == ctx.author and message.channel == ctx.channel and message.content.lower() in ["yes", "no"]
+
+        try:
+            confirmation = await self.bot.wait_for("message", timeout=60.0, check=check)
+        except asyncio.TimeoutError:
+            embed = discord.Embed(
+                title="⌛ Timeout",
+                description="You took too long to respond. The restore was cancelled.",
+                color=discord.Color.red()
+            )
+            await outbox.edit(prompt, embed=embed)
+            return
+
+        if confirmation.content.lower() == "no":
+            embed = discord.Embed(
+                title="❌ Restore Cancelled",
+                description="The restore has been cancelled.",
+                color=discord.Color.red()
+            )
+            await outbox.edit(prompt, embed=embed)
+            return
+
+        try:
+            # The current state can be brought back with another restore
+            safety = await take_snapshot("pre-restore")
+            restored = await submit_write("restore_snapshot", guild_id=ctx.guild.id, snapshot=snapshot)
+        except (WriteError, OSError) as e:
+            logger.error("Restoring snapshot %s failed: %s", snapshot, e, extra={"guild": ctx.guild.id, "snapshot": snapshot})
+            embed = discord.Embed(
+                title="❌ Restore Failed",
+                description="An error occurred during the restore. Please check the logs for more details.",
+                color=discord.Color.red()
+            )
+            await outbox.edit(prompt, embed=embed)
+            return
+
+        logger.info(
+            "Guild restored from %s", snapshot,
+            extra={"guild": ctx.guild.id, "user": ctx.author.id, "snapshot": snapshot, "restored": restored}
+        )
+        embed = discord.Embed(
+            title="✅ Ladder Restored",
+            description=(
+                f"Restored from `{snapshot}`: **{restored.get('players', 0)}** players and "
+                f"**{restored.get('matches', 0)}** matches.\n"
+                f"The previous state was saved as `{safety}`."
+            ),
+            color=discord.Color.green()
+        )
+        await outbox.edit(prompt, embed=embed)
+
+    async def check_admin(self, ctx):
+        if is_ladder_admin(ctx.author):
+            return True
+        embed = discord.Embed(
+            title="❌ Unauthorized",
+            description="You are not authorized to use this command.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+async def setup(bot):
+    await bot.add_cog(BackupCog(bot))
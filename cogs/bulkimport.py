@@ -0,0 +1,238 @@
+import discord
+import csv
+import datetime
+import io
+import re
+from discord.ext import commands
+from db.database import get_connection, get_guild_settings, snowflake
+from db.ranking import MAX_SCORE, validate_score, apply_matches, rank_thresholds
+from db.writer import submit_write, WriteError
+from utils.checks import is_ladder_admin
+from utils.ladders import ladder_scope
+
+MAX_IMPORT_ROWS = 500
+MAX_IMPORT_BYTES = 1024 * 1024
+MAX_LISTED = 15
+
+MENTION_PATTERN = re.compile(r"<@!?(\d+)>")
+BRACKET_SCORE_PATTERN = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+
+
+class ImportFileError(Exception):
+    """A row of the uploaded file could not be used."""
+
+
+def parse_timestamp(value):
+    """Parses an ISO 8601 timestamp (UTC unless it has an offset) into the epoch milliseconds stored in the matches table."""
+    parsed = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if not parsed.tzinfo:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+def read_rows(text):
+    """Reads either the plain format (winner, loser, winner_score, loser_score[, timestamp])
+    or a bracket export (player1, player2, scores like '5-3'[, completed_at]).
+
+    Returns a list of (line number, winner, loser, winner_score, loser_score, timestamp)."""
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise ImportFileError("The file is empty.")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    fields = set(reader.fieldnames)
+
+    rows = []
+    for row in reader:
+        line = reader.line_num
+        timestamp = row.get("timestamp") or row.get("completed_at") or None
+        if {"winner", "loser", "winner_score", "loser_score"} <= fields:
+            rows.append((line, row["winner"], row["loser"], row["winner_score"], row["loser_score"], timestamp))
+        elif {"player1", "player2", "scores"} <= fields:
+            score = BRACKET_SCORE_PATTERN.match(row["scores"] or "")
+            if not score:
+                raise ImportFileError(f"Line {line}: scores must look like `5-3`.")
+            score1, score2 = int(score.group(1)), int(score.group(2))
+            if score1 >= score2:
+                rows.append((line, row["player1"], row["player2"], score1, score2, timestamp))
+            else:
+                rows.append((line, row["player2"], row["player1"], score2, score1, timestamp))
+        else:
+            raise ImportFileError(
+                "Unknown columns. Use `winner,loser,winner_score,loser_score[,timestamp]` "
+                "or a bracket export with `player1,player2,scores[,completed_at]`."
+            )
+        if len(rows) > MAX_IMPORT_ROWS:
+            raise ImportFileError(f"Imports are limited to **{MAX_IMPORT_ROWS}** matches per file.")
+    return rows
+
+
+def build_matches(rows, players, win_score=MAX_SCORE):
+    """Validates every row with the same rules as `!fb match` and returns the matches in chronological order.
+
+    players maps discord id -> username for the ladder. Returns (matches, errors)."""
+    by_name = {username.lower(): discord_id for discord_id, username in players.items()}
+
+    def resolve(reference):
+        reference = (reference or "").strip()
+        mention = MENTION_PATTERN.fullmatch(reference)
+        discord_id = mention.group(1) if mention else reference
+        if discord_id.isdigit() and int(discord_id) in players:
+            return int(discord_id)
+        if reference.lower() in by_name:
+            return by_name[reference.lower()]
+        raise ValueError(f"`{reference}` is not a registered player")
+
+    matches = []
+    errors = []
+    for line, winner, loser, winner_score, loser_score, timestamp in rows:
+        try:
+            winner_id = resolve(winner)
+            loser_id = resolve(loser)
+            if winner_id == loser_id:
+                raise ValueError("winner and loser cannot be the same person")
+            try:
+                winner_score, loser_score = int(winner_score), int(loser_score)
+            except (TypeError, ValueError):
+                raise ValueError("scores must be numbers")
+            score_error = validate_score(winner_score, loser_score, win_score)
+            if score_error:
+                raise ValueError(score_error[1])
+            if timestamp:
+                try:
+                    timestamp = parse_timestamp(timestamp)
+                except ValueError:
+                    raise ValueError(f"`{timestamp}` is not an ISO 8601 timestamp")
+        except ValueError as e:
+            errors.append(f"Line {line}: {e}")
+            continue
+        matches.append({
+            "winner_id": winner_id,
+            "loser_id": loser_id,
+            "winner_score": winner_score,
+            "loser_score": loser_score,
+            "timestamp": timestamp,
+        })
+
+    timestamped = [match for match in matches if match["timestamp"]]
+    if timestamped and len(timestamped) != len(matches):
+        errors.append("Either every row or no row must have a timestamp.")
+    # Stable sort: rows without timestamps keep the file's order
+    matches.sort(key=lambda match: match["timestamp"] or 0)
+    return matches, errors
+
+
+class ImportCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="import")
+    async def import_results(self, ctx, mode: str = None):
+        """Imports tournament results from an attached CSV. Use `!fb import dry` to preview the point changes."""
+        if not is_ladder_admin(ctx.author):
+            embed = discord.Embed(
+                title="❌ Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        dry_run = (mode or "").lower() in ("dry", "dry-run", "preview")
+        if not ctx.message.attachments:
+            embed = discord.Embed(
+                title="❌ No File Attached",
+                description=(
+                    "Attach a CSV with `winner,loser,winner_score,loser_score[,timestamp]` "
+                    "or a bracket export with `player1,player2,scores[,completed_at]`.\n"
+                    "Players can be mentions, Discord IDs or registered names.\n"
+                    "Use `!fb import dry` to preview without saving."
+                ),
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_IMPORT_BYTES:
+            await ctx.send(embed=self.error_embed(["The file is larger than 1 MB."]))
+            return
+
+        scope = ladder_scope(ctx)
+        settings = get_guild_settings(scope)
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT discord_id, username, points, rank FROM players WHERE guild_id = ?", (scope,))
+        registered = cursor.fetchall()
+        conn.close()
+        players = {discord_id: username for discord_id, username, _, _ in registered}
+
+        try:
+            text = (await attachment.read()).decode("utf-8-sig")
+            rows = read_rows(text)
+        except UnicodeDecodeError:
+            await ctx.send(embed=self.error_embed(["The file must be UTF-8 encoded text."]))
+            return
+        except (ImportFileError, csv.Error) as e:
+            await ctx.send(embed=self.error_embed([str(e)]))
+            return
+
+        matches, errors = build_matches(rows, players, settings["win_score"])
+        if errors or not matches:
+            await ctx.send(embed=self.error_embed(errors or ["The file contains no matches."]))
+            return
+
+        if dry_run:
+            standings = {discord_id: [points, rank] for discord_id, _, points, rank in registered}
+            before = {discord_id: standing[0] for discord_id, standing in standings.items()}
+            apply_matches(standings, matches, rank_thresholds(settings["rank_points"]))
+            changes = {
+                discord_id: [before[discord_id], *standings[discord_id]]
+                for discord_id in {match[key] for match in matches for key in ("winner_id", "loser_id")}
+            }
+            embed = self.changes_embed(
+                "🧪 Import Preview",
+                f"**{len(matches)}** matches are valid. Nothing was saved; run `!fb import` to apply them.",
+                changes, players, discord.Color.blue()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        try:
+            async with ctx.typing():
+                result = await submit_write("import_matches", guild_id=scope, matches=matches)
+        except WriteError as e:
+            # e.g. a player unregistered since the file was checked; the whole import is rolled back
+            await ctx.send(embed=self.error_embed([str(e)]))
+            return
+        embed = self.changes_embed(
+            "📥 Results Imported",
+            f"**{len(matches)}** matches recorded (IDs `{result['first_match_id']}`–`{result['last_match_id']}`).",
+            result["players"], players, discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    def changes_embed(self, title, description, changes, players, color):
+        """Lists every affected player's points before and after, biggest movers first."""
+        embed = discord.Embed(title=title, description=description, color=color)
+        ordered = sorted(changes.items(), key=lambda item: abs(item[1][1] - item[1][0]), reverse=True)
+        lines = [
+            f"**{players.get(snowflake(discord_id), discord_id)}**: {before} → **{after}** ({after - before:+d}) {rank}"
+            for discord_id, (before, after, rank) in ordered[:MAX_LISTED]
+        ]
+        if len(ordered) > MAX_LISTED:
+            lines.append(f"…and {len(ordered) - MAX_LISTED} more players.")
+        embed.add_field(name="📊 Point Changes", value="\n".join(lines), inline=False)
+        return embed
+
+    def error_embed(self, errors):
+        lines = errors[:MAX_LISTED]
+        if len(errors) > MAX_LISTED:
+            lines.append(f"…and {len(errors) - MAX_LISTED} more problems.")
+        return discord.Embed(
+            title="❌ Import Failed",
+            description="Nothing was imported.\n\n" + "\n".join(lines),
+            color=discord.Color.red()
+        )
+
+async def setup(bot):
+    await bot.add_cog(ImportCog(bot))
@@ -0,0 +1,112 @@
+import discord
+from discord.ext import commands
+from db.database import get_connection, get_current_season
+from utils.ladders import ladder_scope
+
+# Minimum win rate for each tier, highest first
+TIERS = [(0.60, "🏆 S"), (0.52, "🥇 A"), (0.45, "🥈 B"), (0.0, "🥉 C")]
+MIN_TIER_GAMES = 5  # Characters with fewer games are listed apart instead of ranked
+
+
+def win_rate(wins, losses):
+    return wins / (wins + losses) if wins + losses else 0.0
+
+
+def format_record(character, wins, losses):
+    return f"**{character}** {wins}W-{losses}L ({win_rate(wins, losses):.0%})"
+
+
+class CharactersCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command()
+    @commands.cooldown(1, 10, commands.BucketType.user)
+    async def chars(self, ctx, member: discord.Member = None):
+        """Shows the season's character tier list, or one player's record with each character.
+
+        Both read the counters kept up to date by every recorded match, never the match log."""
+        scope = ladder_scope(ctx)
+        conn = get_connection()
+        cursor = conn.cursor()
+        season = get_current_season(cursor, scope)
+        if member is None:
+            cursor.execute(
+                "SELECT character, wins, losses FROM character_stats WHERE guild_id = ? AND season = ?",
+                (scope, season)
+            )
+        else:
+            cursor.execute(
+                "SELECT character, wins, losses FROM player_character_stats WHERE guild_id = ? AND season = ? AND discord_id = ?",
+                (scope, season, member.id)
+            )
+        rows = cursor.fetchall()
+        conn.close()
+
+        if not rows:
+            embed = discord.Embed(
+                title="📭 No Character Data",
+                description=(
+                    f"No matches with characters this season{f' for {member.mention}' if member else ''}.\n"
+                    "Add teams when reporting: `!fb match @Ryu @Ken 5 3 Painwheel/Valentine Filia`"
+                ),
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        if member is not None:
+            rows.sort(key=lambda row: (-(row[1] + row[2]), -win_rate(row[1], row[2])))
+            embed = discord.Embed(
+                title=f"🎮 Characters - Season {season}",
+                description=f"{member.mention}'s record with each character, most played first.\n\n"
+                            + "\n".join(format_record(*row) for row in rows),
+                color=discord.Color.purple()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        embed = discord.Embed(
+            title=f"🎮 Character Tier List - Season {season}",
+            description=f"Ranked by win rate. A character needs **{MIN_TIER_GAMES} games** to be ranked.",
+            color=discord.Color.purple()
+        )
+        ranked = sorted(
+            (row for row in rows if row[1] + row[2] >= MIN_TIER_GAMES),
+            key=lambda row: win_rate(row[1], row[2]), reverse=True
+        )
+        for minimum, tier in TIERS:
+            members = [row for row in ranked if win_rate(row[1], row[2]) >= minimum]
+            ranked = ranked[len(members):]
+            if members:
+                embed.add_field(name=tier, value="\n".join(format_record(*row) for row in members), inline=False)
+        unranked = [row for row in rows if row[1] + row[2] < MIN_TIER_GAMES]
+        if unranked:
+            embed.add_field(
+                name="❔ Not Enough Games",
+                value=", ".join(f"{character} ({wins + losses})" for character, wins, losses in unranked),
+                inline=False
+            )
+        embed.set_footer(text="Try Painwheel!")
+        await ctx.send(embed=embed)
+
+    @chars.error
+    async def chars_error(self, ctx, error):
+        """Handles cooldown errors by notifying the user of remaining time."""
+        if isinstance(error, commands.CommandOnCooldown):
+            embed = discord.Embed(
+                title="⏳ Cooldown Active",
+                description=f"Please wait **{round(error.retry_after, 2)} seconds** before using `!fb chars` again.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+        elif isinstance(error, commands.MemberNotFound):
+            embed = discord.Embed(
+                title="❌ Member Not Found",
+                description="Usage: `!fb chars [@user]`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(CharactersCog(bot))
@@ -0,0 +1,180 @@
+import discord
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tempfile
+from discord.ext import commands
+from db.database import get_connection, get_current_season
+from utils.checks import is_ladder_admin
+from utils.ladders import ladder_name, ladder_scope
+
+EXPORT_COLUMNS = [
+    "match_id", "season", "timestamp",
+    "winner_id", "winner_name", "loser_id", "loser_name",
+    "winner_score", "loser_score", "winner_points_gained", "loser_points_lost",
+]
+
+# Discord ids exceed 2^53, which JSON readers such as JavaScript parse as doubles,
+# so JSON Lines exports write them as strings
+SNOWFLAKE_COLUMNS = ("winner_id", "loser_id")
+
+# Rows fetched from SQLite per round trip, and how much of the compressed file
+# stays in memory before it spills to a temporary file on disk
+FETCH_SIZE = 1000
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Largest attachment Discord accepts for bots without a boosted server
+UPLOAD_LIMIT = 25 * 1024 * 1024
+
+
+def iter_match_rows(conn, guild_id, season=None):
+    """Yields the guild's matches joined with player names, oldest first, without loading them all.
+
+    Rows come straight off idx_matches_guild_season_id, season by season, so
+    the first one is sent before the rest are read."""
+    query = """
+        SELECT m.id, m.season, strftime('%Y-%m-%dT%H:%M:%fZ', m.timestamp / 1000.0, 'unixepoch'),
+               m.winner_id, COALESCE(p1.username, '[Left Player]'),
+               m.loser_id, COALESCE(p2.username, '[Left Player]'),
+               m.winner_score, m.loser_score, m.winner_points_gained, m.loser_points_lost
+        FROM matches m
+        LEFT JOIN players p1 ON p1.guild_id = m.guild_id AND p1.discord_id = m.winner_id
+        LEFT JOIN players p2 ON p2.guild_id = m.guild_id AND p2.discord_id = m.loser_id
+        WHERE m.guild_id = ?
+    """
+    params = [guild_id]
+    if season is not None:
+        query += " AND m.season = ?"
+        params.append(season)
+    query += " ORDER BY m.season, m.id"
+
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def write_export(guild_id, season, fmt):
+    """Streams the export into a gzip-compressed spooled file. Runs in a worker thread.
+
+    Returns (file positioned at the start, number of rows)."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    conn = get_connection()
+    count = 0
+    try:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as compressed:
+            text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+            if fmt == "csv":
+                writer = csv.writer(text)
+                writer.writerow(EXPORT_COLUMNS)
+                for row in iter_match_rows(conn, guild_id, season):
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in iter_match_rows(conn, guild_id, season):
+                    record = dict(zip(EXPORT_COLUMNS, row))
+                    for column in SNOWFLAKE_COLUMNS:
+                        if record[column] is not None:
+                            record[column] = str(record[column])
+                    text.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+            text.flush()
+            text.detach()  # Leave closing the gzip stream to the with block
+    finally:
+        conn.close()
+    spool.seek(0)
+    return spool, count
+
+
+class ExportCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command()
+    @commands.cooldown(1, 60, commands.BucketType.guild)
+    async def export(self, ctx, fmt: str = "csv", season: str = None):
+        """Uploads this server's match history as a compressed CSV or JSON Lines file."""
+        if not is_ladder_admin(ctx.author):
+            embed = discord.Embed(
+                title="❌ Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        fmt = fmt.lower()
+        if fmt not in ("csv", "jsonl"):
+            embed = discord.Embed(
+                title="❌ Invalid Format",
+                description="Usage: `!fb export [csv|jsonl] [season|all]`\nExample: `!fb export jsonl 3`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        scope = ladder_scope(ctx)
+        if season is None:
+            conn = get_connection()
+            season_number = get_current_season(conn.cursor(), scope)
+            conn.close()
+        elif season.lower() == "all":
+            season_number = None
+        elif season.isdigit():
+            season_number = int(season)
+        else:
+            embed = discord.Embed(
+                title="❌ Invalid Season",
+                description="The season must be a number or `all`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        # The query and compression run in a thread so the bot keeps responding
+        async with ctx.typing():
+            spool, count = await asyncio.to_thread(write_export, scope, season_number, fmt)
+
+        try:
+            size = spool.seek(0, io.SEEK_END)
+            spool.seek(0)
+            if size > UPLOAD_LIMIT:
+                embed = discord.Embed(
+                    title="❌ Export Too Large",
+                    description=f"The compressed export is **{size / 1024 / 1024:.1f} MB**, above Discord's upload limit. "
+                                "Try exporting a single season.",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+
+            label = f"season{season_number}" if season_number is not None else "all-seasons"
+            if scope != ctx.guild.id:
+                label = f"{ladder_name(ctx.guild.id, scope)}-{label}"
+            filename = f"fightback-{ctx.guild.id}-{label}.{fmt}.gz"
+            embed = discord.Embed(
+                title="📦 Match Export",
+                description=f"**{count}** matches from {f'season **{season_number}**' if season_number is not None else '**all seasons**'}.",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed, file=discord.File(spool, filename=filename))
+        finally:
+            spool.close()
+
+    @export.error
+    async def export_error(self, ctx, error):
+        """Handles cooldown errors by notifying the user of remaining time."""
+        if isinstance(error, commands.CommandOnCooldown):
+            embed = discord.Embed(
+                title="⏳ Cooldown Active",
+                description=f"Please wait **{round(error.retry_after, 2)} seconds** before using `!fb export` again.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(ExportCog(bot))
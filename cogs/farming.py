@@ -0,0 +1,234 @@
+import discord
+import logging
+import asyncio
+import calendar
+import time
+from discord.ext import commands
+from db.database import get_connection, get_current_season, get_guild_settings, ladder_guild
+from db.writer import submit_write
+from utils.checks import is_ladder_admin
+from utils.ladders import ladder_scope
+from utils.farming import (
+    FarmingDetector, RULES, WINDOW, PAIR_LIMIT, ALTERNATION_RUN, APPROVER_LIMIT, RESET_BURST_WINDOW, RESET_BURST_LIMIT
+)
+from utils.outbox import outbox
+from utils.state import shared_state
+from utils.timestamps import discord_timestamp
+
+logger = logging.getLogger(__name__)
+
+FETCH_SIZE = 1000
+MAX_LISTED = 15
+
+
+def parse_timestamp(value):
+    """Converts a stored UTC 'YYYY-MM-DD HH:MM:SS' season timestamp to epoch seconds."""
+    return calendar.timegm(time.strptime(value[:19], "%Y-%m-%d %H:%M:%S"))
+
+
+def describe_flag(rule, subject, count):
+    if rule == "repeated_pair":
+        return f"<@{subject[0]}> and <@{subject[1]}> played **{count}** matches within {WINDOW // 3600} hours."
+    if rule == "alternating_wins":
+        return f"<@{subject[0]}> and <@{subject[1]}> traded wins **{count}** matches in a row."
+    if rule == "reset_burst":
+        return f"<@{subject[0]}> and <@{subject[1]}> played **{count}** matches within {RESET_BURST_WINDOW // 3600} hours of the season reset."
+    return f"<@{subject[0]}> approved **{count}** matches within {WINDOW // 3600} hours."
+
+
+def scan_history(guild_id, season=None):
+    """Replays the guild's stored matches through a fresh detector. Runs in a worker thread.
+
+    Returns a list of (match id, timestamp, rule, subject, count)."""
+    detector = FarmingDetector()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT season, started_at FROM seasons WHERE guild_id = ?", (guild_id,))
+        season_starts = {number: parse_timestamp(started_at) for number, started_at in cursor.fetchall() if started_at}
+
+        query = "SELECT id, season, timestamp, winner_id, loser_id, approved_by FROM matches WHERE guild_id = ?"
+        params = [guild_id]
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        # In time order, as the detector's windows assume: imported matches keep their
+        # original, older times but get new ids. No index gives this order, so SQLite
+        # sorts it here, in the worker thread.
+        cursor.execute(query + " ORDER BY timestamp, id", params)
+
+        found = []
+        current_season = None
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for match_id, match_season, timestamp, winner_id, loser_id, approved_by in rows:
+                if match_season != current_season:
+                    current_season = match_season
+                    if match_season in season_starts:
+                        detector.season_started(guild_id, season_starts[match_season])
+                for rule, subject, count in detector.observe(guild_id, winner_id, loser_id, approved_by, timestamp / 1000):
+                    found.append((match_id, timestamp, rule, subject, count))
+    finally:
+        conn.close()
+    return found
+
+
+class FarmingCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # Shared so reloading this cog does not reset the sliding windows
+        self.detector = shared_state(bot, "farming_detector", FarmingDetector)
+
+    async def cog_check(self, ctx):
+        """Every command in this cog is restricted to ladder admins."""
+        return is_ladder_admin(ctx.author)
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        """Feeds every committed match of a guild served by this process to the detector.
+
+        The detector keeps each ladder of a guild apart."""
+        guild_id = change.get("guild_id")
+        guild = self.bot.get_guild(ladder_guild(guild_id)) if guild_id else None
+        if guild is None:
+            return
+        if change["op"] == "reset_season":
+            self.detector.season_started(guild_id, time.time())
+            return
+        if change["op"] not in ("record_match", "report_tournament_match"):
+            return
+
+        if guild_id not in self.detector.season_starts:
+            self.load_season_start(guild_id)
+        winner_id, loser_id = change["players"]
+        flags = self.detector.observe(guild_id, winner_id, loser_id, change.get("approved_by"), time.time())
+        if flags:
+            await self.alert(guild, flags, change["match_id"])
+
+    def load_season_start(self, guild_id):
+        """Seeds the detector with the start of the guild's current season the first time it is seen."""
+        conn = get_connection()
+        cursor = conn.cursor()
+        season = get_current_season(cursor, guild_id)
+        cursor.execute("SELECT started_at FROM seasons WHERE guild_id = ? AND season = ?", (guild_id, season))
+        row = cursor.fetchone()
+        conn.close()
+        if row and row[0]:
+            self.detector.season_started(guild_id, parse_timestamp(row[0]))
+
+    async def alert(self, guild, flags, match_id):
+        """Posts the flags raised by a match on any of the guild's ladders to its admin channel."""
+        channel_id = get_guild_settings(guild.id)["admin_channel_id"]
+        channel = guild.get_channel(channel_id) if channel_id else None
+        for rule, subject, count in flags:
+            logger.warning(
+                "Win farming flagged: %s", rule,
+                extra={"guild": guild.id, "rule": rule, "subject": list(subject), "count": count, "match_id": match_id}
+            )
+        if channel is None:
+            return
+        embed = discord.Embed(
+            title="🚩 Possible Win Farming",
+            description="\n".join(f"**{RULES[rule]}:** {describe_flag(rule, subject, count)}" for rule, subject, count in flags),
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text=f"Triggered by match {match_id}. Review it with !fb history.")
+        try:
+            await outbox.send(channel, embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        except discord.HTTPException as e:
+            logger.warning("Could not post a farming alert: %s", e, extra={"guild": guild.id, "channel": channel.id})
+
+    @commands.group(invoke_without_command=True)
+    async def farming(self, ctx):
+        """Shows the win-farming alert channel and thresholds."""
+        channel_id = get_guild_settings(ctx.guild.id)["admin_channel_id"]
+        embed = discord.Embed(
+            title="🚩 Win-Farming Detection",
+            description=(
+                f"📢 **Alert channel:** {f'<#{channel_id}>' if channel_id else 'Not set (alerts are only logged)'}\n\n"
+                f"{RULES['repeated_pair']}: **{PAIR_LIMIT}** matches between two players in {WINDOW // 3600} hours\n"
+                f"{RULES['alternating_wins']}: **{ALTERNATION_RUN}** matches in a row with the winner flipping\n"
+                f"{RULES['approver_volume']}: **{APPROVER_LIMIT}** approvals by one player in {WINDOW // 3600} hours\n"
+                f"{RULES['reset_burst']}: **{RESET_BURST_LIMIT}** matches between two players in the first {RESET_BURST_WINDOW // 3600} hours of a season\n\n"
+                "Use `!fb farming channel #channel` to set where alerts go and `!fb farming scan [season|all]` to check past matches."
+            ),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+
+    @farming.command(name="channel")
+    async def farming_channel(self, ctx, channel: discord.TextChannel):
+        """Sets the channel win-farming alerts are posted in."""
+        await submit_write("update_guild_settings", guild_id=ctx.guild.id, admin_channel_id=channel.id)
+        embed = discord.Embed(
+            title="✅ Alert Channel Updated",
+            description=f"Win-farming alerts will be posted in {channel.mention}.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @farming.command(name="scan")
+    @commands.cooldown(1, 60, commands.BucketType.guild)
+    async def farming_scan(self, ctx, season: str = None):
+        """Replays a season (default: the current one) or every season through the detector."""
+        if season is None:
+            conn = get_connection()
+            season_number = get_current_season(conn.cursor(), ladder_scope(ctx))
+            conn.close()
+        elif season.lower() == "all":
+            season_number = None
+        elif season.isdigit():
+            season_number = int(season)
+        else:
+            embed = discord.Embed(title="❌ Invalid Season", description="The season must be a number or `all`.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+
+        async with ctx.typing():
+            found = await asyncio.to_thread(scan_history, ladder_scope(ctx), season_number)
+
+        scope = f"season **{season_number}**" if season_number is not None else "**all seasons**"
+        if not found:
+            embed = discord.Embed(title="✅ Nothing Suspicious", description=f"No win-farming patterns found in {scope}.", color=discord.Color.green())
+            await ctx.send(embed=embed)
+            return
+
+        counts = {}
+        for _, _, rule, _, _ in found:
+            counts[rule] = counts.get(rule, 0) + 1
+        lines = [
+            f"`#{match_id}` {discord_timestamp(timestamp)} **{RULES[rule]}:** {describe_flag(rule, subject, count)}"
+            for match_id, timestamp, rule, subject, count in found[-MAX_LISTED:]
+        ]
+        if len(found) > MAX_LISTED:
+            lines.insert(0, f"Latest {MAX_LISTED} of {len(found)}:")
+        embed = discord.Embed(
+            title="🚩 Win-Farming Scan",
+            description=(
+                f"Patterns found in {scope}: " + ", ".join(f"{RULES[rule]} ×{count}" for rule, count in counts.items())
+                + "\n\n" + "\n".join(lines)
+            ),
+            color=discord.Color.orange()
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    async def cog_command_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            embed = discord.Embed(
+                title="❌ Unauthorized",
+                description="You are not authorized to use this command.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+        elif isinstance(error, commands.CommandOnCooldown):
+            embed = discord.Embed(
+                title="⏳ Cooldown Active",
+                description=f"Please wait **{round(error.retry_after, 2)} seconds** before scanning again.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(FarmingCog(bot))
@@ -0,0 +1,148 @@
+import discord
+import asyncio
+import io
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from discord.ext import commands
+from db.database import get_connection, get_current_season, get_guild_settings
+from db.ranking import rank_thresholds
+from utils.charts import render_rating_chart
+from utils.ladders import ladder_scope
+from utils.state import shared_state
+
+MAX_CACHED_CHARTS = 256
+
+
+def fetch_timeline(cursor, guild_id, season, discord_id):
+    """Returns the player's points after each of their matches in a season, oldest first.
+
+    Each half of the query is a range scan of the (guild_id, season, winner_id)
+    or (guild_id, season, loser_id) index."""
+    cursor.execute("""
+        SELECT id, winner_points_after FROM matches WHERE guild_id = ? AND season = ? AND winner_id = ?
+        UNION ALL
+        SELECT id, loser_points_after FROM matches WHERE guild_id = ? AND season = ? AND loser_id = ?
+        ORDER BY id
+    """, (guild_id, season, discord_id, guild_id, season, discord_id))
+    return [points for _, points in cursor.fetchall()]
+
+
+class GraphCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # (ladder scope, discord id, season) -> PNG bytes, dropped when the player's matches change
+        self.charts = shared_state(bot, "graph_charts", OrderedDict)
+        # ladder scope -> changes seen, so a chart rendered from data that changed meanwhile is not cached
+        self.generations = shared_state(bot, "graph_generations", dict)
+        # Spawned rather than forked: forking a process running the event loop and
+        # the writer thread is not safe
+        self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def cog_unload(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        """Forgets the charts of every player a committed write touched."""
+        guild_id = change.get("guild_id")
+        self.generations[guild_id] = self.generations.get(guild_id, 0) + 1
+        players = change.get("players")
+        if change["op"] in ("record_match", "import_matches", "report_tournament_match") and players:
+            for key in [key for key in self.charts if key[0] == guild_id and key[1] in players]:
+                del self.charts[key]
+        elif change["op"] in ("reset_season", "apply_decay", "restore_snapshot") or change.get("ranks"):
+            for key in [key for key in self.charts if key[0] == guild_id]:
+                del self.charts[key]
+
+    @commands.command()
+    @commands.cooldown(1, 30, commands.BucketType.user)
+    async def graph(self, ctx, member: discord.Member = None):
+        """Shows a chart of a player's points over the current season."""
+        member = member or ctx.author
+        discord_id = member.id
+        scope = ladder_scope(ctx)
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT username, points FROM players WHERE guild_id = ? AND discord_id = ?", (scope, discord_id))
+        player = cursor.fetchone()
+        if not player:
+            conn.close()
+            embed = discord.Embed(
+                title="❌ Graph Failed",
+                description=f"{member.mention} is not registered on this ladder.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        season = get_current_season(cursor, scope)
+        key = (scope, discord_id, season)
+        chart = self.charts.get(key)
+        if chart is None:
+            generation = self.generations.get(scope, 0)
+            timeline = fetch_timeline(cursor, scope, season, discord_id)
+            # Inactivity decay changes points without a match: end on the points the profile shows
+            if timeline and timeline[-1] != player[1]:
+                timeline.append(player[1])
+        conn.close()
+
+        if chart is None:
+            if not timeline:
+                embed = discord.Embed(
+                    title="📈 No Matches Yet",
+                    description=f"**{player[0]}** has not played a match in season **{season}**.",
+                    color=discord.Color.orange()
+                )
+                await ctx.send(embed=embed)
+                return
+
+            async with ctx.typing():
+                try:
+                    chart = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, render_rating_chart, f"{player[0]} - Season {season}", timeline,
+                        rank_thresholds(get_guild_settings(scope)["rank_points"])
+                    )
+                except ImportError:
+                    embed = discord.Embed(
+                        title="❌ Graphs Unavailable",
+                        description="Charts need matplotlib, which is not installed on this bot.",
+                        color=discord.Color.red()
+                    )
+                    await ctx.send(embed=embed)
+                    return
+            if generation == self.generations.get(scope, 0):
+                self.charts[key] = chart
+            if len(self.charts) > MAX_CACHED_CHARTS:
+                self.charts.popitem(last=False)
+        else:
+            self.charts.move_to_end(key)
+
+        embed = discord.Embed(
+            title=f"📈 {player[0]}'s Rating - Season {season}",
+            color=discord.Color.blue()
+        )
+        embed.set_image(url="attachment://rating.png")
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(chart), filename="rating.png"))
+
+    @graph.error
+    async def graph_error(self, ctx, error):
+        """Handles cooldown errors by notifying the user of remaining time."""
+        if isinstance(error, commands.CommandOnCooldown):
+            embed = discord.Embed(
+                title="⏳ Cooldown Active",
+                description=f"Please wait **{round(error.retry_after, 2)} seconds** before using `!fb graph` again.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+        elif isinstance(error, commands.MemberNotFound):
+            embed = discord.Embed(
+                title="❌ Member Not Found",
+                description="Usage: `!fb graph [@user]`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(GraphCog(bot))
@@ -1,14 +1,206 @@
+import datetime
+import re
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
-from db.database import get_connection
+from db.database import get_connection, get_current_season, snowflake
+from utils.ladders import ladder_scope
+from utils.timestamps import discord_timestamp, now_ms
+
+MATCHES_PER_PAGE = 5
+
+FILTER_USAGE = (
+    "Usage: `!fb history [vs:@user] [since:DATE] [until:DATE] [wins|losses] [season:N|all]`\n"
+    "Dates are `YYYY-MM-DD` (UTC) or a time ago like `12h`, `7d` or `2w`.\n"
+    "Example: `!fb history losses vs:@Rival since:7d`"
+)
+
+RELATIVE_UNITS = {"h": 3600, "d": 86400, "w": 7 * 86400}
+
+# The filters of a plain `!fb history`
+NO_FILTERS = {"opponent": None, "since": None, "until": None, "result": None, "season": "current"}
+
+# One branch per side of the match, so each is served in (timestamp, id) order
+# by idx_matches_guild_winner / idx_matches_guild_loser and SQLite merges the
+# two sorted streams, stopping after one page
+HISTORY_BRANCH = """
+    SELECT m.id AS match_id,
+        COALESCE(p1.username, '[Left Player]') AS winner_name,
+        COALESCE(p2.username, '[Left Player]') AS loser_name,
+        m.winner_score, m.loser_score, m.timestamp AS played_at,
+        m.winner_points_gained, m.loser_points_lost
+    FROM matches m
+    LEFT JOIN players p1 ON p1.guild_id = m.guild_id AND p1.discord_id = m.winner_id
+    LEFT JOIN players p2 ON p2.guild_id = m.guild_id AND p2.discord_id = m.loser_id
+    WHERE {where}
+"""
+
+
+def parse_date(value, end=False):
+    """Parses `YYYY-MM-DD` (UTC) or a time ago (`12h`, `7d`, `2w`) into epoch milliseconds.
+    A date used as an end bound covers that whole day."""
+    relative = re.fullmatch(r"(\d+)([hdw])", value.lower())
+    if relative:
+        return now_ms() - int(relative.group(1)) * RELATIVE_UNITS[relative.group(2)] * 1000
+    day = datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    if end:
+        day += datetime.timedelta(days=1)
+    return round(day.timestamp() * 1000)
+
+
+async def parse_filters(ctx, args):
+    """Turns the command arguments into a filters dict. Raises commands.BadArgument on anything it does not understand."""
+    filters = dict(NO_FILTERS)
+    for arg in args:
+        key, _, value = arg.partition(":")
+        key = key.lower()
+        if arg.lower() in ("wins", "losses"):
+            filters["result"] = arg.lower()
+        elif key == "vs" and value:
+            if value.isdigit():
+                filters["opponent"] = snowflake(value)  # Also works for players who left the server
+            else:
+                filters["opponent"] = (await commands.MemberConverter().convert(ctx, value)).id
+        elif key in ("since", "until") and value:
+            try:
+                filters[key] = parse_date(value, end=key == "until")
+            except ValueError:
+                raise commands.BadArgument(f"`{value}` is not a date like `2024-05-01` or a time ago like `7d`.")
+        elif key == "season" and (value.isdigit() or value.lower() == "all"):
+            filters["season"] = int(value) if value.isdigit() else None
+        else:
+            raise commands.BadArgument(f"Unknown filter `{arg}`.")
+    return filters
+
+
+def history_conditions(guild_id, season, player_id, side, filters, before):
+    """WHERE clause and parameters for the matches where the player is on `side` ("winner" or "loser")."""
+    conditions = ["m.guild_id = ?"]
+    params = [guild_id]
+    if isinstance(season, list):
+        # Listing the seasons keeps player_id usable as an index column
+        conditions.append(f"m.season IN ({', '.join('?' * len(season))})")
+        params.extend(season)
+    else:
+        conditions.append("m.season = ?")
+        params.append(season)
+
+    other = "loser" if side == "winner" else "winner"
+    conditions.append(f"m.{side}_id = ?")
+    params.append(player_id)
+    if filters["opponent"] is not None:
+        conditions.append(f"m.{other}_id = ?")
+        params.append(filters["opponent"])
+    if filters["since"] is not None:
+        conditions.append("m.timestamp >= ?")
+        params.append(filters["since"])
+    if filters["until"] is not None:
+        conditions.append("m.timestamp < ?")
+        params.append(filters["until"])
+    if before is not None:
+        conditions.append("(m.timestamp, m.id) < (?, ?)")
+        params.extend(before)
+    return " AND ".join(conditions), params
+
+
+def build_history_query(guild_id, season, player_id, filters, before=None, limit=MATCHES_PER_PAGE + 1):
+    """Returns (sql, params) for one page of the player's matches, newest first.
+
+    `season` is a season number or a list of them. `before` is the (timestamp, id)
+    of the last match on the previous page."""
+    sides = {"wins": ["winner"], "losses": ["loser"]}.get(filters["result"], ["winner", "loser"])
+    branches, params = [], []
+    for side in sides:
+        where, branch_params = history_conditions(guild_id, season, player_id, side, filters, before)
+        branches.append(HISTORY_BRANCH.format(where=where))
+        params.extend(branch_params)
+    sql = "UNION ALL".join(branches) + "ORDER BY played_at DESC, match_id DESC LIMIT ?"
+    return sql, params + [limit]
+
+
+def count_history(cursor, guild_id, season, player_id, filters):
+    """Number of matches the filters select, counted from the indexes."""
+    sides = {"wins": ["winner"], "losses": ["loser"]}.get(filters["result"], ["winner", "loser"])
+    total = 0
+    for side in sides:
+        where, params = history_conditions(guild_id, season, player_id, side, filters, None)
+        cursor.execute(f"SELECT COUNT(*) FROM matches m WHERE {where}", params)
+        total += cursor.fetchone()[0]
+    return total
+
+
+def describe_filters(filters, season):
+    """One line summing up the active filters for the embed description."""
+    parts = []
+    if filters["result"]:
+        parts.append(f"only {filters['result']}")
+    if filters["opponent"] is not None:
+        parts.append(f"vs <@{filters['opponent']}>")
+    if filters["since"] is not None:
+        parts.append(f"since {discord_timestamp(filters['since'], 'd')}")
+    if filters["until"] is not None:
+        parts.append(f"before {discord_timestamp(filters['until'], 'd')}")
+    parts.append(f"season {season}" if not isinstance(season, list) else "all seasons")
+    return ", ".join(parts)
+
+
+def fetch_history_page(guild_id, season, player_id, filters, before=None):
+    """Returns up to one page of matches and the (timestamp, id) the next page starts after (None on the last page)."""
+    sql, params = build_history_query(guild_id, season, player_id, filters, before)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    matches = cursor.fetchall()
+    conn.close()
+    if len(matches) <= MATCHES_PER_PAGE:
+        return matches, None
+    matches = matches[:MATCHES_PER_PAGE]
+    return matches, (matches[-1][5], matches[-1][0])
+
+
+def history_page_embed(player, matches, page, total, filters, season):
+    """Renders one page of matches (`page` counts from 1)."""
+    total_pages = max((total - 1) // MATCHES_PER_PAGE + 1, 1)
+    embed = discord.Embed(
+        title=f"📜 Match History - Page {page}/{total_pages}",
+        description=f"Displaying match history for {player.mention} ({describe_filters(filters, season)}).",
+        color=0x00ffcc
+    )
+    for match in matches:
+        match_id, winner_name, loser_name, winner_score, loser_score, timestamp, points_gained, points_lost = match
+        embed.add_field(
+            name=f"🆔 Match ID: {match_id}",
+            value=(
+                f"🏆 Winner: **{winner_name}** (+{points_gained})\n"
+                f"💔 Loser: **{loser_name}** (-{abs(points_lost or 0)})\n"
+                f"📊 Score: {winner_score} - {loser_score}\n"
+                f"🕒 Date: {discord_timestamp(timestamp)}"
+            ),
+            inline=False
+        )
+    embed.set_footer(text=f"{total} matches. Use ◀️ and ▶️ to navigate pages.")
+    return embed
+
 
 class HistoryPaginator(View):
-    def __init__(self, embeds):
+    """Runs one query per page; only the start of each page seen so far is kept.
+
+    `cover` is an embed shown before the first page (the `!fb stats` rank card) and
+    `first_page` an already rendered (embed, next page start) for the first page."""
+
+    def __init__(self, guild_id, season, player, filters, total, cover=None, first_page=None):
         super().__init__(timeout=None)
-        self.embeds = embeds
+        self.guild_id = guild_id
+        self.season = season
+        self.player = player
+        self.filters = filters
+        self.total = total
+        self.cover = cover
+        self.first_page = first_page
+        self.offset = 1 if cover else 0
+        self.page_starts = [None]   # (timestamp, id) each visited page continues after
         self.current = 0
-        self.total = len(embeds)
+        self.has_next = False
 
         self.prev_button = Button(label="◀️ Previous", style=discord.ButtonStyle.secondary)
         self.next_button = Button(label="Next ▶️", style=discord.ButtonStyle.secondary)
@@ -18,8 +210,34 @@ class HistoryPaginator(View):
         self.add_item(self.prev_button)
         self.add_item(self.next_button)
 
+    def fetch_page(self):
+        """Returns the embed of the current position, or None if the page is empty."""
+        page = self.current - self.offset
+        if page < 0:
+            self.has_next = self.total > 0
+            return self.cover
+
+        if page == 0 and self.first_page:
+            embed, next_start = self.first_page
+        else:
+            matches, next_start = fetch_history_page(
+                self.guild_id, self.season, self.player.id, self.filters, self.page_starts[page]
+            )
+            if not matches:
+                return None
+            embed = history_page_embed(self.player, matches, page + 1, self.total, self.filters, self.season)
+
+        self.has_next = next_start is not None
+        if self.has_next and len(self.page_starts) == page + 1:
+            self.page_starts.append(next_start)
+        return embed
+
     async def update_message(self, interaction):
-        embed = self.embeds[self.current]
+        embed = self.fetch_page()
+        if embed is None:
+            # Matches were deleted since the page was opened
+            await interaction.response.defer()
+            return
         await interaction.response.edit_message(embed=embed, view=self)
 
     async def prev_page(self, interaction):
@@ -28,7 +246,7 @@ class HistoryPaginator(View):
             await self.update_message(interaction)
 
     async def next_page(self, interaction):
-        if self.current < self.total - 1:
+        if self.has_next:
             self.current += 1
             await self.update_message(interaction)
 
@@ -36,14 +254,27 @@ class HistoryCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.command()
+    @commands.command(aliases=["myhistory"])
     @commands.cooldown(1, 60, commands.BucketType.user)  # Cooldown: 1 use per 60 seconds per user
-    async def history(self, ctx):
-        """View your match history with button-based pagination."""
+    async def history(self, ctx, *args):
+        """View your match history, optionally filtered, with button-based pagination."""
+        try:
+            filters = await parse_filters(ctx, args)
+        except commands.BadArgument as error:
+            embed = discord.Embed(
+                title="❌ Invalid Filter",
+                description=f"{error}\n\n{FILTER_USAGE}",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            ctx.command.reset_cooldown(ctx)
+            return
+
+        scope = ladder_scope(ctx)
         conn = get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT username FROM players WHERE discord_id = ?", (str(ctx.author.id),))
+        cursor.execute("SELECT username FROM players WHERE guild_id = ? AND discord_id = ?", (scope, ctx.author.id))
         player = cursor.fetchone()
 
         if not player:
@@ -56,63 +287,30 @@ class HistoryCog(commands.Cog):
             conn.close()
             return
 
-        cursor.execute("""
-            SELECT m.id, 
-                COALESCE(p1.username, '[Left Player]') AS winner_name,
-                COALESCE(p2.username, '[Left Player]') AS loser_name,
-                m.winner_score, m.loser_score, m.timestamp, 
-                m.winner_points_gained, m.loser_points_lost
-            FROM matches m
-            LEFT JOIN players p1 ON m.winner_id = p1.discord_id
-            LEFT JOIN players p2 ON m.loser_id = p2.discord_id
-            WHERE m.winner_id = ? OR m.loser_id = ?
-            ORDER BY m.timestamp DESC
-        """, (str(ctx.author.id), str(ctx.author.id)))
-
-        matches = cursor.fetchall()
+        current_season = get_current_season(cursor, scope)
+        if filters["season"] == "current":
+            season = current_season
+        elif filters["season"] is None:
+            season = list(range(1, current_season + 1))
+        else:
+            season = filters["season"]
+
+        total = count_history(cursor, scope, season, ctx.author.id, filters)
         conn.close()
 
-        if not matches:
+        view = HistoryPaginator(scope, season, ctx.author, filters, total)
+        embed = view.fetch_page() if total else None
+        if embed is None:
+            filtered = args and describe_filters(filters, season)
             embed = discord.Embed(
                 title="📭 No Match History",
-                description="You haven't played any matches yet.",
+                description=f"No matches found ({filtered})." if filtered else "You haven't played any matches yet.",
                 color=discord.Color.orange()
             )
             await ctx.send(embed=embed)
             return
 
-        matches_per_page = 5
-        embeds = []
-
-        for i in range(0, len(matches), matches_per_page):
-            page_matches = matches[i:i + matches_per_page]
-            page_number = len(embeds) + 1
-            total_pages = (len(matches) - 1) // matches_per_page + 1
-
-            embed = discord.Embed(
-                title=f"📜 Match History - Page {page_number}/{total_pages}",
-                description=f"Displaying match history for {ctx.author.mention}.",
-                color=0x00ffcc
-            )
-
-            for match in page_matches:
-                match_id, winner_name, loser_name, winner_score, loser_score, timestamp, points_gained, points_lost = match
-                embed.add_field(
-                    name=f"🆔 Match ID: {match_id}",
-                    value=(
-                        f"🏆 Winner: **{winner_name}** (+{points_gained})\n"
-                        f"💔 Loser: **{loser_name}** (-{points_lost})\n"
-                        f"📊 Score: {winner_score} - {loser_score}\n"
-                        f"🕒 Date: {timestamp}"
-                    ),
-                    inline=False
-                )
-
-            embed.set_footer(text="Use ◀️ and ▶️ to navigate pages.")
-            embeds.append(embed)
-
-        view = HistoryPaginator(embeds)
-        await ctx.send(embed=embeds[0], view=view)
+        await ctx.send(embed=embed, view=view)
 
     @history.error
     async def history_error(self, ctx, error):
@@ -120,10 +318,10 @@ class HistoryCog(commands.Cog):
         if isinstance(error, commands.CommandOnCooldown):
             embed = discord.Embed(
                 title="⏳ Cooldown Active",
-                description=f"Please wait **{round(error.retry_after, 2)} seconds** before using `!fb history` again.",
+                description=f"Please wait **{round(error.retry_after, 2)} seconds** before using `!fb {ctx.invoked_with}` again.",
                 color=discord.Color.orange()
             )
             await ctx.send(embed=embed)
 
 async def setup(bot):
-    await bot.add_cog(HistoryCog(bot))
\ No newline at end of file
+    await bot.add_cog(HistoryCog(bot))
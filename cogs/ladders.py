@@ -0,0 +1,184 @@
+import copy
+import re
+import discord
+from discord.ext import commands
+from db.database import get_guild_settings, get_ladders
+from db.writer import submit_write
+from utils.checks import is_ladder_admin
+from utils.ladders import MAIN_LADDER, find_ladder, ladder_name, ladder_scope
+
+MAX_LADDERS = 10
+NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,19}$")
+
+
+class LaddersCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.group(invoke_without_command=True)
+    async def ladder(self, ctx):
+        """Lists the server's ladders with their format, rank points and channels."""
+        ladders = get_ladders(ctx.guild.id)
+        current = ladder_scope(ctx)
+        embed = discord.Embed(
+            title="🪜 Ladders",
+            description=(
+                "Commands use the ladder bound to their channel, or **main** elsewhere.\n"
+                "Run a command on another ladder with `!fb on <ladder> <command>`, e.g. `!fb on ft3 leaderboard`."
+            ),
+            color=discord.Color.blue()
+        )
+        for scope in [ctx.guild.id, *ladders["ladders"]]:
+            settings = get_guild_settings(scope)
+            channels = [f"<#{channel_id}>" for channel_id, ladder_id in ladders["channels"].items() if ladder_id == scope]
+            embed.add_field(
+                name=f"{'▶️ ' if scope == current else ''}{ladder_name(ctx.guild.id, scope)}",
+                value=(
+                    f"**Format:** first to {settings['win_score']}\n"
+                    f"**Rank points:** {settings['rank_points'].replace(',', ' / ')} (Silver / Gold / Platinum)\n"
+                    f"**Channels:** {', '.join(channels) if channels else ('all others' if scope == ctx.guild.id else 'none')}"
+                ),
+                inline=False
+            )
+        embed.set_footer(text="Admins: !fb ladder create <name> [first to], !fb ladder channel <name>, !fb ladder score <n>, !fb ladder ranks <silver> <gold> <platinum>")
+        await ctx.send(embed=embed)
+
+    @ladder.command(name="create")
+    async def ladder_create(self, ctx, name: str, win_score: int = None):
+        """Adds a named ladder with its own players, seasons and leaderboard, e.g. `!fb ladder create ft3 3`."""
+        if not await self.check_admin(ctx):
+            return
+        name = name.lower()
+        error = None
+        if not NAME_PATTERN.match(name) or name == MAIN_LADDER:
+            error = "Ladder names are up to 20 lowercase letters, digits and dashes, and cannot be `main`."
+        elif win_score is not None and not 1 <= win_score <= 99:
+            error = "The first-to score must be between **1** and **99**."
+        elif len(get_ladders(ctx.guild.id)["ladders"]) >= MAX_LADDERS:
+            error = f"A server can have up to **{MAX_LADDERS}** named ladders."
+        if error:
+            embed = discord.Embed(title="❌ Ladder Not Created", description=error, color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+
+        ladder_id = await submit_write("create_ladder", guild_id=ctx.guild.id, name=name, win_score=win_score)
+        if ladder_id is None:
+            embed = discord.Embed(title="❌ Ladder Not Created", description=f"There is already a ladder called **{name}**.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        settings = get_guild_settings(ladder_id)
+        embed = discord.Embed(
+            title="✅ Ladder Created",
+            description=(
+                f"**{name}** is first to **{settings['win_score']}** and starts with this server's other settings.\n"
+                f"Bind a channel to it with `!fb ladder channel {name}`, or use `!fb on {name} <command>`. "
+                f"Players register on it separately: `!fb on {name} register YourName`."
+            ),
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @ladder.command(name="channel")
+    async def ladder_channel(self, ctx, name: str):
+        """Makes commands in this channel use a ladder (`main` for the server's own)."""
+        if not await self.check_admin(ctx):
+            return
+        scope = find_ladder(ctx.guild.id, name)
+        if scope is None:
+            await ctx.send(embed=self.unknown_ladder_embed(ctx, name))
+            return
+        await submit_write(
+            "set_ladder_channel", guild_id=ctx.guild.id, channel_id=ctx.channel.id,
+            ladder_id=None if scope == ctx.guild.id else scope
+        )
+        embed = discord.Embed(
+            title="✅ Channel Ladder Updated",
+            description=f"Commands in {ctx.channel.mention} now use the **{ladder_name(ctx.guild.id, scope)}** ladder.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @ladder.command(name="score")
+    async def ladder_score(self, ctx, win_score: int):
+        """Sets the ladder's match format: first to `win_score` wins."""
+        if not await self.check_admin(ctx):
+            return
+        if not 1 <= win_score <= 99:
+            embed = discord.Embed(title="❌ Invalid Score", description="The first-to score must be between **1** and **99**.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        scope = ladder_scope(ctx)
+        await submit_write("update_guild_settings", guild_id=scope, win_score=win_score)
+        embed = discord.Embed(
+            title="✅ Format Updated",
+            description=f"Matches on **{ladder_name(ctx.guild.id, scope)}** are now first to **{win_score}**.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @ladder.command(name="ranks")
+    async def ladder_ranks(self, ctx, silver: int, gold: int, platinum: int):
+        """Sets the minimum points of each rank on the ladder and re-ranks its players."""
+        if not await self.check_admin(ctx):
+            return
+        if not 0 < silver < gold < platinum:
+            embed = discord.Embed(
+                title="❌ Invalid Rank Points",
+                description="Give three increasing, positive minimums, e.g. `!fb ladder ranks 25 50 100`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        scope = ladder_scope(ctx)
+        await submit_write("update_guild_settings", guild_id=scope, rank_points=f"{silver},{gold},{platinum}")
+        embed = discord.Embed(
+            title="✅ Ranks Updated",
+            description=f"On **{ladder_name(ctx.guild.id, scope)}**, Silver starts at **{silver}**, Gold at **{gold}** "
+                        f"and Platinum at **{platinum}** points.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def on(self, ctx, name: str, *, command: str):
+        """Runs a command on a ladder other than the channel's, e.g. `!fb on ft3 stats`."""
+        scope = find_ladder(ctx.guild.id, name)
+        if scope is None:
+            await ctx.send(embed=self.unknown_ladder_embed(ctx, name))
+            return
+        message = copy.copy(ctx.message)
+        message.content = f"{ctx.prefix}{command}"
+        inner = await self.bot.get_context(message)
+        if inner.command is None or inner.command is ctx.command:
+            embed = discord.Embed(title="❌ Unknown Command", description=f"`{command}` is not a command that can run on a ladder.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        inner.ladder_id = scope
+        await self.bot.invoke(inner)
+
+    @on.error
+    async def run_on_error(self, ctx, error):
+        if isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send("⚠️ Usage: `!fb on <ladder> <command>`\nExample: `!fb on ft3 leaderboard`")
+
+    def unknown_ladder_embed(self, ctx, name):
+        names = [MAIN_LADDER, *get_ladders(ctx.guild.id)["ladders"].values()]
+        return discord.Embed(
+            title="❌ Unknown Ladder",
+            description=f"There is no ladder called **{name}**. Ladders: {', '.join(f'`{ladder}`' for ladder in names)}",
+            color=discord.Color.red()
+        )
+
+    async def check_admin(self, ctx):
+        if is_ladder_admin(ctx.author):
+            return True
+        embed = discord.Embed(
+            title="❌ Unauthorized",
+            description="You are not authorized to use this command.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+async def setup(bot):
+    await bot.add_cog(LaddersCog(bot))
@@ -1,7 +1,9 @@
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
-from db.database import get_connection
+from db.database import get_connection, get_guild_settings
+from db.ranking import calculate_rank, rank_thresholds
+from utils.ladders import ladder_name, ladder_scope
 
 class PaginationView(View):
     def __init__(self, embeds):
@@ -39,16 +41,18 @@ class LeaderboardCog(commands.Cog):
     @commands.command()
     @commands.cooldown(1, 60, commands.BucketType.user)  # Cooldown: 1 use per 60 seconds per user
     async def leaderboard(self, ctx):
-        """Display the full leaderboard with pagination."""
+        """Display the full leaderboard of the channel's ladder with pagination."""
+        scope = ladder_scope(ctx)
         conn = get_connection()
         cursor = conn.cursor()
 
         try:
             cursor.execute("""
-                SELECT username, points 
-                FROM players 
+                SELECT username, points
+                FROM players
+                WHERE guild_id = ?
                 ORDER BY points DESC
-            """)
+            """, (scope,))
             leaderboard = cursor.fetchall()
         except Exception as e:
             embed = discord.Embed(
@@ -73,6 +77,8 @@ class LeaderboardCog(commands.Cog):
 
         players_per_page = 10
         embeds = []
+        thresholds = rank_thresholds(get_guild_settings(scope)["rank_points"])
+        ladder = f" ({ladder_name(ctx.guild.id, scope)})" if scope != ctx.guild.id else ""
 
         for i in range(0, len(leaderboard), players_per_page):
             page_players = leaderboard[i:i + players_per_page]
@@ -80,22 +86,12 @@ class LeaderboardCog(commands.Cog):
             total_pages = (len(leaderboard) - 1) // players_per_page + 1
 
             embed = discord.Embed(
-                title=f"🏆 FightBack Leaderboard - Page {page_number}/{total_pages}",
+                title=f"🏆 FightBack Leaderboard{ladder} - Page {page_number}/{total_pages}",
                 description="**The ultimate fight for glory begins!**\nKeep on hating, Painwheel still the greatest!!.",
                 color=0xf1c40f  # Gold
             )
             embed.set_thumbnail(url="https://gamesline.net/wp-content/uploads/2013/12/painwheel-grin-1024x751.jpg")  # Trophy/icon
 
-            def get_rank_icon(points):
-                if points >= 100:
-                    return "🔱 Platinum"
-                elif points >= 50:
-                    return "🥇 Gold"
-                elif points >= 25:
-                    return "🥈 Silver"
-                else:
-                    return "🥉 Bronze"
-
             for rank, (username, points) in enumerate(page_players, start=i + 1):
                 place_icon = ""
                 if rank == 1:
@@ -109,7 +105,7 @@ class LeaderboardCog(commands.Cog):
                 else:
                     place_icon = "🎯"
 
-                player_rank = get_rank_icon(points)
+                player_rank = calculate_rank(points, thresholds)
                 embed.add_field(
                     name=f"{place_icon} #{rank} - {username}",
                     value=f"**Rank:** {player_rank}\n**Points:** `{points}`",
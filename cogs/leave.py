@@ -1,6 +1,9 @@
 import discord
 from discord.ext import commands
 from db.database import get_connection
+from db.writer import submit_write
+from utils.ladders import ladder_scope
+from utils.outbox import outbox, PRIORITY_HIGH
 
 class LeaveCog(commands.Cog):
     def __init__(self, bot):
@@ -10,12 +13,14 @@ class LeaveCog(commands.Cog):
     @commands.cooldown(1, 60, commands.BucketType.user)
     async def leave(self, ctx):
         """Allows the user to delete their registration (not history) after a second approval."""
+        scope = ladder_scope(ctx)
         conn = get_connection()
         cursor = conn.cursor()
 
         # Check if the user is registered
-        cursor.execute("SELECT username FROM players WHERE discord_id = ?", (str(ctx.author.id),))
+        cursor.execute("SELECT username FROM players WHERE guild_id = ? AND discord_id = ?", (scope, ctx.author.id))
         player = cursor.fetchone()
+        conn.close()
 
         if not player:  # If no player is found, exit early
             embed = discord.Embed(
@@ -23,13 +28,12 @@ class LeaveCog(commands.Cog):
                 description="You are not registered yet. Use `!fb register` to join the FightBack system!",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
-            conn.close()
+            await outbox.send(ctx.channel, embed=embed)
             return
 
         username = player[0]
 
-        # Send approval prompt as an embed
+        # Send approval prompt as an embed; its outcome is edited into the same message
         prompt_embed = discord.Embed(
             title="⚠️ Confirm Leave Request",
             description=(
@@ -39,7 +43,7 @@ class LeaveCog(commands.Cog):
             color=discord.Color.orange()
         )
         prompt_embed.set_footer(text="This will not delete your match history.")
-        await ctx.send(embed=prompt_embed)
+        prompt = await outbox.send(ctx.channel, priority=PRIORITY_HIGH, embed=prompt_embed)
 
         def check(msg):
             return msg.author.id == ctx.author.id and msg.channel == ctx.channel and msg.content.lower() in ["yes", "no"]
@@ -52,8 +56,7 @@ class LeaveCog(commands.Cog):
                 description="You took too long to respond. Your leave request was cancelled.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=timeout_embed)
-            conn.close()
+            await outbox.edit(prompt, embed=timeout_embed)
             return
 
         if msg.content.lower() == "no":
@@ -62,13 +65,11 @@ class LeaveCog(commands.Cog):
                 description="Your registration was not deleted.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=cancel_embed)
-            conn.close()
+            await outbox.edit(prompt, embed=cancel_embed)
             return
 
         if msg.content.lower() == "yes":  # User confirms deletion
-            cursor.execute("DELETE FROM players WHERE discord_id = ?", (str(ctx.author.id),))
-            conn.commit()
+            await submit_write("delete_player", guild_id=scope, discord_id=ctx.author.id)
 
             confirm_embed = discord.Embed(
                 title="✅ Registration Deleted",
@@ -76,9 +77,7 @@ class LeaveCog(commands.Cog):
                             "You can rejoin anytime using `!fb register`.",
                 color=discord.Color.green()
             )
-            await ctx.send(embed=confirm_embed)
-
-        conn.close()
+            await outbox.edit(prompt, embed=confirm_embed)
 
     @leave.error
     async def leave_error(self, ctx, error):
@@ -0,0 +1,198 @@
+import discord
+import logging
+import asyncio
+import sqlite3
+from discord.ext import commands
+from db.database import get_connection, get_guild_settings, ladder_guild
+from db.ranking import calculate_rank, rank_thresholds
+from db.writer import submit_write, WriteError
+from utils.checks import is_ladder_admin
+from utils.ladders import ladder_name, ladder_scope
+from utils.outbox import outbox, PRIORITY_LOW
+from utils.state import shared_state
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 10
+DEBOUNCE_SECONDS = 10  # Changes within this long after the first one are shown by a single edit
+
+# Writes that can change the top of a ladder's leaderboard
+LEADERBOARD_OPS = {
+    "register_player", "rename_player", "delete_player", "record_match", "import_matches",
+    "report_tournament_match", "reset_season", "apply_decay", "restore_snapshot",
+}
+PLACE_ICONS = {1: "👑", 2: "🥈", 3: "🥉"}
+
+
+class LiveLeaderboardCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # Keyed by ladder scope: the guild id, or a named ladder's id
+        self.pending = {}   # scope -> task waiting out the debounce delay
+        self.rendered = shared_state(bot, "liveboard_rendered", dict)  # scope -> top N rows currently shown
+
+    async def cog_load(self):
+        # Refreshes a reloaded instance took over from the one it replaced
+        for guild_id in shared_state(self.bot, "liveboard_resume", set):
+            self.schedule(guild_id)
+        shared_state(self.bot, "liveboard_resume", set).clear()
+
+    def cog_unload(self):
+        shared_state(self.bot, "liveboard_resume", set).update(self.pending)
+        for task in self.pending.values():
+            task.cancel()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Catches up on changes made while the bot was offline."""
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT guild_id FROM live_leaderboards")
+        guild_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        for guild_id in guild_ids:
+            if self.bot.get_guild(ladder_guild(guild_id)):
+                self.schedule(guild_id)
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        if (change["op"] in LEADERBOARD_OPS or change.get("ranks")) and self.bot.get_guild(ladder_guild(change["guild_id"])):
+            if change.get("ranks"):
+                self.rendered.pop(change["guild_id"], None)
+            self.schedule(change["guild_id"])
+
+    def schedule(self, guild_id):
+        """Refreshes the guild's live leaderboards once the current burst of changes is over."""
+        if guild_id not in self.pending:
+            self.pending[guild_id] = asyncio.create_task(self.refresh_later(guild_id))
+
+    async def refresh_later(self, guild_id):
+        try:
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+        finally:
+            # Changes committed while refreshing schedule the next refresh
+            self.pending.pop(guild_id, None)
+        try:
+            await self.refresh(guild_id)
+        except Exception:
+            # Nobody awaits this task: log here, or the failure is lost
+            logger.exception("Live leaderboard refresh failed", extra={"guild": guild_id})
+
+    async def refresh(self, guild_id):
+        """Edits the ladder's live leaderboards if its top N changed since the last edit."""
+        guild = self.bot.get_guild(ladder_guild(guild_id))
+        if guild is None:
+            return
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT discord_id, username, points FROM players WHERE guild_id = ? ORDER BY points DESC LIMIT ?",
+            (guild_id, TOP_N)
+        )
+        top = cursor.fetchall()
+        cursor.execute("SELECT channel_id, message_id FROM live_leaderboards WHERE guild_id = ?", (guild_id,))
+        boards = cursor.fetchall()
+        conn.close()
+
+        if not boards or top == self.rendered.get(guild_id):
+            return
+        embed = self.render(guild.id, guild_id, top)
+        updated = True
+        for channel_id, message_id in boards:
+            channel = guild.get_channel(channel_id)
+            try:
+                if channel is None:
+                    await submit_write("remove_live_leaderboard", guild_id=guild_id, channel_id=channel_id)
+                    continue
+                try:
+                    await outbox.edit(channel.get_partial_message(message_id), priority=PRIORITY_LOW, embed=embed)
+                except discord.NotFound:
+                    # The message was deleted: stop updating it
+                    await submit_write("remove_live_leaderboard", guild_id=guild_id, channel_id=channel_id)
+            except (discord.HTTPException, WriteError, sqlite3.Error) as e:
+                # The other boards are still updated; the next change retries this one
+                logger.warning("Could not update the live leaderboard: %s", e, extra={"guild": guild_id, "channel": channel_id})
+                updated = False
+        # Only a top N every board shows is skipped next time
+        if updated:
+            self.rendered[guild_id] = top
+        else:
+            self.rendered.pop(guild_id, None)
+
+    def render(self, guild_id, scope, top):
+        thresholds = rank_thresholds(get_guild_settings(scope)["rank_points"])
+        ladder = f" ({ladder_name(guild_id, scope)})" if scope != guild_id else ""
+        embed = discord.Embed(
+            title=f"🏆 FightBack Leaderboard{ladder} - Live",
+            description="**The ultimate fight for glory begins!**\nUpdated automatically after every match.",
+            color=0xf1c40f  # Gold
+        )
+        for place, (_, username, points) in enumerate(top, start=1):
+            embed.add_field(
+                name=f"{PLACE_ICONS.get(place, '🔥')} #{place} - {username}",
+                value=f"**Rank:** {calculate_rank(points, thresholds)}\n**Points:** `{points}`",
+                inline=False
+            )
+        if not top:
+            embed.add_field(name="📭 Empty Leaderboard", value="Be the first to register and climb to the top!", inline=False)
+        embed.set_footer(text=f"Top {TOP_N}. Use !fb leaderboard for the full list.")
+        return embed
+
+    @commands.group(invoke_without_command=True)
+    async def liveboard(self, ctx):
+        """Posts and pins a leaderboard of the channel's ladder that updates itself after matches."""
+        if not await self.check_admin(ctx):
+            return
+        scope = ladder_scope(ctx)
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT discord_id, username, points FROM players WHERE guild_id = ? ORDER BY points DESC LIMIT ?",
+            (scope, TOP_N)
+        )
+        top = cursor.fetchall()
+        conn.close()
+
+        message = await ctx.send(embed=self.render(ctx.guild.id, scope, top))
+        previous = await submit_write("set_live_leaderboard", guild_id=scope, channel_id=ctx.channel.id, message_id=message.id)
+        self.rendered[scope] = top
+        if previous:
+            try:
+                await ctx.channel.get_partial_message(previous).delete()
+            except discord.HTTPException:
+                pass
+        try:
+            await message.pin()
+        except discord.HTTPException:
+            await ctx.send("⚠️ I could not pin the live leaderboard. Give me the **Manage Messages** permission or pin it yourself.")
+
+    @liveboard.command(name="off")
+    async def liveboard_off(self, ctx):
+        """Stops updating this channel's live leaderboard and deletes it."""
+        if not await self.check_admin(ctx):
+            return
+        message_id = await submit_write("remove_live_leaderboard", guild_id=ladder_scope(ctx), channel_id=ctx.channel.id)
+        if message_id is None:
+            embed = discord.Embed(title="❌ No Live Leaderboard", description="This channel has no live leaderboard.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        try:
+            await ctx.channel.get_partial_message(message_id).delete()
+        except discord.HTTPException:
+            pass
+        embed = discord.Embed(title="✅ Live Leaderboard Removed", description="This channel's leaderboard will no longer update.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    async def check_admin(self, ctx):
+        if is_ladder_admin(ctx.author):
+            return True
+        embed = discord.Embed(
+            title="❌ Unauthorized",
+            description="You are not authorized to use this command.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+async def setup(bot):
+    await bot.add_cog(LiveLeaderboardCog(bot))
@@ -0,0 +1,163 @@
+import discord
+import asyncio
+import datetime
+import logging
+import os
+import sqlite3
+from discord.ext import commands, tasks
+from cogs.admin import owner_only
+from db.maintenance import VACUUM_STEP_PAGES, check_integrity
+from db.writer import run_maintenance, WriteError
+from utils.checks import runs_global_tasks
+from utils.state import shared_state
+from utils.timestamps import discord_timestamp, now_ms
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_HOUR = int(os.getenv("FIGHTBACK_MAINTENANCE_HOUR", "5"))  # UTC hour with the least traffic
+INTEGRITY_WEEKDAY = 6  # Sunday
+VACUUM_MAX_STEPS = 50  # Up to VACUUM_MAX_STEPS * VACUUM_STEP_PAGES pages a night
+VACUUM_STEP_PAUSE = 0.5  # Seconds between steps, so queued writes commit in between
+
+# Writes that change enough rows to make the planner's statistics stale
+BULK_OPS = {"reset_season", "import_matches", "apply_decay", "restore_snapshot"}
+
+
+class MaintenanceCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # job -> report of its last run; shared so a reload keeps them
+        self.reports = shared_state(bot, "maintenance_reports", dict)
+        # Jobs requested by bulk writes, run by the next optimize_task pass
+        self.due = shared_state(bot, "maintenance_due", set)
+        self.optimize_task.start()
+        self.quiet_hours_task.start()
+
+    def cog_unload(self):
+        self.optimize_task.cancel()
+        self.quiet_hours_task.cancel()
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        if change["op"] in BULK_OPS:
+            self.due.add("optimize")
+
+    async def run(self, job):
+        """Runs one job and records its report. Returns the report, or None if it failed."""
+        try:
+            if job == "integrity":
+                report = await asyncio.to_thread(check_integrity)
+            else:
+                report = await run_maintenance(job)
+        except (sqlite3.Error, WriteError) as e:
+            logger.error("Database maintenance %s failed: %s", job, e, extra={"job": job})
+            return None
+        self.record(report)
+        return report
+
+    def record(self, report):
+        report["finished_at"] = now_ms()
+        self.reports[report["job"]] = report
+        logger.info(
+            "Database maintenance %s: %s pages freed in %.0f ms", report["job"], report["pages_freed"], report["ms"],
+            extra={key: report[key] for key in ("job", "ms", "pages_freed", "page_count", "free_pages")}
+        )
+        if report["problems"]:
+            logger.error("Integrity check found problems: %s", report["problems"], extra={"problems": report["problems"]})
+
+    async def vacuum(self):
+        """Hands free pages back a bounded step at a time until none are left or the nightly budget is spent."""
+        total = None
+        for step in range(1, VACUUM_MAX_STEPS + 1):
+            try:
+                report = await run_maintenance("vacuum")
+            except (sqlite3.Error, WriteError) as e:
+                logger.error("Database maintenance vacuum failed: %s", e, extra={"job": "vacuum"})
+                break
+            if total is None:
+                total = report
+            else:
+                total.update(
+                    ms=round(total["ms"] + report["ms"], 2), pages_freed=total["pages_freed"] + report["pages_freed"],
+                    page_count=report["page_count"], free_pages=report["free_pages"]
+                )
+            total["steps"] = step
+            if not report["free_pages"] or not report["pages_freed"]:
+                break
+            await asyncio.sleep(VACUUM_STEP_PAUSE)
+        if total:
+            self.record(total)
+        return total
+
+    @tasks.loop(minutes=10)
+    async def optimize_task(self):
+        """Refreshes the planner's statistics once a burst of bulk writes is over."""
+        if not runs_global_tasks(self.bot) or "optimize" not in self.due:
+            return
+        self.due.discard("optimize")
+        await self.run("optimize")
+
+    @tasks.loop(time=datetime.time(hour=MAINTENANCE_HOUR, minute=30))
+    async def quiet_hours_task(self):
+        """Nightly: incremental vacuum and optimize, plus the weekly integrity check."""
+        if not runs_global_tasks(self.bot):
+            return
+        await self.vacuum()
+        await self.run("optimize")
+        if datetime.datetime.utcnow().weekday() == INTEGRITY_WEEKDAY:
+            await self.run("integrity")
+
+    @optimize_task.before_loop
+    async def before_optimize_task(self):
+        await self.bot.wait_until_ready()
+
+    @quiet_hours_task.before_loop
+    async def before_quiet_hours_task(self):
+        await self.bot.wait_until_ready()
+
+    @commands.group(invoke_without_command=True)
+    @owner_only
+    async def maintenance(self, ctx):
+        """Shows the last run of every database maintenance job. Bot owner only."""
+        embed = discord.Embed(
+            title="🧹 Database Maintenance",
+            description=(
+                f"Runs nightly at **{MAINTENANCE_HOUR:02d}:30 UTC** (integrity check on Sundays) and after resets, "
+                f"imports, decay and restores.\nRun a job now with `!fb maintenance run <optimize|vacuum|integrity>`."
+            ),
+            color=discord.Color.blue()
+        )
+        for job in ("optimize", "vacuum", "integrity"):
+            report = self.reports.get(job)
+            embed.add_field(name=job.capitalize(), value=self.describe(report) if report else "Not run yet.", inline=False)
+        await ctx.send(embed=embed)
+
+    @maintenance.command(name="run")
+    async def maintenance_run(self, ctx, job: str):
+        """Runs one maintenance job now."""
+        job = job.lower()
+        if job not in ("optimize", "vacuum", "integrity"):
+            embed = discord.Embed(title="❌ Unknown Job", description="Jobs: `optimize`, `vacuum`, `integrity`.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        async with ctx.typing():
+            report = await (self.vacuum() if job == "vacuum" else self.run(job))
+        if report is None:
+            embed = discord.Embed(title="❌ Maintenance Failed", description=f"`{job}` failed. Check the logs.", color=discord.Color.red())
+        else:
+            embed = discord.Embed(title=f"🧹 {job.capitalize()} Done", description=self.describe(report), color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    def describe(self, report):
+        lines = [
+            f"{discord_timestamp(report['finished_at'])}: **{report['pages_freed']}** pages freed in **{report['ms']:.0f} ms**",
+            f"{report['page_count']} pages in use, {report['free_pages']} free",
+        ]
+        if "steps" in report:
+            lines.append(f"{report['steps']} step(s) of up to {VACUUM_STEP_PAGES} pages")
+        if report["job"] == "integrity":
+            lines.append("⚠️ " + "; ".join(report["problems"][:5]) if report["problems"] else "✅ No problems found")
+        return "\n".join(lines)
+
+async def setup(bot):
+    await bot.add_cog(MaintenanceCog(bot))
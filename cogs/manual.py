@@ -81,8 +81,9 @@ class FBManual(commands.Cog):
         embed2.add_field(
             name="⚔️ Record Match",
             value=(
-                "`!fb match [winner] [loser] [winner_score] [loser_score]` - Submit a ranked match.\n"
+                "`!fb match [winner] [loser] [winner_score] [loser_score] [winner team] [loser team]` - Submit a ranked match.\n"
                 "- Winner **must score exactly 5 points**.\n"
+                "- Teams are optional, e.g. `Painwheel/Valentine/Double`.\n"
                 "- **Loser must approve** within 60 seconds.\n"
                 "- Cooldown: 30 seconds between submissions."
             ),
@@ -111,21 +112,13 @@ class FBManual(commands.Cog):
         embed3.add_field(
             name="📜 Match History",
             value=(
-                "`!fb history` - View all recorded matches.\n"
-                "- Includes match ID, scores, and timestamps.\n"
+                "`!fb history` (or `!fb myhistory`) - View your matches, newest first.\n"
+                "- Filters: `vs:@user`, `since:2024-05-01`, `until:7d`, `wins`/`losses`, `season:3` or `season:all`.\n"
+                "- Example: `!fb history losses vs:@Rival since:7d`\n"
                 "- Pagination enabled (5 matches per page)."
             ),
             inline=False
         )
-        embed3.add_field(
-            name="🗂️ My Match History",
-            value=(
-                "`!fb myhistory` - View only your matches.\n"
-                "- Includes timestamps and match outcomes.\n"
-                "- Pagination enabled with cooldown."
-            ),
-            inline=False
-        )
         embed3.add_field(
             name="🏆 Leaderboard",
             value=(
@@ -144,19 +137,109 @@ class FBManual(commands.Cog):
             description="**Ranks, reset, and utility commands.**",
             color=discord.Color.blue()
         )
+        embed4.add_field(
+            name="📡 Live Leaderboard",
+            value=(
+                "`!fb liveboard` - **Admin-only command** to pin a top 10 in this channel that updates itself after matches.\n"
+                "- `!fb liveboard off` removes it."
+            ),
+            inline=False
+        )
         embed4.add_field(
             name="🔢 Stats",
             value=(
-                "`!fb stats` - Check your current points, rank, and progress.\n"
+                "`!fb stats [@user]` - Check your (or another player's) current points, rank, and progress.\n"
                 "- Includes match history via pagination."
             ),
             inline=False
         )
+        embed4.add_field(
+            name="🎮 Characters",
+            value=(
+                "`!fb chars [@user]` - Character tier list for this season, or a player's record with each character."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="📈 Graph",
+            value=(
+                "`!fb graph [@user]` - Chart of your (or another player's) points over the current season."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="🔎 Matchmaking",
+            value=(
+                "`!fb queue` / `!fb unqueue` - Join or leave the queue for an opponent close to your points.\n"
+                "- The search widens the longer you wait; both players are pinged when a match is found."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="🏆 Tournaments",
+            value=(
+                "`!fb tournament` - Show the current bracket, open matches and Swiss standings.\n"
+                "`!fb tournament join` / `leave` - Sign up or withdraw before it starts.\n"
+                "`!fb tournament report @winner @loser <winner_score> <loser_score>` - Report a bracket match; it counts on the ladder.\n"
+                "- Admins: `create <single|double|swiss> [name]`, `start`, `cancel`."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="🪜 Ladders",
+            value=(
+                "`!fb ladder` - List this server's ladders (e.g. an FT3 or second-game ladder) and their formats.\n"
+                "`!fb on <ladder> <command>` - Run any command on another ladder, e.g. `!fb on ft3 register YourName`.\n"
+                "- Admins: `!fb ladder create <name> [first to]`, `channel <name>`, `score <n>`, `ranks <silver> <gold> <platinum>`."
+            ),
+            inline=False
+        )
         embed4.add_field(
             name="🔄 Reset",
             value=(
-                "`!fb reset` - **Admin-only command** to reset all rankings and match history.\n"
-                "- Use with caution! This action is irreversible."
+                "`!fb reset` - **Admin-only command** to start a new season for this server.\n"
+                "- Use with caution! All points are reset.\n"
+                "`!fb resetconfig` - Show or change this server's reset schedule and announcement channel."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="📉 Inactivity Decay",
+            value=(
+                "`!fb decay` - Show this server's decay policy and the latest decayed players.\n"
+                "- Admins: `!fb decay set <points> <idle_days>` or `!fb decay off`."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="📦 Export",
+            value=(
+                "`!fb export [csv|jsonl] [season|all]` - **Admin-only command** to download the match history as a compressed file.\n"
+                "- Defaults to CSV for the current season."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="📥 Import",
+            value=(
+                "`!fb import [dry]` - **Admin-only command** to record tournament results from an attached CSV.\n"
+                "- Use `dry` to preview the point changes first."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="💾 Backups",
+            value=(
+                "`!fb backups` / `!fb restore [snapshot]` - **Admin-only commands** to list snapshots and restore this server's ladder.\n"
+                "- A snapshot is taken automatically before every reset."
+            ),
+            inline=False
+        )
+        embed4.add_field(
+            name="🚩 Win-Farming Alerts",
+            value=(
+                "`!fb farming` - **Admin-only command** to show the alert channel and thresholds.\n"
+                "- `!fb farming channel #channel` to set where alerts go, `!fb farming scan [season|all]` to check past matches."
             ),
             inline=False
         )
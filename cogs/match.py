@@ -1,55 +1,51 @@
 import discord
 import time
 from discord.ext import commands
-from db.database import get_connection
+from db.characters import TeamError, parse_team
+from db.database import get_connection, get_guild_settings
+from db.ranking import validate_score
+from db.writer import submit_write
+from utils.approval import format_team, request_approval
+from utils.ladders import ladder_scope
+from utils.outbox import outbox
+from utils.state import shared_state
 
 class MatchCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.match_cooldowns = {}
-
-    def calculate_rank(self, points):
-        if points >= 100:
-            return "🔱 Platinum"
-        elif points >= 50:
-            return "🥇 Gold"
-        elif points >= 25:
-            return "🥈 Silver"
-        else:
-            return "🥉 Bronze"
-
-    def get_rank_value(self, rank):
-        return {"🥉 Bronze": 1, "🥈 Silver": 2, "🥇 Gold": 3, "🔱 Platinum": 4}.get(rank, 1)
+        # discord id -> time of their last submission. Shared so a reload keeps the cooldowns.
+        self.match_cooldowns = shared_state(bot, "match_cooldowns", dict)
 
     @commands.command()
-    async def match(self, ctx, winner: discord.Member, loser: discord.Member, winner_score: int, loser_score: int):
-        """Records a match with rank-based point system using embedded responses."""
+    async def match(self, ctx, winner: discord.Member, loser: discord.Member, winner_score: int, loser_score: int,
+                    winner_team: str = None, loser_team: str = None):
+        """Records a match with rank-based point system using embedded responses. Teams are optional."""
         if winner == loser:
             embed = discord.Embed(
                 title="❌ Invalid Match",
                 description="Winner and loser cannot be the same person.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
+            await outbox.send(ctx.channel, embed=embed)
             return
 
-        max_score = 5
-        if winner_score != max_score or loser_score >= max_score:
-            embed = discord.Embed(
-                title="❌ Invalid Score",
-                description=f"The winner must have exactly {max_score} points, and the loser must have less.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
+        scope = ladder_scope(ctx)
+        score_error = validate_score(winner_score, loser_score, get_guild_settings(scope)["win_score"])
+        if score_error:
+            title, description = score_error
+            embed = discord.Embed(title=title, description=description, color=discord.Color.red())
+            await outbox.send(ctx.channel, embed=embed)
             return
 
-        if winner_score == loser_score:
+        try:
+            teams = [parse_team(team) if team else None for team in (winner_team, loser_team)]
+        except TeamError as error:
             embed = discord.Embed(
-                title="❌ Invalid Match",
-                description="The score cannot be the same for both players.",
+                title="❌ Invalid Team",
+                description=f"{error}\nExample: `!fb match @Ryu @Ken 5 3 Painwheel/Valentine Filia/Cerebella`",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
+            await outbox.send(ctx.channel, embed=embed)
             return
 
         cooldown_time = 30
@@ -64,7 +60,7 @@ class MatchCog(commands.Cog):
                     description=f"Please wait **{remaining} seconds** before submitting another match.",
                     color=discord.Color.orange()
                 )
-                await ctx.send(embed=embed)
+                await outbox.send(ctx.channel, embed=embed)
                 return
 
         self.match_cooldowns[ctx.author.id] = current_time
@@ -72,136 +68,81 @@ class MatchCog(commands.Cog):
         conn = get_connection()
         cursor = conn.cursor()
 
-        # Get both players' points and rank
-        cursor.execute("SELECT points, rank FROM players WHERE discord_id = ?", (str(winner.id),))
+        # Both players must be registered before asking for approval
+        cursor.execute("SELECT 1 FROM players WHERE guild_id = ? AND discord_id = ?", (scope, winner.id))
         winner_data = cursor.fetchone()
-        cursor.execute("SELECT points, rank FROM players WHERE discord_id = ?", (str(loser.id),))
+        cursor.execute("SELECT 1 FROM players WHERE guild_id = ? AND discord_id = ?", (scope, loser.id))
         loser_data = cursor.fetchone()
 
+        conn.close()
+
         if not winner_data or not loser_data:
             embed = discord.Embed(
                 title="❌ Registration Required",
                 description="Both players must be registered using `!fb register`.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
-            conn.close()
+            await outbox.send(ctx.channel, embed=embed)
             return
 
-        winner_points, winner_rank = winner_data
-        loser_points, loser_rank = loser_data
-
-        winner_rank_value = self.get_rank_value(winner_rank)
-        loser_rank_value = self.get_rank_value(loser_rank)
-        rank_difference = abs(winner_rank_value - loser_rank_value)
-
-        # Points calculation
-        base_gain = 5
-        base_loss = 3
-
-        if winner_rank_value == loser_rank_value:
-            gain = base_gain
-            loss = base_loss
-        elif winner_rank_value > loser_rank_value:
-            gain = max(base_gain - rank_difference, 1)
-            loss = base_loss
-        else:
-            gain = base_gain + (rank_difference * 2)
-            loss = base_loss + (rank_difference * 2)
-
-        # Ask for match approval
-        expected_responder = loser.id if ctx.author.id == winner.id else winner.id
-        embed = discord.Embed(
-            title="⚔️ Match Approval Required",
-            description=(
-                f"{self.bot.get_user(expected_responder).mention}, do you approve this match submitted by {ctx.author.mention}?\n"
-                f"🏆 **Winner:** {winner.mention} ({winner_score})\n"
-                f"💔 **Loser:** {loser.mention} ({loser_score})\n\n"
-                "**Type `approve` or `cancel` within 60 seconds.**"
-            ),
-            color=discord.Color.blue()
+        prompt, msg = await request_approval(
+            self.bot, ctx, winner, loser, winner_score, loser_score, winner_team=teams[0], loser_team=teams[1]
         )
-        await ctx.send(embed=embed)
-
-        def check(m):
-            return m.author.id == expected_responder and m.channel == ctx.channel and m.content.lower() in ["approve", "cancel"]
-
-        try:
-            msg = await self.bot.wait_for("message", timeout=60.0, check=check)
-        except:
-            embed = discord.Embed(
-                title="⌛ Timeout",
-                description="Match approval timed out.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            conn.close()
+        if msg is None:
             return
 
-        if msg.content.lower() == "cancel":
-            embed = discord.Embed(
-                title="❌ Match Cancelled",
-                description="The match was not recorded.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            conn.close()
-            return
-
-        embed = discord.Embed(
-            title="✅ Match Approved",
-            description=f"Match successfully recorded by {msg.author.mention}!",
-            color=discord.Color.green()
-        )
-        await ctx.send(embed=embed)
-
-        # Update points and rank
-        new_winner_points = winner_points + gain
-        new_loser_points = max(loser_points - loss, 0)
-
-        new_winner_rank = self.calculate_rank(new_winner_points)
-        new_loser_rank = self.calculate_rank(new_loser_points)
-
+        # Points are calculated and applied by the writer, inside the same transaction as the match
         try:
-            cursor.execute("UPDATE players SET points = ?, rank = ? WHERE discord_id = ?", (new_winner_points, new_winner_rank, str(winner.id)))
-            cursor.execute("UPDATE players SET points = ?, rank = ? WHERE discord_id = ?", (new_loser_points, new_loser_rank, str(loser.id)))
-
-            cursor.execute("""
-                INSERT INTO matches (winner_id, loser_id, winner_score, loser_score, approved, winner_points_gained, loser_points_lost)
-                VALUES (?, ?, ?, ?, 1, ?, ?)
-            """, (str(winner.id), str(loser.id), winner_score, loser_score, gain, loss))
-
-            conn.commit()
-
-            cursor.execute("SELECT last_insert_rowid()")
-            match_id = cursor.fetchone()[0]
+            result = await submit_write(
+                "record_match",
+                guild_id=scope,
+                winner_id=winner.id,
+                loser_id=loser.id,
+                winner_score=winner_score,
+                loser_score=loser_score,
+                approved_by=msg.author.id,
+                winner_team=teams[0],
+                loser_team=teams[1]
+            )
+            if result is None:
+                embed = discord.Embed(
+                    title="❌ Registration Required",
+                    description="Both players must be registered using `!fb register`.",
+                    color=discord.Color.red()
+                )
+                await outbox.edit(prompt, embed=embed)
+                return
 
             embed = discord.Embed(
                 title="🏅 Match Recorded",
-                description=f"🆔 **Match ID:** `{match_id}`\n"
-                            f"🏆 {winner.mention} gained **{gain} points** → Total: **{new_winner_points}** ({new_winner_rank})\n"
-                            f"💔 {loser.mention} lost **{loss} points** → Total: **{new_loser_points}** ({new_loser_rank})",
+                description=f"✅ Approved by {msg.author.mention}\n"
+                            f"🆔 **Match ID:** `{result['match_id']}`\n"
+                            f"🏆 {winner.mention} gained **{result['gain']} points** → Total: **{result['winner_points']}** ({result['winner_rank']}){format_team(teams[0])}\n"
+                            f"💔 {loser.mention} lost **{result['loss']} points** → Total: **{result['loser_points']}** ({result['loser_rank']}){format_team(teams[1])}",
                 color=discord.Color.green()
             )
-            await ctx.send(embed=embed)
+            await outbox.edit(prompt, embed=embed)
         except Exception as e:
-            conn.rollback()
-            await ctx.send(f"❌ An error occurred while recording the match: `{str(e)}`")
-        finally:
-            conn.close()
+            embed = discord.Embed(
+                title="❌ Match Not Recorded",
+                description=f"An error occurred while recording the match: `{str(e)}`",
+                color=discord.Color.red()
+            )
+            await outbox.edit(prompt, embed=embed)
 
     @match.error
     async def match_error(self, ctx, error):
         if isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send(
-                "⚠️ Incomplete command.\n"
-                "Usage: `!fb match @winner @loser <winner_score> <loser_score>`\n"
-                "Example: `!fb match @Ryu @Ken 5 3`"
+            await outbox.send(
+                ctx.channel,
+                content="⚠️ Incomplete command.\n"
+                        "Usage: `!fb match @winner @loser <winner_score> <loser_score> [winner team] [loser team]`\n"
+                        "Example: `!fb match @Ryu @Ken 5 3 Painwheel/Valentine Filia`"
             )
         elif isinstance(error, commands.BadArgument):
-            await ctx.send("⚠️ Invalid input. Make sure to mention users and use numbers for the scores.")
+            await outbox.send(ctx.channel, content="⚠️ Invalid input. Make sure to mention users and use numbers for the scores.")
         else:
-            await ctx.send("❌ An unexpected error occurred.")
+            await outbox.send(ctx.channel, content="❌ An unexpected error occurred.")
 
 async def setup(bot):
     await bot.add_cog(MatchCog(bot))
@@ -0,0 +1,145 @@
+import discord
+import logging
+import time
+from discord.ext import commands, tasks
+from db.database import get_connection
+from utils.ladders import ladder_scope
+from utils.matchmaking import MatchQueue, QUEUE_TIMEOUT
+from utils.outbox import outbox, PRIORITY_HIGH, PRIORITY_LOW
+from utils.state import shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class MatchmakingCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # ladder scope -> MatchQueue. Shared so reloading this cog does not empty the queues.
+        self.queues = shared_state(bot, "match_queues", dict)
+        self.pairing_task.start()
+
+    def cog_unload(self):
+        self.pairing_task.cancel()
+
+    @commands.command(name="queue")
+    async def join_queue(self, ctx):
+        """Joins the matchmaking queue and waits for an opponent close to your rating."""
+        discord_id = ctx.author.id
+        scope = ladder_scope(ctx)
+        queue = self.queues.setdefault(scope, MatchQueue())
+        if discord_id in queue:
+            waited = int((time.monotonic() - queue.players[discord_id].joined_at) // 60)
+            embed = discord.Embed(
+                title="🔎 Already Searching",
+                description=f"You have been in the queue for **{waited} min** with **{len(queue) - 1}** other players waiting.\n"
+                            "Use `!fb unqueue` to leave it.",
+                color=discord.Color.blue()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT points FROM players WHERE guild_id = ? AND discord_id = ?", (scope, discord_id))
+        player = cursor.fetchone()
+        conn.close()
+        if not player:
+            embed = discord.Embed(
+                title="❌ Queue Failed",
+                description="You are not registered yet. Please register first using `!fb register YourName`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        pair = queue.add(discord_id, player[0], ctx.channel.id, time.monotonic())
+        if pair:
+            await self.announce_pair(*pair)
+            return
+
+        embed = discord.Embed(
+            title="🔎 Searching for an Opponent",
+            description=f"You joined the queue with **{player[0]} points**. The search widens the longer you wait.\n"
+                        f"Use `!fb unqueue` to leave it. You will be removed after {QUEUE_TIMEOUT // 60} minutes.",
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def unqueue(self, ctx):
+        """Leaves the matchmaking queue."""
+        queue = self.queues.get(ladder_scope(ctx))
+        if not queue or not queue.remove(ctx.author.id):
+            embed = discord.Embed(
+                title="❌ Not Queued",
+                description="You are not in the matchmaking queue. Use `!fb queue` to join it.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        embed = discord.Embed(title="👋 Left the Queue", description="You are no longer searching for a match.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    @tasks.loop(seconds=15)
+    async def pairing_task(self):
+        """Pairs players whose search windows have widened and drops those who waited too long."""
+        now = time.monotonic()
+        for scope, queue in list(self.queues.items()):
+            pairs = queue.pair_waiting(now)
+            expired = queue.expire(now)
+            if not queue:
+                del self.queues[scope]
+            for first, second in pairs:
+                await self.announce_pair(first, second)
+            for player in expired:
+                channel = self.bot.get_channel(player.channel_id)
+                if channel is None:
+                    continue
+                try:
+                    await outbox.send(
+                        channel, priority=PRIORITY_LOW,
+                        content=f"<@{player.discord_id}> no opponent was found in {QUEUE_TIMEOUT // 60} minutes, "
+                                "so you were removed from the queue. Use `!fb queue` to search again."
+                    )
+                except discord.HTTPException as e:
+                    logger.warning("Could not notify a player of their queue timeout: %s", e, extra={"user": player.discord_id, "channel": channel.id})
+
+    async def announce_pair(self, first, second):
+        """Pings both players in the channel where the later of them queued, asking them to open a lobby."""
+        channel = self.bot.get_channel(second.channel_id) or self.bot.get_channel(first.channel_id)
+        if channel is None:
+            return
+        embed = discord.Embed(
+            title="⚔️ Match Found!",
+            description=(
+                f"<@{first.discord_id}> (**{first.points}** points) vs <@{second.discord_id}> (**{second.points}** points)\n\n"
+                "Host a lobby and post its Steam link here, then record the result with "
+                "`!fb match @winner @loser <winner_score> <loser_score>`."
+            ),
+            color=discord.Color.gold()
+        )
+        try:
+            await outbox.send(
+                channel, priority=PRIORITY_HIGH,
+                content=f"<@{first.discord_id}> <@{second.discord_id}>", embed=embed,
+                allowed_mentions=discord.AllowedMentions(users=True)
+            )
+        except discord.HTTPException as e:
+            logger.warning(
+                "Could not announce a queue match: %s", e,
+                extra={"players": [first.discord_id, second.discord_id], "channel": channel.id}
+            )
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        """Takes players who left the ladder out of the queue."""
+        if change["op"] == "delete_player" and change["guild_id"] in self.queues:
+            for discord_id in change["players"]:
+                self.queues[change["guild_id"]].remove(discord_id)
+
+    @pairing_task.before_loop
+    async def before_pairing_task(self):
+        await self.bot.wait_until_ready()
+
+async def setup(bot):
+    await bot.add_cog(MatchmakingCog(bot))
@@ -1,6 +1,7 @@
 from discord.ext import commands
 import discord
-from db.database import get_connection
+from db.writer import submit_write
+from utils.ladders import ladder_name, ladder_scope
 
 class RegisterCog(commands.Cog):
     def __init__(self, bot):
@@ -27,30 +28,24 @@ class RegisterCog(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "INSERT INTO players (discord_id, username) VALUES (?, ?)",
-                (str(ctx.author.id), name)
-            )
-            conn.commit()
+        scope = ladder_scope(ctx)
+        registered = await submit_write("register_player", guild_id=scope, discord_id=ctx.author.id, username=name)
+        if registered:
+            ladder = f" on the **{ladder_name(ctx.guild.id, scope)}** ladder" if scope != ctx.guild.id else ""
             embed = discord.Embed(
                 title="✅ Registration Successful",
-                description=f"You are now registered as **{name}**!",
+                description=f"You are now registered as **{name}**{ladder}!",
                 color=discord.Color.green()
             )
             embed.set_footer(text=f"Discord: {ctx.author}")
             await ctx.send(embed=embed)
-        except:
+        else:
             embed = discord.Embed(
                 title="❌ Registration Failed",
                 description="You are already registered.",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
-        finally:
-            conn.close()
 
     @commands.command()
     async def editname(self, ctx, *, new_name: str = None):
@@ -73,13 +68,8 @@ class RegisterCog(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE players SET username = ? WHERE discord_id = ?",
-            (new_name, str(ctx.author.id))
-        )
-        if cursor.rowcount == 0:
+        renamed = await submit_write("rename_player", guild_id=ladder_scope(ctx), discord_id=ctx.author.id, username=new_name)
+        if not renamed:
             embed = discord.Embed(
                 title="❌ Name Change Failed",
                 description="You're not registered yet.",
@@ -87,14 +77,12 @@ class RegisterCog(commands.Cog):
             )
             await ctx.send(embed=embed)
         else:
-            conn.commit()
             embed = discord.Embed(
                 title="✅ Name Updated",
                 description=f"Your name has been changed to **{new_name}**.",
                 color=discord.Color.green()
             )
             await ctx.send(embed=embed)
-        conn.close()
 
 async def setup(bot):
     await bot.add_cog(RegisterCog(bot))
\ No newline at end of file
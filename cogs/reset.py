@@ -1,47 +1,110 @@
 import discord
+import logging
 from discord.ext import commands, tasks
-from db.database import get_connection
+from db.database import get_connection, get_current_season, get_guild_settings, get_ladders
+from db.writer import submit_write, flush_database
+from db.backup import take_snapshot
+from utils.checks import is_ladder_admin, runs_global_tasks
+from utils.ladders import ladder_name, ladder_scope
+from utils.outbox import outbox, PRIORITY_HIGH, PRIORITY_LOW
+import asyncio
 import datetime
+import sqlite3
+
+logger = logging.getLogger(__name__)
 
 class ResetCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.auto_reset_task.start()  # Start the automatic monthly reset task
+        self.decay_task.start()  # Start the inactivity decay task
 
     def cog_unload(self):
         self.auto_reset_task.cancel()  # Stop the automatic reset task when the cog is unloaded
+        self.decay_task.cancel()
 
-    @tasks.loop(time=datetime.time(hour=0, minute=0))  # Runs daily at midnight
+    @tasks.loop(time=[datetime.time(hour=hour, minute=0) for hour in range(24)])  # Runs hourly (UTC)
     async def auto_reset_task(self):
-        """Automatically resets the leaderboard, match history, and player data on the 1st of every month."""
-        if datetime.datetime.now().day == 1:  # Only reset on the 1st of the month
-            await self.reset_database()
+        """Automatically starts a new season for every ladder whose reset day and hour have come."""
+        now = datetime.datetime.utcnow()
+        due = []
+        for guild in self.bot.guilds:
+            for scope in [guild.id, *get_ladders(guild.id)["ladders"]]:
+                settings = get_guild_settings(scope)
+                if not settings["reset_day"]:
+                    continue  # Automatic reset disabled for this ladder
+                if now.day != settings["reset_day"] or now.hour != settings["reset_hour"]:
+                    continue
+                if self.season_started_today(scope, now):
+                    continue  # Already reset (manually or by an earlier run) today
+                due.append((guild, scope))
+        if not due:
+            return
+
+        # One snapshot covers every ladder reset in this run
+        await take_snapshot("pre-reset")
+        for guild, scope in due:
+            try:
+                await self.reset_database(guild, scope, snapshot=False)
+            except Exception:
+                logger.exception("Automatic reset failed", extra={"guild": guild.id, "ladder": scope})
+
+    @tasks.loop(hours=1)
+    async def decay_task(self):
+        """Applies a week of inactivity decay to every guild with decay enabled whose last run was 7+ days ago."""
+        if not runs_global_tasks(self.bot):
+            return
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT guild_id FROM guild_settings
+            WHERE decay_points > 0 AND (last_decay_at IS NULL OR last_decay_at <= datetime('now', '-7 days'))
+        """)
+        guild_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        # Submitted together, the per-guild updates are group-committed
+        results = await asyncio.gather(
+            *(submit_write("apply_decay", guild_id=guild_id) for guild_id in guild_ids),
+            return_exceptions=True
+        )
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, Exception):
+                logger.error("Inactivity decay failed: %s", result, extra={"guild": guild_id})
+            elif result:
+                logger.info("Inactivity decay applied to %s players", result, extra={"guild": guild_id, "players": result})
+
+    def season_started_today(self, guild_id, now):
+        conn = get_connection()
+        cursor = conn.cursor()
+        season = get_current_season(cursor, guild_id)
+        cursor.execute("SELECT started_at FROM seasons WHERE guild_id = ? AND season = ?", (guild_id, season))
+        row = cursor.fetchone()
+        conn.close()
+        return bool(row and row[0] and row[0].startswith(now.strftime("%Y-%m-%d")))
 
     @commands.command()
     async def reset(self, ctx):
-        """Manually resets the leaderboard, match history, and player data with user confirmation."""
-        # Your Discord user ID
-        authorized_user_id = "215296697704644608"
-
-        # Check if the command author is the authorized user
-        if str(ctx.author.id) != authorized_user_id:
+        """Manually starts a new season for the channel's ladder with user confirmation."""
+        # Only the bot owner and server managers may reset a ladder
+        if not is_ladder_admin(ctx.author):
             embed = discord.Embed(
                 title="❌ Unauthorized",
                 description="You are not authorized to use this command.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
-            print(f"⚠️ Unauthorized attempt by user: {ctx.author.id}")
+            await outbox.send(ctx.channel, embed=embed)
+            logger.warning("Unauthorized reset attempt", extra={"guild": ctx.guild.id, "user": ctx.author.id})
             return
 
-        # Request confirmation
+        # Request confirmation; the outcome is edited into the same message
         embed = discord.Embed(
             title="⚠️ Confirm Reset",
             description="Are you sure you want to reset the **leaderboard, match history, and player data**?\n\n"
                         "Type `yes` to confirm or `no` to cancel within 60 seconds.",
             color=discord.Color.orange()
         )
-        await ctx.send(embed=embed)
+        prompt = await outbox.send(ctx.channel, priority=PRIORITY_HIGH, embed=embed)
 
         def check(message):
             return message.author == ctx.author and message.channel == ctx.channel and message.content.lower() in ["yes", "no"]
@@ -54,7 +117,7 @@ class ResetCog(commands.Cog):
                 description="You took too long to respond. The reset operation was cancelled.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
+            await outbox.edit(prompt, embed=embed)
             return
 
         if confirmation.content.lower() == "no":
@@ -63,82 +126,214 @@ class ResetCog(commands.Cog):
                 description="The reset operation has been cancelled.",
                 color=discord.Color.red()
             )
-            await ctx.send(embed=embed)
+            await outbox.edit(prompt, embed=embed)
             return
 
         if confirmation.content.lower() == "yes":
-            print(f"✅ Manual reset command approved by authorized user: {ctx.author.id}")  # Debug message
+            logger.info("Manual reset confirmed", extra={"guild": ctx.guild.id, "user": ctx.author.id})
             try:
-                await self.reset_database()
+                await self.reset_database(ctx.guild, ladder_scope(ctx))
                 embed = discord.Embed(
                     title="✅ Database Reset",
                     description="The **leaderboard, match history, and player data** have been successfully reset.",
                     color=discord.Color.green()
                 )
-                await ctx.send(embed=embed)
-            except Exception as e:
-                print(f"❌ Error in manual reset command: {e}")
+                await outbox.edit(prompt, embed=embed)
+            except Exception:
+                logger.exception("Manual reset failed", extra={"guild": ctx.guild.id, "user": ctx.author.id})
                 embed = discord.Embed(
                     title="❌ Reset Failed",
                     description="An error occurred during the reset. Please check the logs for more details.",
                     color=discord.Color.red()
                 )
-                await ctx.send(embed=embed)
+                await outbox.edit(prompt, embed=embed)
 
-    async def reset_database(self):
-        """Clears leaderboard, match history, and resets all players to 0 points and Bronze rank."""
-        conn = get_connection()
+    async def reset_database(self, guild, scope=None, snapshot=True):
+        """Starts a new season for one of the guild's ladders (default: its own) and announces it
+        in the ladder's announcement channel."""
+        scope = scope or guild.id
         try:
-            cursor = conn.cursor()
-
-            # Drop and recreate matches table to reset match_id counter
-            cursor.execute("DROP TABLE IF EXISTS matches")
-            cursor.execute("""
-                CREATE TABLE matches (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    winner_id TEXT NOT NULL,
-                    loser_id TEXT NOT NULL,
-                    winner_score INTEGER NOT NULL,
-                    loser_score INTEGER NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    approved BOOLEAN DEFAULT 0,
-                    winner_points_gained INTEGER DEFAULT 0,
-                    loser_points_lost INTEGER DEFAULT 0
-                )
-            """)
-            print("✅ Matches table dropped and recreated!")
+            # The finished season can always be brought back with !fb restore
+            if snapshot:
+                await take_snapshot("pre-reset")
+            season = await submit_write("reset_season", guild_id=scope)
+            logger.info("Guild reset to season %s", season, extra={"guild": guild.id, "ladder": scope, "season": season})
+        except Exception:
+            logger.error("Season reset failed", extra={"guild": guild.id, "ladder": scope})
+            raise
+        try:
+            # In memory mode, write the new season to disk right away
+            await flush_database()
+        except (sqlite3.Error, OSError):
+            logger.exception("Flushing the in-memory database after the reset failed", extra={"guild": guild.id})
+
+        # Send notification in the ladder's announcement channel
+        settings = get_guild_settings(scope)
+        ladder = f" ({ladder_name(guild.id, scope)})" if scope != guild.id else ""
+        channel = None
+        if settings["announce_channel_id"]:
+            channel = guild.get_channel(settings["announce_channel_id"])
+        if channel is None:
+            channel = guild.system_channel
+        if channel:
+            embed = discord.Embed(
+                title=f"🚨 Leaderboard Reset{ladder}",
+                description=(
+                    "@skullgirls **The leaderboard and match history have been reset!**\n"
+                    f"Season {season} has begun. Good luck and happy gaming!"
+                ),
+                color=discord.Color.gold()
+            )
+            await outbox.send(channel, priority=PRIORITY_LOW, embed=embed)
+            logger.debug("Reset announcement sent", extra={"guild": guild.id, "channel": channel.id})
+        else:
+            logger.warning("No announcement channel found for the reset", extra={"guild": guild.id})
 
-            # Reset leaderboard: all players start at 0 points and Bronze rank
-            cursor.execute("UPDATE players SET points = 0, rank = 'Bronze'")
-            print("✅ Leaderboard reset: All players set to 0 points and Bronze rank!")
+    @commands.group(invoke_without_command=True)
+    async def resetconfig(self, ctx):
+        """Shows the ladder's reset schedule and announcement channel."""
+        settings = get_guild_settings(ladder_scope(ctx))
+        channel_id = settings["announce_channel_id"]
+        schedule = (
+            f"Day **{settings['reset_day']}** of every month at **{settings['reset_hour']:02d}:00 UTC**"
+            if settings["reset_day"] else "Automatic reset **disabled**"
+        )
+        embed = discord.Embed(
+            title="⚙️ Reset Settings",
+            description=(
+                f"📅 **Schedule:** {schedule}\n"
+                f"📢 **Announcements:** {f'<#{channel_id}>' if channel_id else 'System channel'}\n\n"
+                "Change with `!fb resetconfig channel #channel` or `!fb resetconfig schedule <day> <hour>` "
+                "(day `0` disables the automatic reset)."
+            ),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
 
-            conn.commit()  # Save changes
-            print("✅ Database changes successfully committed.")  # Debug confirmation
+    @resetconfig.command(name="channel")
+    async def resetconfig_channel(self, ctx, channel: discord.TextChannel):
+        """Sets the channel where season resets are announced."""
+        if not await self.check_admin(ctx):
+            return
+        await submit_write("update_guild_settings", guild_id=ladder_scope(ctx), announce_channel_id=channel.id)
+        embed = discord.Embed(
+            title="✅ Announcement Channel Updated",
+            description=f"Season resets will be announced in {channel.mention}.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
 
-            # Send notification in the channel
-            channel = self.bot.get_channel(1361559595490873415)  # Replace with your channel ID
-            if channel:
-                embed = discord.Embed(
-                    title="🚨 Leaderboard Reset",
-                    description=(
-                        "@skullgirls **The leaderboard and match history have been reset!**\n"
-                        "A new season has begun. Good luck and happy gaming!"
-                    ),
-                    color=discord.Color.gold()
-                )
-                await channel.send(embed=embed)
-                print("📢 Notification sent successfully.")
-            else:
-                print("⚠️ Channel ID not found!")
+    @resetconfig.command(name="schedule")
+    async def resetconfig_schedule(self, ctx, day: int, hour: int = 0):
+        """Sets the day of the month (0 disables) and UTC hour of the automatic reset."""
+        if not await self.check_admin(ctx):
+            return
+        if not 0 <= day <= 28 or not 0 <= hour <= 23:
+            embed = discord.Embed(
+                title="❌ Invalid Schedule",
+                description="The day must be between **0** and **28** (0 disables) and the hour between **0** and **23**.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        await submit_write("update_guild_settings", guild_id=ladder_scope(ctx), reset_day=day, reset_hour=hour)
+        description = (
+            f"The ladder will reset on day **{day}** of every month at **{hour:02d}:00 UTC**."
+            if day else "The automatic reset is now **disabled**."
+        )
+        embed = discord.Embed(title="✅ Reset Schedule Updated", description=description, color=discord.Color.green())
+        await ctx.send(embed=embed)
 
-        except Exception as e:
-            print(f"❌ Error in reset_database function: {e}")
-        finally:
-            conn.close()
+    async def check_admin(self, ctx):
+        if is_ladder_admin(ctx.author):
+            return True
+        embed = discord.Embed(
+            title="❌ Unauthorized",
+            description="You are not authorized to use this command.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+    @commands.group(invoke_without_command=True)
+    async def decay(self, ctx):
+        """Shows the ladder's inactivity decay policy and the latest decay entries."""
+        scope = ladder_scope(ctx)
+        settings = get_guild_settings(scope)
+        if settings["decay_points"]:
+            policy = (f"Players idle for more than **{settings['decay_idle_days']} days** lose "
+                      f"**{settings['decay_points']} points** per week.")
+        else:
+            policy = "Inactivity decay is **disabled**."
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(p.username, l.discord_id), l.points_before, l.points_after, l.decayed_at
+            FROM decay_ledger l
+            LEFT JOIN players p ON p.guild_id = l.guild_id AND p.discord_id = l.discord_id
+            WHERE l.guild_id = ?
+            ORDER BY l.decayed_at DESC, l.id DESC
+            LIMIT 10
+        """, (scope,))
+        entries = cursor.fetchall()
+        conn.close()
+
+        embed = discord.Embed(
+            title="📉 Inactivity Decay",
+            description=(
+                f"{policy}\n\n"
+                "Change with `!fb decay set <points> <idle_days>` or `!fb decay off`."
+            ),
+            color=discord.Color.blue()
+        )
+        if entries:
+            embed.add_field(
+                name="🧾 Latest Entries",
+                value="\n".join(
+                    f"**{name}**: {before} → {after} ({decayed_at} UTC)" for name, before, after, decayed_at in entries
+                ),
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+    @decay.command(name="set")
+    async def decay_set(self, ctx, points: int, idle_days: int = 14):
+        """Sets the points lost per idle week and the idle days before decay starts."""
+        if not await self.check_admin(ctx):
+            return
+        if not 1 <= points <= 100 or not 1 <= idle_days <= 365:
+            embed = discord.Embed(
+                title="❌ Invalid Decay Policy",
+                description="Points must be between **1** and **100** and idle days between **1** and **365**.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        await submit_write("update_guild_settings", guild_id=ladder_scope(ctx), decay_points=points, decay_idle_days=idle_days)
+        embed = discord.Embed(
+            title="✅ Decay Policy Updated",
+            description=f"Players idle for more than **{idle_days} days** will lose **{points} points** per week.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @decay.command(name="off")
+    async def decay_off(self, ctx):
+        """Disables inactivity decay for the ladder."""
+        if not await self.check_admin(ctx):
+            return
+        await submit_write("update_guild_settings", guild_id=ladder_scope(ctx), decay_points=0)
+        embed = discord.Embed(title="✅ Decay Disabled", description="Inactivity decay is now **disabled**.", color=discord.Color.green())
+        await ctx.send(embed=embed)
 
     @auto_reset_task.before_loop
     async def before_auto_reset_task(self):
         await self.bot.wait_until_ready()
 
+    @decay_task.before_loop
+    async def before_decay_task(self):
+        await self.bot.wait_until_ready()
+
 async def setup(bot):
     await bot.add_cog(ResetCog(bot))
\ No newline at end of file
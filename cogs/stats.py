@@ -1,81 +1,55 @@
 import discord
+from collections import OrderedDict
 from discord.ext import commands
-from discord.ui import View, Button
-from db.database import get_connection
+from db.database import get_connection, get_current_season, get_guild_settings
+from db.ranking import calculate_rank, rank_thresholds
+from utils.ladders import ladder_scope
+from utils.state import shared_state
+from cogs.history import NO_FILTERS, HistoryPaginator, count_history, fetch_history_page, history_page_embed
 
-
-class StatsPaginator(View):
-    def __init__(self, embeds):
-        super().__init__(timeout=None)
-        self.embeds = embeds
-        self.current = 0
-        self.total = len(embeds)
-
-        self.prev_button = Button(label="◀️ Previous", style=discord.ButtonStyle.secondary)
-        self.next_button = Button(label="Next ▶️", style=discord.ButtonStyle.secondary)
-        self.prev_button.callback = self.prev_page
-        self.next_button.callback = self.next_page
-
-        self.add_item(self.prev_button)
-        self.add_item(self.next_button)
-
-    async def update_message(self, interaction):
-        embed = self.embeds[self.current]
-        await interaction.response.edit_message(embed=embed, view=self)
-
-    async def prev_page(self, interaction):
-        if self.current > 0:
-            self.current -= 1
-            await self.update_message(interaction)
-
-    async def next_page(self, interaction):
-        if self.current < self.total - 1:
-            self.current += 1
-            await self.update_message(interaction)
+MAX_CACHED_CARDS = 1024
 
 
 class StatsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    @commands.command()
-    @commands.cooldown(1, 60, commands.BucketType.user)
-    async def stats(self, ctx):
-        """Display the user's rank, points, progress, and match history (only available with pagination)."""
+        # (ladder scope, discord id) -> rendered card: the rank embed and the first history
+        # page as embed dicts, plus what is needed to page further. Dropped when the
+        # player's matches, name or points change. Shared so a reload keeps the cards.
+        self.cards = shared_state(bot, "stats_cards", OrderedDict)
+
+    @commands.Cog.listener()
+    async def on_ladder_change(self, change):
+        """Forgets the cards a committed write made stale."""
+        guild_id = change.get("guild_id")
+        players = change.get("players") or []
+        if change["op"] in ("record_match", "import_matches", "report_tournament_match"):
+            for key in [key for key in self.cards if key[0] == guild_id and key[1] in players]:
+                del self.cards[key]
+        elif change["op"] in ("rename_player", "delete_player", "reset_season", "apply_decay", "restore_snapshot") or change.get("ranks"):
+            # A renamed or departed player also appears on their opponents' history pages
+            for key in [key for key in self.cards if key[0] == guild_id]:
+                del self.cards[key]
+
+    def render_card(self, guild_id, member):
+        """Builds the card of a registered player, or returns None."""
         conn = get_connection()
         cursor = conn.cursor()
-
-        # Fetch player's rank and points
-        cursor.execute("SELECT username, points FROM players WHERE discord_id = ?", (str(ctx.author.id),))
+        cursor.execute("SELECT username, points FROM players WHERE guild_id = ? AND discord_id = ?", (guild_id, member.id))
         player = cursor.fetchone()
-
         if not player:
             conn.close()
-            embed = discord.Embed(
-                title="❌ Stats Lookup Failed",
-                description="You are not registered yet. Please register first using `!fb register YourName`.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+            return None
 
-        username, points = player
-        rank = self.get_rank(points)
-        next_rank_points = self.get_next_rank_points(rank)
-
-        # Fetch match history
-        cursor.execute("""
-            SELECT m.id, p1.username, p2.username, m.winner_score, m.loser_score, m.timestamp,
-                   m.winner_points_gained, m.loser_points_lost
-            FROM matches m
-            JOIN players p1 ON m.winner_id = p1.discord_id
-            JOIN players p2 ON m.loser_id = p2.discord_id
-            WHERE m.winner_id = ? OR m.loser_id = ?
-            ORDER BY m.timestamp DESC
-        """, (str(ctx.author.id), str(ctx.author.id)))
-        matches = cursor.fetchall()
+        season = get_current_season(cursor, guild_id)
+        total = count_history(cursor, guild_id, season, member.id, NO_FILTERS)
         conn.close()
 
+        username, points = player
+        thresholds = rank_thresholds(get_guild_settings(guild_id)["rank_points"])
+        rank = self.get_rank(points, thresholds)
+        next_rank = self.get_next_rank(points, thresholds)
+
         # Embed for rank and points
         rank_embed = discord.Embed(
             title=f"🏅 {username}'s Rank",
@@ -83,10 +57,11 @@ class StatsCog(commands.Cog):
         )
         rank_embed.add_field(name="Current Rank", value=f"**{rank}**", inline=False)
         rank_embed.add_field(name="Current Points", value=f"**{points}**", inline=False)
-        if rank != "Platinum":
+        if next_rank:
+            next_rank_points, next_rank_name = next_rank
             rank_embed.add_field(
                 name="Points for Next Rank",
-                value=f"{next_rank_points - points} points to **{self.get_next_rank_name(rank)}**",
+                value=f"{next_rank_points - points} points to **{next_rank_name}**",
                 inline=False
             )
         else:
@@ -94,42 +69,54 @@ class StatsCog(commands.Cog):
 
         rank_embed.set_footer(text="🔹 Use the ▶️ button to view your match history. (Try Painwheel!)")
 
-        # If no matches, send only rank embed
-        if not matches:
+        card = {"season": season, "total": total, "rank": None, "history": None, "next": None}
+        if total:
+            matches, card["next"] = fetch_history_page(guild_id, season, member.id, NO_FILTERS)
+            card["history"] = history_page_embed(member, matches, 1, total, NO_FILTERS, season).to_dict()
+        else:
             rank_embed.set_footer(text="❌ No match history found.")
-            await ctx.send(embed=rank_embed)
-            return
-
-        embeds = [rank_embed]
+        card["rank"] = rank_embed.to_dict()
+        return card
 
-        # Embed for paginated matches (5 matches per page)
-        matches_per_page = 5
-        total_pages = max((len(matches) - 1) // matches_per_page + 1, 1)  # Ensure at least 1 page
-
-        for i in range(0, len(matches), matches_per_page):
-            page_matches = matches[i:i + matches_per_page]
-            page_number = len(embeds)  # Page starts at index 1
-            paginated_embed = discord.Embed(
-                title=f"📜 Match History - Page {page_number}/{total_pages}",
-                description=f"Displaying match history for {ctx.author.mention}.",
-                color=0x00ffcc
-            )
-            for match in page_matches:
-                match_id, winner_name, loser_name, winner_score, loser_score, timestamp, points_gained, points_lost = match
-                paginated_embed.add_field(
-                    name=f"🆔 Match ID: {match_id}",
-                    value=(f"🏆 Winner: **{winner_name}** (+{points_gained})\n"
-                           f"💔 Loser: **{loser_name}** (-{abs(points_lost)})\n"
-                           f"📊 Score: {winner_score} - {loser_score}\n"
-                           f"🕒 Date: {timestamp}"),
-                    inline=False
+    @commands.command()
+    @commands.cooldown(1, 10, commands.BucketType.user)
+    async def stats(self, ctx, member: discord.Member = None):
+        """Display a player's rank, points, progress, and match history (only available with pagination)."""
+        member = member or ctx.author
+        scope = ladder_scope(ctx)
+        key = (scope, member.id)
+        card = self.cards.get(key)
+        if card is None:
+            card = self.render_card(scope, member)
+            if card is None:
+                embed = discord.Embed(
+                    title="❌ Stats Lookup Failed",
+                    description=(
+                        "You are not registered yet. Please register first using `!fb register YourName`."
+                        if member == ctx.author else f"{member.mention} is not registered."
+                    ),
+                    color=discord.Color.red()
                 )
-            paginated_embed.set_footer(text="Use ◀️ and ▶️ to navigate pages.")
-            embeds.append(paginated_embed)
+                await ctx.send(embed=embed)
+                return
+            self.cards[key] = card
+            if len(self.cards) > MAX_CACHED_CARDS:
+                self.cards.popitem(last=False)
+        else:
+            self.cards.move_to_end(key)
+
+        # Embeds are rebuilt from the cached payloads, so no message shares an Embed object
+        rank_embed = discord.Embed.from_dict(card["rank"])
+        if card["history"] is None:
+            await ctx.send(embed=rank_embed)
+            return
 
         # Send rank embed first, then attach pagination for history
-        view = StatsPaginator(embeds)
-        await ctx.send(embed=embeds[0], view=view)
+        view = HistoryPaginator(
+            scope, card["season"], member, NO_FILTERS, card["total"],
+            cover=rank_embed, first_page=(discord.Embed.from_dict(card["history"]), card["next"])
+        )
+        await ctx.send(embed=rank_embed, view=view)
 
     @stats.error
     async def stats_error(self, ctx, error):
@@ -141,40 +128,23 @@ class StatsCog(commands.Cog):
                 color=discord.Color.orange()
             )
             await ctx.send(embed=embed)
+        elif isinstance(error, commands.MemberNotFound):
+            embed = discord.Embed(
+                title="❌ Member Not Found",
+                description="Usage: `!fb stats [@user]`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
 
 
-    def get_rank(self, points):
-        """Determine the player's rank based on their points."""
-        if points >= 100:
-            return "Platinum"
-        elif points >= 50:
-            return "Gold"
-        elif points >= 25:
-            return "Silver"
-        else:
-            return "Bronze"
-
-    def get_next_rank_points(self, rank):
-        """Determine the points required for the next rank."""
-        if rank == "Platinum":
-            return 100  # Max rank achieved
-        elif rank == "Gold":
-            return 100
-        elif rank == "Silver":
-            return 50
-        else:
-            return 25
-
-    def get_next_rank_name(self, rank):
-        """Return the name of the next rank."""
-        if rank == "Bronze":
-            return "Silver"
-        elif rank == "Silver":
-            return "Gold"
-        elif rank == "Gold":
-            return "Platinum"
-        else:
-            return "Max Rank"
+    def get_rank(self, points, thresholds):
+        """Determine the player's rank based on their points and the ladder's thresholds."""
+        return calculate_rank(points, thresholds).split(" ", 1)[1]
+
+    def get_next_rank(self, points, thresholds):
+        """Return (points required, name) of the next rank, or None at the max rank."""
+        higher = [(minimum, rank.split(" ", 1)[1]) for minimum, rank in thresholds if minimum > points]
+        return higher[-1] if higher else None
 
 async def setup(bot):
     await bot.add_cog(StatsCog(bot))
\ No newline at end of file
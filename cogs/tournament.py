@@ -0,0 +1,313 @@
+import discord
+import io
+from discord.ext import commands
+from db.database import get_connection, get_guild_settings
+from db.ranking import validate_score
+from db.tournament import FORMATS, MIN_ENTRANTS, BRACKET_NAMES, BYE, load_bracket
+from db.writer import submit_write
+from utils.approval import request_approval
+from utils.checks import is_ladder_admin
+from utils.ladders import ladder_scope
+from utils.outbox import outbox
+
+MAX_LISTED = 15
+
+
+def render_bracket(bracket, names):
+    """Renders every slot of a bracket as text, grouped by bracket and round."""
+    def name(seed):
+        if seed is None:
+            return "TBD"
+        if seed == BYE:
+            return "bye"
+        return f"({seed}) {names.get(seed, '?')}"
+
+    lines = []
+    section = None
+    for slot in sorted(bracket.slots.values(), key=lambda slot: ("WLFS".index(slot.bracket), slot.round, slot.slot)):
+        if slot.player1 == BYE and slot.player2 == BYE:
+            continue
+        if (slot.bracket, slot.round) != section:
+            section = (slot.bracket, slot.round)
+            if lines:
+                lines.append("")
+            lines.append(f"== {BRACKET_NAMES[slot.bracket]} - Round {slot.round} ==")
+        player1, player2 = name(slot.player1), name(slot.player2)
+        if slot.winner is not None and slot.winner != BYE:
+            if slot.winner == slot.player1:
+                player1 += " [W]"
+            else:
+                player2 += " [W]"
+        lines.append(f"#{slot.slot:<4} {player1} vs {player2}")
+    return "\n".join(lines)
+
+
+class TournamentCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def fetch_tournament(self, cursor, guild_id):
+        """Returns (id, name, format, status, rounds, champion_id) of the guild's current or latest tournament."""
+        cursor.execute("""
+            SELECT id, name, format, status, rounds, champion_id FROM tournaments
+            WHERE guild_id = ? ORDER BY status = 'finished', id DESC LIMIT 1
+        """, (guild_id,))
+        return cursor.fetchone()
+
+    @commands.group(invoke_without_command=True)
+    async def tournament(self, ctx):
+        """Shows the server's tournament: entrants while signups are open, then the bracket."""
+        conn = get_connection()
+        cursor = conn.cursor()
+        tournament = self.fetch_tournament(cursor, ladder_scope(ctx))
+        if not tournament:
+            conn.close()
+            embed = discord.Embed(
+                title="🏆 No Tournament",
+                description="No tournament has been run on this server yet.\n"
+                            "Admins can open one with `!fb tournament create <single|double|swiss> [name]`.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        tournament_id, name, format, status, rounds, champion_id = tournament
+        cursor.execute("""
+            SELECT e.seed, COALESCE(p.username, e.discord_id) FROM tournament_entrants e
+            LEFT JOIN players p ON p.guild_id = e.guild_id AND p.discord_id = e.discord_id
+            WHERE e.tournament_id = ? ORDER BY e.seed
+        """, (tournament_id,))
+        names = dict(cursor.fetchall())
+        bracket = None
+        if status != "signup":
+            bracket, _ = load_bracket(cursor, tournament_id, format, rounds)
+        conn.close()
+
+        embed = discord.Embed(title=f"🏆 {name}", color=discord.Color.gold())
+        embed.add_field(name="Format", value=format.capitalize() + (" elimination" if format != "swiss" else ""), inline=True)
+        embed.add_field(name="Entrants", value=str(len(names)), inline=True)
+        embed.add_field(name="Status", value=status.capitalize(), inline=True)
+
+        if status == "signup":
+            listed = list(names.values())[:MAX_LISTED]
+            if len(names) > MAX_LISTED:
+                listed.append(f"…and {len(names) - MAX_LISTED} more.")
+            embed.description = "Signups are open: join with `!fb tournament join`."
+            embed.add_field(name="📝 Signed Up", value="\n".join(listed) or "Nobody yet.", inline=False)
+            await ctx.send(embed=embed)
+            return
+
+        if champion_id:
+            embed.description = f"👑 Champion: <@{champion_id}>"
+        open_slots = bracket.open_slots()
+        if open_slots:
+            lines = [
+                f"`#{slot.slot}` {BRACKET_NAMES[slot.bracket]} R{slot.round}: **{names[slot.player1]}** vs **{names[slot.player2]}**"
+                for slot in open_slots[:MAX_LISTED]
+            ]
+            if len(open_slots) > MAX_LISTED:
+                lines.append(f"…and {len(open_slots) - MAX_LISTED} more.")
+            embed.add_field(name="⚔️ Open Matches", value="\n".join(lines), inline=False)
+        if format == "swiss":
+            standings = bracket.standings()[:10]
+            embed.add_field(
+                name=f"📊 Standings after round {bracket.current_round()}/{bracket.rounds}",
+                value="\n".join(f"**{index}.** {names[seed]} - {wins} wins" for index, (seed, wins) in enumerate(standings, start=1)),
+                inline=False
+            )
+        embed.set_footer(text="The full bracket is attached. Report results with !fb tournament report.")
+        text = render_bracket(bracket, names)
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(text.encode("utf-8")), filename="bracket.txt"))
+
+    @tournament.command(name="create")
+    async def tournament_create(self, ctx, format: str, *, name: str = None):
+        """Opens signups for a new tournament."""
+        if not await self.check_admin(ctx):
+            return
+        format = format.lower()
+        rounds = None
+        if format.startswith("swiss") and format[5:].isdigit():
+            format, rounds = "swiss", int(format[5:])
+        if format not in FORMATS:
+            embed = discord.Embed(
+                title="❌ Invalid Format",
+                description="Usage: `!fb tournament create <single|double|swiss> [name]`\n"
+                            "Swiss uses enough rounds for one unbeaten player; pick a number with e.g. `swiss5`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        name = (name or f"{ctx.guild.name} {format.capitalize()} Bracket")[:100]
+        tournament_id = await submit_write("create_tournament", guild_id=ladder_scope(ctx), name=name, format=format, rounds=rounds)
+        if tournament_id is None:
+            embed = discord.Embed(
+                title="❌ Tournament Already Running",
+                description="Finish it first, or end it with `!fb tournament cancel`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        embed = discord.Embed(
+            title=f"🏆 {name}",
+            description="Signups are open! Registered players can join with `!fb tournament join`.\n"
+                        "Seeds follow the leaderboard when an admin runs `!fb tournament start`.",
+            color=discord.Color.gold()
+        )
+        await ctx.send(embed=embed)
+
+    @tournament.command(name="join")
+    async def tournament_join(self, ctx):
+        """Signs up for the tournament taking signups."""
+        await self.update_signup(ctx, leave=False)
+
+    @tournament.command(name="leave")
+    async def tournament_leave(self, ctx):
+        """Withdraws from the tournament before it starts."""
+        await self.update_signup(ctx, leave=True)
+
+    async def update_signup(self, ctx, leave):
+        status = await submit_write("join_tournament", guild_id=ladder_scope(ctx), discord_id=ctx.author.id, leave=leave)
+        messages = {
+            "joined": ("✅ Signed Up", "You are in! Seeds are set from the leaderboard when the tournament starts.", discord.Color.green()),
+            "left": ("👋 Withdrawn", "You are no longer signed up.", discord.Color.green()),
+            "closed": ("❌ Signups Closed", "There is no tournament taking signups right now.", discord.Color.red()),
+            "not_registered": ("❌ Registration Required", "Please register first using `!fb register YourName`.", discord.Color.red()),
+            "already_joined": ("❌ Already Signed Up", "You are already in this tournament.", discord.Color.red()),
+            "not_joined": ("❌ Not Signed Up", "You are not in this tournament.", discord.Color.red()),
+        }
+        title, description, color = messages[status]
+        await ctx.send(embed=discord.Embed(title=title, description=description, color=color))
+
+    @tournament.command(name="start")
+    async def tournament_start(self, ctx):
+        """Closes signups, seeds the entrants by points and posts the first matches."""
+        if not await self.check_admin(ctx):
+            return
+        result = await submit_write("start_tournament", guild_id=ladder_scope(ctx))
+        if result == "closed":
+            embed = discord.Embed(title="❌ Nothing to Start", description="There is no tournament taking signups.", color=discord.Color.red())
+            await ctx.send(embed=embed)
+            return
+        if result == "too_few":
+            embed = discord.Embed(
+                title="❌ Not Enough Entrants",
+                description="Single elimination and Swiss need at least **2** registered entrants, "
+                            f"double elimination **{MIN_ENTRANTS['double']}**.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        embed = discord.Embed(
+            title=f"🏁 {result['name']} Has Started!",
+            description=f"**{result['entrants']}** entrants, seeded by ladder points.\n"
+                        "Report results with `!fb tournament report @winner @loser <winner_score> <loser_score>`.",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="⚔️ First Matches", value=self.pairings_text(result["open"]), inline=False)
+        await ctx.send(embed=embed)
+
+    @tournament.command(name="report")
+    async def tournament_report(self, ctx, winner: discord.Member, loser: discord.Member, winner_score: int, loser_score: int):
+        """Reports a bracket match. It is recorded on the ladder like `!fb match`."""
+        score_error = validate_score(winner_score, loser_score, get_guild_settings(ladder_scope(ctx))["win_score"])
+        if score_error:
+            title, description = score_error
+            await outbox.send(ctx.channel, embed=discord.Embed(title=title, description=description, color=discord.Color.red()))
+            return
+        admin = is_ladder_admin(ctx.author)
+        if winner == loser or (not admin and ctx.author not in (winner, loser)):
+            embed = discord.Embed(
+                title="❌ Invalid Report",
+                description="Report your own match against a different player. Admins can report any match.",
+                color=discord.Color.red()
+            )
+            await outbox.send(ctx.channel, embed=embed)
+            return
+
+        # Players need their opponent's approval like any ladder match; admins run the bracket
+        prompt = None
+        approved_by = ctx.author
+        if not admin:
+            prompt, msg = await request_approval(
+                self.bot, ctx, winner, loser, winner_score, loser_score, title="🏆 Tournament Match Approval Required"
+            )
+            if msg is None:
+                return
+            approved_by = msg.author
+
+        result = await submit_write(
+            "report_tournament_match",
+            guild_id=ladder_scope(ctx),
+            winner_id=winner.id,
+            loser_id=loser.id,
+            winner_score=winner_score,
+            loser_score=loser_score,
+            approved_by=approved_by.id
+        )
+        if result is None:
+            embed = discord.Embed(
+                title="❌ No Open Match",
+                description=f"{winner.mention} and {loser.mention} do not have an open match in the running tournament.",
+                color=discord.Color.red()
+            )
+        else:
+            match = result["match"]
+            embed = discord.Embed(
+                title=f"🏅 {result['name']}: {BRACKET_NAMES[result['bracket']]} Round {result['round']}",
+                description=f"✅ Approved by {approved_by.mention}\n"
+                            f"🆔 **Match ID:** `{match['match_id']}`\n"
+                            f"🏆 {winner.mention} gained **{match['gain']} points** → Total: **{match['winner_points']}** ({match['winner_rank']})\n"
+                            f"💔 {loser.mention} lost **{match['loss']} points** → Total: **{match['loser_points']}** ({match['loser_rank']})",
+                color=discord.Color.green()
+            )
+            if result["open"]:
+                embed.add_field(name="⚔️ Now Playable", value=self.pairings_text(result["open"]), inline=False)
+            if result["champion"]:
+                embed.add_field(name="👑 Champion", value=f"<@{result['champion']}> wins **{result['name']}**!", inline=False)
+
+        if prompt:
+            await outbox.edit(prompt, embed=embed)
+        else:
+            await outbox.send(ctx.channel, embed=embed)
+
+    @tournament.command(name="cancel")
+    async def tournament_cancel(self, ctx):
+        """Deletes the unfinished tournament. Recorded matches stay on the ladder."""
+        if not await self.check_admin(ctx):
+            return
+        name = await submit_write("cancel_tournament", guild_id=ladder_scope(ctx))
+        if name is None:
+            embed = discord.Embed(title="❌ Nothing to Cancel", description="There is no unfinished tournament.", color=discord.Color.red())
+        else:
+            embed = discord.Embed(title="🗑️ Tournament Cancelled", description=f"**{name}** was cancelled.", color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    def pairings_text(self, pairs):
+        lines = [f"<@{player1}> vs <@{player2}>" for player1, player2 in pairs[:MAX_LISTED]]
+        if len(pairs) > MAX_LISTED:
+            lines.append(f"…and {len(pairs) - MAX_LISTED} more. See `!fb tournament`.")
+        return "\n".join(lines) or "Waiting on other results."
+
+    async def check_admin(self, ctx):
+        if is_ladder_admin(ctx.author):
+            return True
+        embed = discord.Embed(
+            title="❌ Unauthorized",
+            description="You are not authorized to use this command.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+    @tournament_report.error
+    async def tournament_report_error(self, ctx, error):
+        if isinstance(error, (commands.MissingRequiredArgument, commands.BadArgument)):
+            await outbox.send(
+                ctx.channel,
+                content="⚠️ Usage: `!fb tournament report @winner @loser <winner_score> <loser_score>`"
+            )
+
+async def setup(bot):
+    await bot.add_cog(TournamentCog(bot))
@@ -0,0 +1,123 @@
+# db/backup.py
+#
+# Online snapshots of the database with the SQLite backup API. Snapshots are
+# copied a few pages at a time so the live database is never locked for long,
+# and rotated per label ("scheduled", "pre-reset", ...).
+
+import asyncio
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import time
+from db.database import DB_PATH, open_database
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = os.getenv("FIGHTBACK_BACKUP_DIR", "data/backups")
+BACKUP_RETENTION = int(os.getenv("FIGHTBACK_BACKUP_RETENTION", "28"))  # Snapshots kept per label
+BACKUP_STEP_PAGES = 64
+BACKUP_STEP_SLEEP = 0.005
+
+SNAPSHOT_PATTERN = re.compile(r"^fightback-(\d{8}-\d{6})-([a-z0-9-]+)\.db$")
+
+# Tables restored per guild (and per named ladder), with the column identifying the guild
+GUILD_TABLES = [
+    "players", "matches", "seasons", "guild_settings", "decay_ledger",
+    "tournaments", "tournament_entrants", "tournament_slots", "live_leaderboards",
+    "match_characters", "ladders", "ladder_channels",
+]
+
+
+def create_snapshot(label="scheduled", db_path=DB_PATH):
+    """Copies the live database into a new snapshot file. Blocking: run it in a worker thread.
+
+    Returns (snapshot name, size in bytes, seconds taken)."""
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    name = f"fightback-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{label}.db"
+    path = os.path.join(BACKUP_DIR, name)
+    partial = path + ".partial"
+
+    started = time.monotonic()
+    source = open_database(db_path, timeout=10)
+    target = sqlite3.connect(partial)
+    try:
+        source.backup(target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        target.close()
+        source.close()
+    # Only complete snapshots ever carry the final name
+    os.replace(partial, path)
+    duration = time.monotonic() - started
+    size = os.path.getsize(path)
+
+    prune_snapshots(label)
+    return name, size, duration
+
+
+async def take_snapshot(label):
+    """Takes a snapshot in a worker thread and reports its duration and size."""
+    name, size, duration = await asyncio.to_thread(create_snapshot, label)
+    logger.info(
+        "Backup %s written: %.1f KB in %.0f ms", name, size / 1024, duration * 1000,
+        extra={"snapshot": name, "size_bytes": size, "duration_ms": round(duration * 1000, 2)}
+    )
+    return name
+
+
+def list_snapshots():
+    """Returns the snapshot names, newest first."""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    names = [name for name in os.listdir(BACKUP_DIR) if SNAPSHOT_PATTERN.match(name)]
+    return sorted(names, key=lambda name: SNAPSHOT_PATTERN.match(name).group(1), reverse=True)
+
+
+def prune_snapshots(label, keep=BACKUP_RETENTION):
+    """Deletes the oldest snapshots of a label beyond the retention count."""
+    snapshots = [name for name in list_snapshots() if SNAPSHOT_PATTERN.match(name).group(2) == label]
+    for name in snapshots[keep:]:
+        os.remove(os.path.join(BACKUP_DIR, name))
+
+
+def snapshot_path(name):
+    """Returns the path of an existing snapshot. Only names from list_snapshots() are accepted."""
+    if name not in list_snapshots():
+        raise ValueError(f"Unknown snapshot: {name}")
+    return os.path.join(BACKUP_DIR, name)
+
+
+def copy_guild_rows(cursor, snapshot, guild_id):
+    """Replaces one guild's rows in every GUILD_TABLES table with the rows stored in a snapshot.
+
+    Rows are streamed from the snapshot; columns the snapshot does not have
+    (taken before a migration) get their defaults. Returns rows restored per table."""
+    source = sqlite3.connect(f"file:{snapshot_path(snapshot)}?mode=ro", uri=True)
+    restored = {}
+    try:
+        for table in GUILD_TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            live_columns = [column[1] for column in cursor.fetchall()]
+            snapshot_columns = [column[1] for column in source.execute(f"PRAGMA table_info({table})")]
+            if "guild_id" not in snapshot_columns:
+                continue  # Table did not exist (or was not guild-scoped) when the snapshot was taken
+            columns = [column for column in snapshot_columns if column in live_columns]
+            column_list = ", ".join(columns)
+
+            cursor.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,))
+            rows = source.execute(f"SELECT {column_list} FROM {table} WHERE guild_id = ?", (guild_id,))
+            cursor.executemany(
+                f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in columns)})",
+                rows
+            )
+            restored[table] = cursor.rowcount
+        # Snapshots taken before migration 8 store match times as UTC text
+        cursor.execute(
+            "UPDATE matches SET timestamp = CAST(strftime('%s', timestamp) AS INTEGER) * 1000 "
+            "WHERE guild_id = ? AND typeof(timestamp) = 'text'",
+            (guild_id,)
+        )
+    finally:
+        source.close()
+    return restored
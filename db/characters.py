@@ -0,0 +1,93 @@
+# db/characters.py
+#
+# Skullgirls characters played in a match. The teams of every match are kept in
+# match_characters, one row per character. The per-season win/loss counters in
+# character_stats and player_character_stats are bumped in the same transaction
+# as the match, so `!fb chars` reads a few rows instead of aggregating every match.
+
+import re
+
+CHARACTERS = [
+    "Filia", "Cerebella", "Peacock", "Parasoul", "Ms. Fortune", "Painwheel",
+    "Valentine", "Double", "Squigly", "Big Band", "Eliza", "Fukua", "Beowulf",
+    "Robo-Fortune", "Annie", "Umbrella", "Black Dahlia", "Marie",
+]
+MAX_TEAM_SIZE = 3
+
+
+class TeamError(Exception):
+    """A team argument that does not name up to three different characters."""
+
+
+def _key(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+# Lookup by name with spaces and punctuation removed, plus common shorthands
+ALIASES = {_key(name): name for name in CHARACTERS}
+ALIASES.update({
+    "cere": "Cerebella", "bella": "Cerebella", "para": "Parasoul", "fortune": "Ms. Fortune",
+    "msf": "Ms. Fortune", "pw": "Painwheel", "val": "Valentine", "squig": "Squigly",
+    "band": "Big Band", "bb": "Big Band", "beo": "Beowulf", "robo": "Robo-Fortune",
+    "rf": "Robo-Fortune", "dahlia": "Black Dahlia",
+})
+
+
+def parse_team(text):
+    """Parses a team like `Painwheel/Valentine/Double` (`,` and `+` also separate) into character names."""
+    parts = [part for part in re.split(r"[/,+]", text) if part.strip()]
+    if not parts or len(parts) > MAX_TEAM_SIZE:
+        raise TeamError(f"A team has 1 to {MAX_TEAM_SIZE} characters separated by `/`.")
+    team = []
+    for part in parts:
+        name = ALIASES.get(_key(part))
+        if name is None:
+            raise TeamError(f"Unknown character `{part.strip()}`.")
+        if name in team:
+            raise TeamError(f"{name} is in the team twice.")
+        team.append(name)
+    return team
+
+
+def record_characters(cursor, guild_id, season, match_id, winner_id, loser_id, winner_team, loser_team):
+    """Stores the teams of a match and adds it to the character counters. Either team may be None."""
+    for won, player_id, team in ((1, winner_id, winner_team), (0, loser_id, loser_team)):
+        if not team:
+            continue
+        cursor.executemany(
+            "INSERT INTO match_characters (guild_id, match_id, won, slot, character) VALUES (?, ?, ?, ?, ?)",
+            [(guild_id, match_id, won, slot, character) for slot, character in enumerate(team)]
+        )
+        cursor.executemany("""
+            INSERT INTO character_stats (guild_id, season, character, wins, losses) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (guild_id, season, character) DO UPDATE SET wins = wins + excluded.wins, losses = losses + excluded.losses
+        """, [(guild_id, season, character, won, 1 - won) for character in team])
+        cursor.executemany("""
+            INSERT INTO player_character_stats (guild_id, season, discord_id, character, wins, losses) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (guild_id, season, discord_id, character) DO UPDATE SET wins = wins + excluded.wins, losses = losses + excluded.losses
+        """, [(guild_id, season, player_id, character, won, 1 - won) for character in team])
+
+
+def rebuild_character_stats(cursor, guild_id):
+    """Recomputes the guild's counters from match_characters, e.g. after a snapshot restore."""
+    # Teams of matches the restore removed (or a snapshot without character data left behind)
+    cursor.execute("""
+        DELETE FROM match_characters WHERE guild_id = ?
+        AND match_id NOT IN (SELECT id FROM matches WHERE guild_id = ?)
+    """, (guild_id, guild_id))
+    cursor.execute("DELETE FROM character_stats WHERE guild_id = ?", (guild_id,))
+    cursor.execute("DELETE FROM player_character_stats WHERE guild_id = ?", (guild_id,))
+    cursor.execute("""
+        INSERT INTO character_stats (guild_id, season, character, wins, losses)
+        SELECT c.guild_id, m.season, c.character, SUM(c.won), SUM(1 - c.won)
+        FROM match_characters c JOIN matches m ON m.id = c.match_id
+        WHERE c.guild_id = ?
+        GROUP BY m.season, c.character
+    """, (guild_id,))
+    cursor.execute("""
+        INSERT INTO player_character_stats (guild_id, season, discord_id, character, wins, losses)
+        SELECT c.guild_id, m.season, CASE c.won WHEN 1 THEN m.winner_id ELSE m.loser_id END AS player_id,
+               c.character, SUM(c.won), SUM(1 - c.won)
+        FROM match_characters c JOIN matches m ON m.id = c.match_id
+        WHERE c.guild_id = ?
+        GROUP BY m.season, player_id, c.character
+    """, (guild_id,))
@@ -1,15 +1,35 @@
 # db/database.py
 
+import logging
 import sqlite3
 import os
+import time
+from utils.logs import add_timing
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = 'data/fightback.db'
 
-def setup_database():
-    os.makedirs('data', exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# Rows created before the bot became multi-guild have no guild; they are moved
+# into this guild when the guild-scope migration runs.
+LEGACY_GUILD_ID = int(os.getenv("FIGHTBACK_LEGACY_GUILD_ID", "0"))
+
+def setup_database(db_path=DB_PATH, target=None):
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # WAL lets readers in every bot process keep reading a consistent
+    # snapshot while the writer commits
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # Lets db/maintenance.py hand the pages freed by resets and restores back a
+    # bounded step at a time. An existing file only switches with one full VACUUM.
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
+        logger.info("Switched the database to incremental auto-vacuum")
+
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS players (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -38,11 +58,75 @@ def setup_database():
     conn.close()
 
     # Make sure rank column exists even if DB already created
-    ensure_rank_column_exists()
+    ensure_rank_column_exists(db_path)
+
+    # Bring older databases up to the current schema
+    migrate_database(db_path, target)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Adds the time spent executing and fetching to the running command's db_ms."""
+
+    def execute(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            add_timing("db_ms", time.perf_counter() - started)
+
+    def executemany(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            add_timing("db_ms", time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            add_timing("db_ms", time.perf_counter() - started)
+
+    def fetchmany(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            add_timing("db_ms", time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            add_timing("db_ms", time.perf_counter() - started)
 
 
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+
+# Set by db/memory.py when the database is served from memory
+_memory_uri = None
+
+def use_memory_database(uri):
+    """Points every later connection to DB_PATH at the in-memory database at `uri`."""
+    global _memory_uri
+    _memory_uri = uri
+
+def open_database(path=DB_PATH, **kwargs):
+    """Connects to the database file at `path`, or to its in-memory copy when memory mode is on."""
+    if _memory_uri and path == DB_PATH:
+        return sqlite3.connect(_memory_uri, uri=True, **kwargs)
+    return sqlite3.connect(path, **kwargs)
+
 def get_connection():
-    return sqlite3.connect(DB_PATH, timeout=10)
+    return open_database(timeout=10, factory=TimedConnection)
 
 
 # Helper function to execute queries safely
@@ -58,50 +142,541 @@ def execute_query(query, params=None):
         conn.commit()
         return cursor
     except sqlite3.OperationalError as e:
-        print(f"❌ Error executing query: {e}")
+        logger.error("Error executing query: %s", e, extra={"query": query})
         conn.rollback()
     finally:
         conn.close()
 
-# Function to reset the database (clear players and matches tables)
-def reset_database():
-    """Ensures the database has the correct structure and clears all data."""
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+def ensure_rank_column_exists(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(players)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if "rank" not in columns:
+        cursor.execute("ALTER TABLE players ADD COLUMN rank TEXT DEFAULT 'Bronze'")
+        conn.commit()
+    conn.close()
 
-        # Check if 'rank' column exists in 'players' table
-        cursor.execute("PRAGMA table_info(players);")
-        columns = [col[1] for col in cursor.fetchall()]  # Extract column names
 
-        if "rank" not in columns:
-            print("⚠️ 'rank' column is missing! Adding it now...")
-            cursor.execute("ALTER TABLE players ADD COLUMN rank TEXT DEFAULT 'Bronze';")
-            conn.commit()
-            print("✅ 'rank' column added successfully!")
+def snowflake(value):
+    """Returns a Discord id as the int stored since migration 7.
 
-        # Clear match history
-        cursor.execute("DELETE FROM matches")
-        print("✅ Match history cleared!")
+    Compatibility shim: ids used to be TEXT, and callers, journaled writes and
+    bulk-import files may still pass them as strings. Reads need no shim:
+    comparing an INTEGER column with a string parameter converts the string."""
+    return None if value is None else int(value)
 
-        # Reset player leaderboard: set points to 0 and rank to Bronze
-        cursor.execute("UPDATE players SET points = 0, rank = 'Bronze'")
-        print("✅ Player leaderboard reset: all players set to 0 points and Bronze rank.")
 
-        conn.commit()
-        print("✅ Database reset successfully!")
+# --- Seasons and per-guild settings ---
 
-    except sqlite3.OperationalError as e:
-        print(f"❌ Error in reset_database function: {e}")
-    finally:
-        conn.close()
+# Per-process caches of rarely changing rows. They are dropped by
+# invalidate_cached() when the writer reports a change to the guild.
+_season_cache = {}
+_guild_settings_cache = {}
+
+def get_current_season(cursor, guild_id, cached=True):
+    """Returns the guild's current season number (1 until the first reset)."""
+    if cached and guild_id in _season_cache:
+        return _season_cache[guild_id]
+    cursor.execute("SELECT MAX(season) FROM seasons WHERE guild_id = ?", (guild_id,))
+    row = cursor.fetchone()
+    season = row[0] if row and row[0] is not None else 1
+    if cached:
+        _season_cache[guild_id] = season
+    return season
 
-def ensure_rank_column_exists():
+
+GUILD_SETTINGS_DEFAULTS = {
+    "announce_channel_id": None,
+    "reset_day": 1,    # Day of the month for the automatic reset, 0 disables it
+    "reset_hour": 0,   # UTC hour of the automatic reset
+    "decay_points": 0,      # Points lost per week of inactivity, 0 disables decay
+    "decay_idle_days": 14,  # Days without a match before decay starts
+    "admin_channel_id": None,  # Where win-farming alerts are posted
+    "win_score": 5,  # Matches are first to this many wins
+    "rank_points": "25,50,100",  # Minimum points for Silver, Gold and Platinum
+}
+
+def get_guild_settings(guild_id):
+    """Returns the guild's settings as a dict, falling back to the defaults."""
+    if guild_id in _guild_settings_cache:
+        return dict(_guild_settings_cache[guild_id])
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(players)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if "rank" not in columns:
-        cursor.execute("ALTER TABLE players ADD COLUMN rank TEXT DEFAULT 'Bronze'")
-        conn.commit()
+    cursor.execute(
+        f"SELECT {', '.join(GUILD_SETTINGS_DEFAULTS)} FROM guild_settings WHERE guild_id = ?",
+        (guild_id,)
+    )
+    row = cursor.fetchone()
     conn.close()
+    settings = dict(zip(GUILD_SETTINGS_DEFAULTS, row)) if row else dict(GUILD_SETTINGS_DEFAULTS)
+    _guild_settings_cache[guild_id] = settings
+    return dict(settings)
+
+
+# --- Ladders ---
+# A guild's own ladder is scoped by the guild id. Named ladders (`!fb ladder
+# create`) get a small id from the ladders table that takes the place of the
+# guild id in every guild-scoped table, so each ladder has its own players,
+# matches, seasons and settings, served by the same (guild_id, ...) indexes.
+
+_ladders_cache = {}
+_ladder_guilds = None
+
+def get_ladders(guild_id):
+    """Returns the guild's named ladders as {"ladders": {id: name}, "channels": {channel id: ladder id}}."""
+    if guild_id not in _ladders_cache:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM ladders WHERE guild_id = ? ORDER BY id", (guild_id,))
+        ladders = dict(cursor.fetchall())
+        cursor.execute("SELECT channel_id, ladder_id FROM ladder_channels WHERE guild_id = ?", (guild_id,))
+        channels = dict(cursor.fetchall())
+        conn.close()
+        _ladders_cache[guild_id] = {"ladders": ladders, "channels": channels}
+    return _ladders_cache[guild_id]
+
+def ladder_guild(scope_id):
+    """Returns the guild a ladder scope belongs to: the guild itself for its own ladder."""
+    global _ladder_guilds
+    if _ladder_guilds is None:
+        conn = get_connection()
+        _ladder_guilds = dict(conn.execute("SELECT id, guild_id FROM ladders").fetchall())
+        conn.close()
+    return _ladder_guilds.get(scope_id, scope_id)
+
+def invalidate_cached(change):
+    """Change listener: drops cached rows made stale by a write."""
+    global _ladder_guilds
+    if change["op"] in ("reset_season", "restore_snapshot"):
+        _season_cache.pop(change["guild_id"], None)
+    if change["op"] in ("update_guild_settings", "restore_snapshot"):
+        _guild_settings_cache.pop(change["guild_id"], None)
+    if change["op"] in ("create_ladder", "set_ladder_channel", "restore_snapshot"):
+        _ladders_cache.pop(change["guild_id"], None)
+        _guild_settings_cache.pop(change.get("ladder_id"), None)
+        _ladder_guilds = None
+
+# --- Schema migrations ---
+# Each migration runs once, in order, inside its own transaction. The number of
+# applied migrations is stored in PRAGMA user_version.
+
+def _migrate_guild_scope(cursor):
+    """Scopes players and matches to a guild and adds seasons and guild settings."""
+    cursor.execute("""
+        CREATE TABLE players_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            discord_id TEXT NOT NULL,
+            username TEXT,
+            points INTEGER DEFAULT 0,
+            rank TEXT DEFAULT 'Bronze',
+            UNIQUE (guild_id, discord_id)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO players_new (id, guild_id, discord_id, username, points, rank)
+        SELECT id, ?, discord_id, username, points, rank FROM players
+    """, (LEGACY_GUILD_ID,))
+    cursor.execute("DROP TABLE players")
+    cursor.execute("ALTER TABLE players_new RENAME TO players")
+
+    cursor.execute(f"ALTER TABLE matches ADD COLUMN guild_id INTEGER NOT NULL DEFAULT {LEGACY_GUILD_ID}")
+    cursor.execute("ALTER TABLE matches ADD COLUMN season INTEGER NOT NULL DEFAULT 1")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seasons (
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ended_at DATETIME,
+            PRIMARY KEY (guild_id, season)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            announce_channel_id INTEGER,
+            reset_day INTEGER NOT NULL DEFAULT 1,
+            reset_hour INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Leaderboard and history lookups are always bounded to one guild
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_guild_points ON players (guild_id, points DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_guild_winner ON matches (guild_id, season, winner_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_guild_loser ON matches (guild_id, season, loser_id)")
+
+
+def _migrate_inactivity_decay(cursor):
+    """Adds last-played tracking, the inactivity decay policy and the decay ledger."""
+    cursor.execute("ALTER TABLE players ADD COLUMN last_played DATETIME")
+    cursor.execute("""
+        UPDATE players SET last_played = (
+            SELECT MAX(m.timestamp) FROM matches m
+            WHERE m.guild_id = players.guild_id
+              AND (m.winner_id = players.discord_id OR m.loser_id = players.discord_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_guild_last_played ON players (guild_id, last_played)")
+
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN decay_points INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN decay_idle_days INTEGER NOT NULL DEFAULT 14")
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN last_decay_at DATETIME")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS decay_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            discord_id TEXT NOT NULL,
+            points_before INTEGER NOT NULL,
+            points_after INTEGER NOT NULL,
+            decayed_at DATETIME NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_decay_ledger_guild ON decay_ledger (guild_id, decayed_at)")
+
+
+def _migrate_points_after(cursor):
+    """Stores each player's points after every match so rating timelines need no replay."""
+    cursor.execute("ALTER TABLE matches ADD COLUMN winner_points_after INTEGER")
+    cursor.execute("ALTER TABLE matches ADD COLUMN loser_points_after INTEGER")
+
+    # Replay the stored deltas: every season starts at 0 and points never go below 0
+    points = {}
+    backfill = []
+    cursor.execute("""
+        SELECT id, guild_id, season, winner_id, loser_id, winner_points_gained, loser_points_lost
+        FROM matches ORDER BY guild_id, season, id
+    """)
+    for match_id, guild_id, season, winner_id, loser_id, gained, lost in cursor.fetchall():
+        winner_key = (guild_id, season, winner_id)
+        loser_key = (guild_id, season, loser_id)
+        points[winner_key] = points.get(winner_key, 0) + (gained or 0)
+        points[loser_key] = max(points.get(loser_key, 0) - (lost or 0), 0)
+        backfill.append((points[winner_key], points[loser_key], match_id))
+    cursor.executemany(
+        "UPDATE matches SET winner_points_after = ?, loser_points_after = ? WHERE id = ?",
+        backfill
+    )
+
+
+def _migrate_tournaments(cursor):
+    """Adds tournaments, their seeded entrants and their bracket slots."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            format TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'signup',
+            rounds INTEGER,
+            champion_id TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_guild_status ON tournaments (guild_id, status)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tournament_entrants (
+            guild_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            seed INTEGER NOT NULL,
+            discord_id TEXT NOT NULL,
+            PRIMARY KEY (tournament_id, seed),
+            UNIQUE (tournament_id, discord_id)
+        )
+    """)
+    # One row per bracket match; players are seeds, 0 is a bye
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tournament_slots (
+            guild_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            bracket TEXT NOT NULL,
+            round INTEGER NOT NULL,
+            player1 INTEGER,
+            player2 INTEGER,
+            winner INTEGER,
+            match_id INTEGER,
+            winner_to INTEGER,
+            winner_side INTEGER,
+            loser_to INTEGER,
+            loser_side INTEGER,
+            PRIMARY KEY (tournament_id, slot)
+        )
+    """)
+
+
+def _migrate_match_approver(cursor):
+    """Records who approved each match and adds the admin alert channel setting."""
+    cursor.execute("ALTER TABLE matches ADD COLUMN approved_by TEXT")
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN admin_channel_id INTEGER")
+
+
+def _migrate_live_leaderboards(cursor):
+    """Adds the live leaderboard messages the bot keeps up to date."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS live_leaderboards (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, channel_id)
+        )
+    """)
+
+
+def _rebuild_table(cursor, table, create_sql, columns):
+    """Recreates a table with a new definition, copying `columns` (SELECT expressions in the new column order)."""
+    cursor.execute(create_sql.format(table=f"{table}_new"))
+    cursor.execute(f"INSERT INTO {table}_new SELECT {', '.join(columns)} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+def _migrate_integer_snowflakes(cursor):
+    """Stores Discord ids as INTEGER and clusters small keyed tables WITHOUT ROWID."""
+    # Players are always looked up by (guild_id, discord_id): clustering on that
+    # key makes each lookup one B-tree search. The unused surrogate id is dropped.
+    _rebuild_table(cursor, "players", """
+        CREATE TABLE {table} (
+            guild_id INTEGER NOT NULL,
+            discord_id INTEGER NOT NULL,
+            username TEXT,
+            points INTEGER DEFAULT 0,
+            rank TEXT DEFAULT 'Bronze',
+            last_played DATETIME,
+            PRIMARY KEY (guild_id, discord_id)
+        ) WITHOUT ROWID
+    """, ["guild_id", "CAST(discord_id AS INTEGER)", "username", "points", "rank", "last_played"])
+    cursor.execute("CREATE INDEX idx_players_guild_points ON players (guild_id, points DESC)")
+    cursor.execute("CREATE INDEX idx_players_guild_last_played ON players (guild_id, last_played)")
+
+    # Matches keep their AUTOINCREMENT rowid: ids are shown to players and only ever grow
+    _rebuild_table(cursor, "matches", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL DEFAULT 1,
+            winner_id INTEGER,
+            loser_id INTEGER,
+            winner_score INTEGER,
+            loser_score INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            approved BOOLEAN DEFAULT 0,
+            approved_by INTEGER,
+            winner_points_gained INTEGER,
+            loser_points_lost INTEGER,
+            winner_points_after INTEGER,
+            loser_points_after INTEGER
+        )
+    """, [
+        "id", "guild_id", "season", "CAST(winner_id AS INTEGER)", "CAST(loser_id AS INTEGER)",
+        "winner_score", "loser_score", "timestamp", "approved", "CAST(approved_by AS INTEGER)",
+        "winner_points_gained", "loser_points_lost", "winner_points_after", "loser_points_after",
+    ])
+    cursor.execute("CREATE INDEX idx_matches_guild_winner ON matches (guild_id, season, winner_id)")
+    cursor.execute("CREATE INDEX idx_matches_guild_loser ON matches (guild_id, season, loser_id)")
+
+    _rebuild_table(cursor, "decay_ledger", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            discord_id INTEGER NOT NULL,
+            points_before INTEGER NOT NULL,
+            points_after INTEGER NOT NULL,
+            decayed_at DATETIME NOT NULL
+        )
+    """, ["id", "guild_id", "CAST(discord_id AS INTEGER)", "points_before", "points_after", "decayed_at"])
+    cursor.execute("CREATE INDEX idx_decay_ledger_guild ON decay_ledger (guild_id, decayed_at)")
+
+    _rebuild_table(cursor, "tournaments", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            format TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'signup',
+            rounds INTEGER,
+            champion_id INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """, ["id", "guild_id", "name", "format", "status", "rounds", "CAST(champion_id AS INTEGER)", "created_at"])
+    cursor.execute("CREATE INDEX idx_tournaments_guild_status ON tournaments (guild_id, status)")
+
+    _rebuild_table(cursor, "tournament_entrants", """
+        CREATE TABLE {table} (
+            guild_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            seed INTEGER NOT NULL,
+            discord_id INTEGER NOT NULL,
+            PRIMARY KEY (tournament_id, seed),
+            UNIQUE (tournament_id, discord_id)
+        ) WITHOUT ROWID
+    """, ["guild_id", "tournament_id", "seed", "CAST(discord_id AS INTEGER)"])
+
+    # Tables whose rows are small and always reached through their primary key
+    slot_columns = [
+        "guild_id", "tournament_id", "slot", "bracket", "round", "player1", "player2", "winner",
+        "match_id", "winner_to", "winner_side", "loser_to", "loser_side",
+    ]
+    _rebuild_table(cursor, "tournament_slots", """
+        CREATE TABLE {table} (
+            guild_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            bracket TEXT NOT NULL,
+            round INTEGER NOT NULL,
+            player1 INTEGER,
+            player2 INTEGER,
+            winner INTEGER,
+            match_id INTEGER,
+            winner_to INTEGER,
+            winner_side INTEGER,
+            loser_to INTEGER,
+            loser_side INTEGER,
+            PRIMARY KEY (tournament_id, slot)
+        ) WITHOUT ROWID
+    """, slot_columns)
+    _rebuild_table(cursor, "seasons", """
+        CREATE TABLE {table} (
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ended_at DATETIME,
+            PRIMARY KEY (guild_id, season)
+        ) WITHOUT ROWID
+    """, ["guild_id", "season", "started_at", "ended_at"])
+    _rebuild_table(cursor, "live_leaderboards", """
+        CREATE TABLE {table} (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, channel_id)
+        ) WITHOUT ROWID
+    """, ["guild_id", "channel_id", "message_id"])
+
+
+def _migrate_epoch_timestamps(cursor):
+    """Stores match times as integer epoch milliseconds and orders history by (timestamp, id)."""
+    _rebuild_table(cursor, "matches", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL DEFAULT 1,
+            winner_id INTEGER,
+            loser_id INTEGER,
+            winner_score INTEGER,
+            loser_score INTEGER,
+            timestamp INTEGER DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+            approved BOOLEAN DEFAULT 0,
+            approved_by INTEGER,
+            winner_points_gained INTEGER,
+            loser_points_lost INTEGER,
+            winner_points_after INTEGER,
+            loser_points_after INTEGER
+        )
+    """, [
+        "id", "guild_id", "season", "winner_id", "loser_id", "winner_score", "loser_score",
+        "CAST(strftime('%s', timestamp) AS INTEGER) * 1000", "approved", "approved_by",
+        "winner_points_gained", "loser_points_lost", "winner_points_after", "loser_points_after",
+    ])
+    # The rowid (match id) is the implicit last column of every index, so a
+    # player's matches come out of these in (timestamp, id) order
+    cursor.execute("CREATE INDEX idx_matches_guild_winner ON matches (guild_id, season, winner_id, timestamp)")
+    cursor.execute("CREATE INDEX idx_matches_guild_loser ON matches (guild_id, season, loser_id, timestamp)")
+
+
+def _migrate_character_tracking(cursor):
+    """Adds the characters played in each match and per-season win/loss counters for them."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS match_characters (
+            guild_id INTEGER NOT NULL,
+            match_id INTEGER NOT NULL,
+            won INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            character TEXT NOT NULL,
+            PRIMARY KEY (guild_id, match_id, won, slot)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS character_stats (
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            character TEXT NOT NULL,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, season, character)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS player_character_stats (
+            guild_id INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            discord_id INTEGER NOT NULL,
+            character TEXT NOT NULL,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, season, discord_id, character)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migrate_ladders(cursor):
+    """Adds named ladders with their channel bindings, and per-ladder scoring settings."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ladders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            name TEXT NOT NULL COLLATE NOCASE,
+            UNIQUE (guild_id, name)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ladder_channels (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            ladder_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, channel_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN win_score INTEGER NOT NULL DEFAULT 5")
+    cursor.execute("ALTER TABLE guild_settings ADD COLUMN rank_points TEXT NOT NULL DEFAULT '25,50,100'")
+
+
+def _migrate_match_export_index(cursor):
+    """Lets `!fb export` stream a guild's matches in (season, id) order instead of sorting them all first."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_guild_season_id ON matches (guild_id, season, id)")
+
+
+MIGRATIONS = [
+    _migrate_guild_scope,
+    _migrate_inactivity_decay,
+    _migrate_points_after,
+    _migrate_tournaments,
+    _migrate_match_approver,
+    _migrate_live_leaderboards,
+    _migrate_integer_snowflakes,
+    _migrate_epoch_timestamps,
+    _migrate_character_tracking,
+    _migrate_ladders,
+    _migrate_match_export_index,
+]
+
+def migrate_database(db_path=DB_PATH, target=None):
+    """Applies any schema migrations the database has not seen yet (up to migration `target`, default all)."""
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    cursor = conn.cursor()
+    try:
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:target], start=version + 1):
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+                cursor.execute("COMMIT")
+            except sqlite3.Error:
+                cursor.execute("ROLLBACK")
+                raise
+            logger.info("Applied database migration %s: %s", number, migration.__doc__, extra={"migration": number})
+    finally:
+        conn.close()
@@ -0,0 +1,76 @@
+# db/maintenance.py
+#
+# Routine upkeep of the database file. Season resets rewrite every player row
+# and imports, decay and restores touch whole ladders, so the file keeps the
+# pages those writes free and the query planner's statistics go stale.
+#
+#   optimize   PRAGMA optimize after bulk changes, refreshing sqlite_stat1
+#   vacuum     one bounded PRAGMA incremental_vacuum step, during quiet hours
+#   integrity  PRAGMA integrity_check, weekly
+#
+# optimize and vacuum write, so they run on the writer's connection between
+# two write batches (LocalWriter.maintain). integrity only reads and runs on a
+# connection of its own. Every job returns a report with the pages freed and
+# the time spent.
+
+import os
+import time
+from db.database import open_database
+
+VACUUM_STEP_PAGES = int(os.getenv("FIGHTBACK_VACUUM_STEP_PAGES", "2000"))  # Bounds how long one step holds the write lock
+ANALYSIS_LIMIT = 1000  # Rows sampled per index by ANALYZE
+MAX_INTEGRITY_ERRORS = 20
+
+
+def optimize(conn):
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        # PRAGMA optimize only refreshes statistics that exist
+        conn.execute("ANALYZE")
+    else:
+        # 0x10002: consider every table, not only those queried on this connection
+        conn.execute("PRAGMA optimize = 0x10002")
+
+
+def incremental_vacuum(conn, pages=VACUUM_STEP_PAGES):
+    # Each step of the statement frees one page; cursor.execute() would only take
+    # the first, executescript() runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+
+
+def integrity_check(conn):
+    """Returns the problems found, or an empty list."""
+    rows = conn.execute(f"PRAGMA integrity_check({MAX_INTEGRITY_ERRORS})").fetchall()
+    return [row[0] for row in rows if row[0] != "ok"]
+
+
+JOBS = {"optimize": optimize, "vacuum": incremental_vacuum, "integrity": integrity_check}
+
+
+def run_job(conn, job):
+    """Runs a maintenance job on conn, outside any transaction. Blocking.
+
+    Returns {"job", "ms", "pages_freed", "page_count", "free_pages", "problems"}."""
+    if job not in JOBS:
+        raise ValueError(f"Unknown maintenance job: {job}")
+    started = time.perf_counter()
+    pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+    problems = JOBS[job](conn)
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    return {
+        "job": job,
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+        "pages_freed": max(pages_before - page_count, 0),
+        "page_count": page_count,
+        "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+        "problems": problems or [],
+    }
+
+
+def check_integrity():
+    """Runs the integrity job on a connection of its own. Blocking: run it in a worker thread."""
+    conn = open_database(timeout=10)
+    try:
+        return run_job(conn, "integrity")
+    finally:
+        conn.close()
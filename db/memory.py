@@ -0,0 +1,153 @@
+# db/memory.py
+#
+# In-memory database mode for small, busy servers run as a single process
+# (FIGHTBACK_IN_MEMORY=1). At startup data/fightback.db is copied into a
+# shared in-memory database that every connection of the process then uses,
+# so reads and writes never touch the disk or wait on file locks.
+#
+# The memory copy is written back to the database file with the backup API
+# on an interval, after every season reset and at shutdown. Between those
+# snapshots each committed write is appended to a journal and fsynced before
+# its caller is answered; at the next start the journal is replayed on top
+# of the last snapshot, so a crash loses no acknowledged write.
+#
+# Journal entries are numbered, and each snapshot records the number of the
+# last entry it contains (journal_checkpoint). Replay skips entries at or
+# below it, so a crash between writing a snapshot and emptying the journal
+# does not apply those writes twice.
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from db.database import DB_PATH, use_memory_database
+from db.writer import execute_batch
+
+logger = logging.getLogger(__name__)
+
+IN_MEMORY = os.getenv("FIGHTBACK_IN_MEMORY", "0") == "1"
+FLUSH_INTERVAL_MINUTES = float(os.getenv("FIGHTBACK_MEMORY_FLUSH_MINUTES", "5"))
+JOURNAL_PATH = "data/fightback-journal.jsonl"
+
+# memdb databases whose name starts with "/" are shared by every connection
+# of the process and use normal SQLite locking between them
+MEMORY_URI = "file:/fightback?vfs=memdb"
+
+# Operations whose journal entries, before `now` was journaled with the args,
+# carried the commit time only as the entry's `at`
+MATCH_OPS = {"record_match", "report_tournament_match"}
+
+
+class MemoryDatabase:
+    def __init__(self, db_path=DB_PATH, journal_path=JOURNAL_PATH, uri=MEMORY_URI):
+        self.db_path = db_path
+        self.journal_path = journal_path
+        self.uri = uri
+        self.conn = None      # Keeps the in-memory database alive for the life of the process
+        self.journal = None
+        self.seq = 0          # Number of the last journaled write
+
+    def load(self):
+        """Copies the database file into memory and replays the journal left by a crash. Call before the writer starts."""
+        started = time.monotonic()
+        # Used here, then only from the writer thread
+        self.conn = sqlite3.connect(self.uri, uri=True, isolation_level=None, check_same_thread=False)
+        disk = sqlite3.connect(self.db_path)
+        try:
+            # The file is only a snapshot target from now on. Leaving WAL mode keeps the
+            # WAL flag out of the copied header, which the memdb VFS cannot open.
+            disk.execute("PRAGMA journal_mode=DELETE")
+            disk.backup(self.conn)
+        finally:
+            disk.close()
+        use_memory_database(self.uri)
+
+        self.conn.execute("CREATE TABLE IF NOT EXISTS journal_checkpoint (seq INTEGER NOT NULL)")
+        row = self.conn.execute("SELECT seq FROM journal_checkpoint").fetchone()
+        if row is None:
+            self.conn.execute("INSERT INTO journal_checkpoint (seq) VALUES (0)")
+        self.seq = row[0] if row else 0
+
+        replayed = self.replay()
+        if replayed:
+            # Make the replayed writes durable and start a fresh journal
+            self.flush()
+        self.journal = open(self.journal_path, "a", encoding="utf-8")
+        logger.info(
+            "Database loaded into memory (%s journaled writes replayed)", replayed,
+            extra={"replayed": replayed, "duration_ms": round((time.monotonic() - started) * 1000, 2)}
+        )
+
+    def replay(self):
+        """Re-runs the journaled writes against the in-memory database. Returns how many were replayed."""
+        if not os.path.exists(self.journal_path):
+            return 0
+        entries = []
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # A write cut off by the crash; its caller was never answered
+        # Entries at or below the checkpoint are already in the snapshot
+        checkpoint = self.seq
+        entries = [entry for entry in entries if entry.get("seq", checkpoint + 1) > checkpoint]
+        self.seq = max([checkpoint] + [entry["seq"] for entry in entries if "seq" in entry])
+        if not entries:
+            return 0
+
+        # Journaled args carry the `now` the write first ran with (db/writes.py CLOCK_OPS).
+        # Entries from before that only stamped the journal line with `at`.
+        for entry in entries:
+            if entry["op"] in MATCH_OPS and "at" in entry:
+                entry["args"].setdefault("now", entry["at"])
+        outcomes = execute_batch(self.conn, [(entry["op"], entry["args"]) for entry in entries])
+        failed = sum(1 for _, _, error in outcomes if error)
+        if failed:
+            logger.error("%s journaled writes could not be replayed", failed, extra={"failed": failed})
+        return len(entries)
+
+    def append(self, writes):
+        """Journals a committed batch of (op, args, change). Runs on the writer thread."""
+        if not writes:
+            return
+        lines = []
+        for op, args, _ in writes:
+            self.seq += 1
+            lines.append(json.dumps({"seq": self.seq, "op": op, "args": args}) + "\n")
+        self.journal.write("".join(lines))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    def flush(self):
+        """Writes the in-memory database to the database file and empties the journal. Runs on the writer thread."""
+        started = time.monotonic()
+        partial = self.db_path + ".partial"
+        # Every write journaled so far is in the memory database, so it is in this snapshot
+        self.conn.execute("UPDATE journal_checkpoint SET seq = ?", (self.seq,))
+        target = sqlite3.connect(partial)
+        try:
+            self.conn.backup(target)
+        finally:
+            target.close()
+        with open(partial, "rb") as file:
+            os.fsync(file.fileno())
+        # WAL files of the old database file must not be applied to the new one
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        os.replace(partial, self.db_path)
+
+        if self.journal:
+            self.journal.truncate(0)
+            os.fsync(self.journal.fileno())
+        elif os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        logger.info("In-memory database flushed to disk", extra={"duration_ms": round((time.monotonic() - started) * 1000, 2)})
+
+    def close(self):
+        """Flushes one last time and releases the in-memory database."""
+        self.flush()
+        self.journal.close()
+        self.conn.close()
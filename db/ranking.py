@@ -0,0 +1,91 @@
+# db/ranking.py
+
+# Minimum points for each rank, highest first
+RANK_THRESHOLDS = [
+    (100, "🔱 Platinum"),
+    (50, "🥇 Gold"),
+    (25, "🥈 Silver"),
+    (0, "🥉 Bronze"),
+]
+
+def rank_thresholds(rank_points):
+    """Thresholds like RANK_THRESHOLDS from a ladder's `rank_points` setting, the
+    minimum points for Silver, Gold and Platinum (e.g. "25,50,100")."""
+    try:
+        minimums = [int(value) for value in str(rank_points).split(",")]
+    except ValueError:
+        raise ValueError("Rank points must be whole numbers") from None
+    if len(minimums) != len(RANK_THRESHOLDS) - 1 or not 0 < minimums[0] < minimums[1] < minimums[2]:
+        raise ValueError("Rank points need three increasing, positive minimums for Silver, Gold and Platinum")
+    names = [rank for _, rank in RANK_THRESHOLDS]
+    return list(zip(reversed(minimums), names)) + [(0, names[-1])]
+
+def calculate_rank(points, thresholds=RANK_THRESHOLDS):
+    for minimum, rank in thresholds:
+        if points >= minimum:
+            return rank
+    return thresholds[-1][1]
+
+def rank_case_sql(points_expression, thresholds=RANK_THRESHOLDS):
+    """SQL CASE expression computing the same rank as calculate_rank() from a points expression.
+
+    Lets set-based updates keep the rank column consistent with the points."""
+    branches = " ".join(
+        f"WHEN {points_expression} >= {int(minimum)} THEN '{rank}'" for minimum, rank in thresholds[:-1]
+    )
+    return f"CASE {branches} ELSE '{thresholds[-1][1]}' END"
+
+def get_rank_value(rank):
+    return {"🥉 Bronze": 1, "🥈 Silver": 2, "🥇 Gold": 3, "🔱 Platinum": 4}.get(rank, 1)
+
+def calculate_points(winner_rank, loser_rank):
+    """Returns (points gained by the winner, points lost by the loser) for a match between the two ranks."""
+    winner_rank_value = get_rank_value(winner_rank)
+    loser_rank_value = get_rank_value(loser_rank)
+    rank_difference = abs(winner_rank_value - loser_rank_value)
+
+    base_gain = 5
+    base_loss = 3
+
+    if winner_rank_value == loser_rank_value:
+        gain = base_gain
+        loss = base_loss
+    elif winner_rank_value > loser_rank_value:
+        gain = max(base_gain - rank_difference, 1)
+        loss = base_loss
+    else:
+        gain = base_gain + (rank_difference * 2)
+        loss = base_loss + (rank_difference * 2)
+
+    return gain, loss
+
+# Matches are first to MAX_SCORE unless the ladder sets its own win_score
+MAX_SCORE = 5
+
+def validate_score(winner_score, loser_score, win_score=MAX_SCORE):
+    """Returns None if the score is valid for a first-to-`win_score` match, otherwise (title, description) of the error."""
+    if winner_score != win_score or loser_score >= win_score:
+        return "❌ Invalid Score", f"The winner must have exactly {win_score} points, and the loser must have less."
+    if winner_score == loser_score:
+        return "❌ Invalid Match", "The score cannot be the same for both players."
+    if loser_score < 0:
+        return "❌ Invalid Score", "Scores cannot be negative."
+    return None
+
+def apply_matches(standings, matches, thresholds=RANK_THRESHOLDS):
+    """Applies matches in order to standings, a dict of player id -> [points, rank], in one pass.
+
+    standings is updated in place. Returns one (gain, loss, winner points after,
+    loser points after) per match, with gain and loss computed from the ranks
+    the players had right before that match."""
+    deltas = []
+    for match in matches:
+        winner = standings[match["winner_id"]]
+        loser = standings[match["loser_id"]]
+        gain, loss = calculate_points(winner[1], loser[1])
+        winner[0] += gain
+        loser[0] = max(loser[0] - loss, 0)
+        winner[1] = calculate_rank(winner[0], thresholds)
+        loser[1] = calculate_rank(loser[0], thresholds)
+        deltas.append((gain, loss, winner[0], loser[0]))
+    return deltas
@@ -0,0 +1,268 @@
+# db/tournament.py
+#
+# Bracket engine for single elimination, double elimination and Swiss
+# tournaments. A bracket is a list of slots (one per match) stored in
+# tournament_slots. Elimination brackets are built once when the tournament
+# starts, with every slot linked to the slots its winner and loser move on
+# to; reporting a result only fills those downstream slots. Swiss rounds are
+# paired one at a time from the results so far.
+
+import collections
+import math
+
+FORMATS = ("single", "double", "swiss")
+MIN_ENTRANTS = {"single": 2, "double": 3, "swiss": 2}
+BYE = 0  # Seed of the empty side of a slot; a slot against a bye resolves on its own
+
+SLOT_COLUMNS = (
+    "slot", "bracket", "round", "player1", "player2", "winner", "match_id",
+    "winner_to", "winner_side", "loser_to", "loser_side",
+)
+BRACKET_NAMES = {"W": "Winners", "L": "Losers", "F": "Grand Final", "S": "Swiss"}
+
+
+class Slot:
+    __slots__ = SLOT_COLUMNS
+
+    def __init__(self, slot, bracket, round, player1=None, player2=None, winner=None, match_id=None,
+                 winner_to=None, winner_side=None, loser_to=None, loser_side=None):
+        self.slot = slot
+        self.bracket = bracket
+        self.round = round
+        self.player1 = player1  # Seed, BYE, or None while the player is not known yet
+        self.player2 = player2
+        self.winner = winner
+        self.match_id = match_id
+        self.winner_to = winner_to
+        self.winner_side = winner_side
+        self.loser_to = loser_to
+        self.loser_side = loser_side
+
+    def row(self):
+        return tuple(getattr(self, column) for column in SLOT_COLUMNS)
+
+    @property
+    def playable(self):
+        """Both players are known and the result is not."""
+        return self.winner is None and bool(self.player1) and bool(self.player2)
+
+
+def bracket_order(size):
+    """Seeds in bracket position order for a power-of-two size, so seeds 1 and 2 can only meet in the final.
+
+    bracket_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]"""
+    order = [1]
+    while len(order) < size:
+        order = [seed for top in order for seed in (top, 2 * len(order) + 1 - top)]
+    return order
+
+
+def swiss_rounds(count):
+    """Rounds needed for a single undefeated player to remain."""
+    return max(1, math.ceil(math.log2(count)))
+
+
+class Bracket:
+    def __init__(self, format, slots, entrants, rounds=None):
+        self.format = format
+        self.entrants = entrants
+        self.rounds = rounds
+        self.slots = {slot.slot: slot for slot in slots}
+        self.changed = set()  # Slots to write back
+        self.created = []     # Slots that do not exist in the database yet
+
+    @classmethod
+    def create(cls, format, entrants, rounds=None):
+        """Builds the bracket for seeds 1..entrants and resolves its byes."""
+        bracket = cls(format, [], entrants, rounds)
+        if format == "swiss":
+            bracket.rounds = rounds or swiss_rounds(entrants)
+            bracket.pair_swiss_round()
+            return bracket
+
+        winners = bracket._build_tree("W")
+        if format == "double":
+            losers = bracket._build_losers(winners)
+            final = bracket._new_slot("F", 1)
+            reset = bracket._new_slot("F", 2)
+            winners[-1][0].winner_to, winners[-1][0].winner_side = final.slot, 1
+            losers[-1][0].winner_to, losers[-1][0].winner_side = final.slot, 2
+            final.winner_to = reset.slot
+        for slot in list(bracket.slots.values()):
+            bracket._settle(slot)
+        return bracket
+
+    # --- Building ---
+
+    def _new_slot(self, bracket, round, player1=None, player2=None):
+        slot = Slot(len(self.slots) + 1, bracket, round, player1, player2)
+        self.slots[slot.slot] = slot
+        self.created.append(slot)
+        return slot
+
+    def _build_tree(self, bracket):
+        """Creates the winners bracket and links each slot to the next round. Returns the slots per round."""
+        size = 1 << max(1, (self.entrants - 1).bit_length())
+        order = [seed if seed <= self.entrants else BYE for seed in bracket_order(size)]
+        rounds = [[self._new_slot(bracket, 1, order[index], order[index + 1]) for index in range(0, size, 2)]]
+        while len(rounds[-1]) > 1:
+            previous = rounds[-1]
+            current = [self._new_slot(bracket, len(rounds) + 1) for _ in range(len(previous) // 2)]
+            for index, slot in enumerate(previous):
+                slot.winner_to, slot.winner_side = current[index // 2].slot, index % 2 + 1
+            rounds.append(current)
+        return rounds
+
+    def _build_losers(self, winners):
+        """Creates the losers bracket: losers of winners round 1 play each other, then every
+        pair of rounds takes in the losers of the next winners round and halves the field."""
+        first = [self._new_slot("L", 1) for _ in range(len(winners[0]) // 2)]
+        for index, slot in enumerate(winners[0]):
+            slot.loser_to, slot.loser_side = first[index // 2].slot, index % 2 + 1
+        rounds = [first]
+        for number in range(1, len(winners)):
+            previous = rounds[-1]
+            drop = [self._new_slot("L", 2 * number) for _ in range(len(previous))]
+            for index, slot in enumerate(previous):
+                slot.winner_to, slot.winner_side = drop[index].slot, 1
+            # Alternate the order losers drop in, so early rematches are avoided
+            for index, slot in enumerate(winners[number]):
+                target = drop[len(drop) - 1 - index] if number % 2 else drop[index]
+                slot.loser_to, slot.loser_side = target.slot, 2
+            rounds.append(drop)
+            if len(drop) > 1:
+                merge = [self._new_slot("L", 2 * number + 1) for _ in range(len(drop) // 2)]
+                for index, slot in enumerate(drop):
+                    slot.winner_to, slot.winner_side = merge[index // 2].slot, index % 2 + 1
+                rounds.append(merge)
+        return rounds
+
+    # --- Results ---
+
+    def report(self, slot_id, winner, match_id=None):
+        """Records the winner of a playable slot and moves both players on."""
+        slot = self.slots[slot_id]
+        if not slot.playable or winner not in (slot.player1, slot.player2):
+            raise ValueError(f"Slot {slot_id} cannot be won by seed {winner}")
+        slot.match_id = match_id
+        self._finish(slot, winner)
+        if self.format == "swiss" and self.round_complete() and self.current_round() < self.rounds:
+            self.pair_swiss_round()
+
+    def _finish(self, slot, winner):
+        slot.winner = winner
+        self.changed.add(slot.slot)
+        loser = slot.player2 if winner == slot.player1 else slot.player1
+        if slot.bracket == "F" and slot.round == 1:
+            # The losers bracket champion has to beat the unbeaten player twice
+            if winner == slot.player2 and winner != BYE:
+                reset = self.slots[slot.winner_to]
+                reset.player1, reset.player2 = slot.player1, slot.player2
+                self.changed.add(reset.slot)
+            return
+        if slot.winner_to:
+            self._place(slot.winner_to, slot.winner_side, winner)
+        if slot.loser_to:
+            self._place(slot.loser_to, slot.loser_side, loser)
+
+    def _place(self, slot_id, side, seed):
+        slot = self.slots[slot_id]
+        setattr(slot, f"player{side}", seed)
+        self.changed.add(slot_id)
+        self._settle(slot)
+
+    def _settle(self, slot):
+        """Resolves a slot whose players are known and one of them is a bye."""
+        if slot.winner is not None or slot.player1 is None or slot.player2 is None:
+            return
+        if slot.player1 != BYE and slot.player2 != BYE:
+            return
+        self._finish(slot, slot.player1 or slot.player2)
+
+    # --- Swiss ---
+
+    def current_round(self):
+        return max((slot.round for slot in self.slots.values()), default=0)
+
+    def round_complete(self):
+        current = self.current_round()
+        return all(slot.winner is not None for slot in self.slots.values() if slot.round == current)
+
+    def wins(self):
+        """Seed -> matches won, byes included."""
+        return collections.Counter(slot.winner for slot in self.slots.values() if slot.winner)
+
+    def pair_swiss_round(self):
+        """Pairs the next Swiss round: players with the same record meet, avoiding rematches where possible."""
+        number = self.current_round() + 1
+        wins = self.wins()
+        played = {frozenset((slot.player1, slot.player2)) for slot in self.slots.values()}
+        had_bye = {slot.player1 for slot in self.slots.values() if slot.player2 == BYE}
+
+        order = sorted(range(1, self.entrants + 1), key=lambda seed: (-wins[seed], seed))
+        bye = None
+        if len(order) % 2:
+            # The lowest-placed player who has not had a bye yet sits out
+            bye = next((seed for seed in reversed(order) if seed not in had_bye), order[-1])
+            order.remove(bye)
+
+        pairs = []
+        if number == 1:
+            half = len(order) // 2
+            pairs = list(zip(order[:half], order[half:]))
+        else:
+            remaining = collections.deque(order)
+            while remaining:
+                first = remaining.popleft()
+                index = next(
+                    (index for index, seed in enumerate(remaining) if frozenset((first, seed)) not in played), 0
+                )
+                opponent = remaining[index]
+                del remaining[index]
+                pairs.append((first, opponent))
+
+        for player1, player2 in pairs:
+            self._new_slot("S", number, player1, player2)
+        if bye is not None:
+            self._settle(self._new_slot("S", number, bye, BYE))
+
+    # --- Queries ---
+
+    def find_open(self, seed_a, seed_b):
+        """Returns the playable slot between two seeds, if there is one."""
+        for slot in self.slots.values():
+            if slot.playable and {slot.player1, slot.player2} == {seed_a, seed_b}:
+                return slot
+        return None
+
+    def open_slots(self):
+        return [slot for slot in self.slots.values() if slot.playable]
+
+    def champion(self):
+        """Winning seed, or None while the tournament is still running."""
+        if self.format == "swiss":
+            if self.current_round() < self.rounds or not self.round_complete():
+                return None
+            return self.standings()[0][0]
+        last = self.slots[len(self.slots)]
+        if self.format == "double":
+            final = self.slots[last.slot - 1]
+            if final.winner is not None and final.winner == final.player1:
+                return final.winner
+        return last.winner
+
+    def standings(self):
+        """Swiss standings as (seed, wins), best first; ties go to the better seed."""
+        wins = self.wins()
+        return sorted(((seed, wins[seed]) for seed in range(1, self.entrants + 1)), key=lambda item: (-item[1], item[0]))
+
+
+def load_bracket(cursor, tournament_id, format, rounds):
+    """Loads a tournament's bracket and its seed -> discord id map."""
+    cursor.execute("SELECT seed, discord_id FROM tournament_entrants WHERE tournament_id = ?", (tournament_id,))
+    seeds = dict(cursor.fetchall())
+    cursor.execute(
+        f"SELECT {', '.join(SLOT_COLUMNS)} FROM tournament_slots WHERE tournament_id = ? ORDER BY slot",
+        (tournament_id,)
+    )
+    return Bracket(format, [Slot(*row) for row in cursor.fetchall()], len(seeds), rounds), seeds
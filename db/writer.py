@@ -0,0 +1,456 @@
+# db/writer.py
+#
+# Single writer for the database. Cogs call `await submit_write(op, **args)`
+# with an operation name from db/writes.py. In a single-process deployment the
+# operations run on a LocalWriter; when the bot is split over several worker
+# processes, one `fightback.py writer` process owns the database and the
+# workers talk to it over a Unix socket through a RemoteWriter.
+#
+# Protocol: newline-delimited JSON.
+#   request      {"id": 1, "op": "record_match", "args": {...}}
+#                {"id": 2, "metrics": true}
+#                {"id": 3, "maintenance": "vacuum"}
+#   response     {"id": 1, "result": ...} or {"id": 1, "error": "..."}
+#   notification {"change": {"op": "record_match", "guild_id": ..., ...}}
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from db.database import DB_PATH, open_database
+from db.maintenance import run_job
+from db.writes import WRITE_OPS, stamp_clock
+from utils.logs import add_timing
+
+logger = logging.getLogger(__name__)
+
+SOCKET_PATH = os.getenv("FIGHTBACK_WRITER_SOCKET", "data/writer.sock")
+
+
+class WriteError(Exception):
+    """A write operation failed (raised in the process that submitted it)."""
+
+
+# --- Change notifications ---
+
+_change_listeners = []
+
+def add_change_listener(callback):
+    """Registers callback(change) to run in this process after every committed write."""
+    _change_listeners.append(callback)
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def dispatch_change(change):
+    # A change spanning several ladders (a guild restore) lists their scope ids
+    # in "ladders"; listeners see it once per scope
+    scoped = [change] + [dict(change, guild_id=ladder_id) for ladder_id in change.get("ladders", ())]
+    for callback in list(_change_listeners):
+        for change in scoped:
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("Error in change listener %r", callback, extra={"change_op": change.get("op")})
+
+
+# --- Writers ---
+
+# Group commit: the writer task waits up to BATCH_WINDOW seconds for more
+# requests after the first one and commits up to MAX_BATCH of them in one
+# transaction. Submitters wait (back-pressure) once MAX_QUEUE are queued.
+BATCH_WINDOW = float(os.getenv("FIGHTBACK_WRITE_BATCH_WINDOW_MS", "5")) / 1000
+MAX_BATCH = 64
+MAX_QUEUE = 1024
+
+
+def execute_batch(conn, batch):
+    """Runs a batch of (op, args) in one transaction, each inside its own savepoint.
+
+    A failing operation only rolls back its own savepoint; the rest of the
+    batch still commits. Clock-reading operations get their `now` set in
+    `args`, so whoever journals the batch records it. Returns one
+    (result, change, error) per operation."""
+    cursor = conn.cursor()
+    outcomes = []
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for op, args in batch:
+            cursor.execute("SAVEPOINT write_op")
+            try:
+                if op not in WRITE_OPS:
+                    raise WriteError(f"Unknown write operation: {op}")
+                stamp_clock(op, args)
+                result, change = WRITE_OPS[op](cursor, **args)
+                cursor.execute("RELEASE write_op")
+                outcomes.append((result, change, None))
+            except (sqlite3.Error, ValueError, TypeError, WriteError) as e:
+                cursor.execute("ROLLBACK TO write_op")
+                cursor.execute("RELEASE write_op")
+                outcomes.append((None, None, e if isinstance(e, WriteError) else WriteError(str(e))))
+            except Exception as e:
+                # A bug in the operation (e.g. a KeyError on malformed args) fails only that write
+                logger.exception("Write operation %s failed", op, extra={"write_op": op})
+                cursor.execute("ROLLBACK TO write_op")
+                cursor.execute("RELEASE write_op")
+                outcomes.append((None, None, WriteError(f"{type(e).__name__}: {e}")))
+        cursor.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    return outcomes
+
+
+class WriterMetrics:
+    """Counters describing the write queue, used to spot back-pressure."""
+
+    def __init__(self):
+        self.writes = 0
+        self.failed_writes = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.blocked_submits = 0  # Submitters that had to wait for room in the queue
+        self.total_latency = 0.0  # Seconds from submit to commit, summed over writes
+        self.max_latency = 0.0
+        self.total_commit_time = 0.0
+
+    def snapshot(self):
+        return {
+            "writes": self.writes,
+            "failed_writes": self.failed_writes,
+            "batches": self.batches,
+            "avg_batch_size": round(self.writes / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "blocked_submits": self.blocked_submits,
+            "avg_latency_ms": round(self.total_latency / self.writes * 1000, 2) if self.writes else 0,
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+            "avg_commit_ms": round(self.total_commit_time / self.batches * 1000, 2) if self.batches else 0,
+        }
+
+
+class LocalWriter:
+    """Queues write operations and group-commits them on one connection owned by a dedicated thread."""
+
+    def __init__(self, db_path=DB_PATH, on_change=dispatch_change,
+                 batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, max_queue=MAX_QUEUE, memory=None):
+        self.on_change = on_change
+        self.memory = memory  # MemoryDatabase journaling and flushing the in-memory database, if any
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.metrics = WriterMetrics()
+        self.queue = None
+        self.task = None
+        # One thread keeps the blocking sqlite calls off the event loop and
+        # serialises every write on the same connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fightback-writer")
+        self.conn = self.executor.submit(self._connect, db_path).result()
+
+    def _connect(self, db_path):
+        # Transactions are managed explicitly by execute_batch
+        conn = open_database(db_path, timeout=10, isolation_level=None)
+        if not self.memory:
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _execute(self, ops):
+        outcomes = execute_batch(self.conn, ops)
+        if self.memory:
+            # Journaled before anyone is told the write succeeded, so no acknowledged write is lost on a crash
+            self.memory.append([
+                (op, args, change) for (op, args), (_, change, error) in zip(ops, outcomes) if error is None
+            ])
+        return outcomes
+
+    def _rollback(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    async def submit(self, op, **args):
+        if self.task is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self.task = asyncio.create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        if self.queue.full():
+            self.metrics.blocked_submits += 1
+        await self.queue.put((op, args, future, time.monotonic()))
+        self.metrics.queue_depth = self.queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+        return await future
+
+    async def next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        self.metrics.queue_depth = self.queue.qsize()
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.next_batch()
+            started = time.monotonic()
+            try:
+                outcomes = await loop.run_in_executor(
+                    self.executor, self._execute, [(op, args) for op, args, _, _ in batch]
+                )
+            except (sqlite3.Error, OSError) as e:
+                # The whole transaction failed (e.g. the database stayed locked)
+                logger.error("Write batch failed: %s", e, extra={"batch_size": len(batch)})
+                outcomes = [(None, None, WriteError(str(e)))] * len(batch)
+            except Exception as e:
+                # Anything else must not end the writer task: every later submit would wait forever
+                logger.exception("Write batch failed", extra={"batch_size": len(batch)})
+                await loop.run_in_executor(self.executor, self._rollback)
+                outcomes = [(None, None, WriteError(f"{type(e).__name__}: {e}"))] * len(batch)
+            committed = time.monotonic()
+            logger.debug("Committed write batch", extra={"batch_size": len(batch), "commit_ms": round((committed - started) * 1000, 2)})
+
+            self.metrics.batches += 1
+            self.metrics.largest_batch = max(self.metrics.largest_batch, len(batch))
+            self.metrics.total_commit_time += committed - started
+            for (_, _, future, submitted), (result, change, error) in zip(batch, outcomes):
+                self.metrics.writes += 1
+                latency = committed - submitted
+                self.metrics.total_latency += latency
+                self.metrics.max_latency = max(self.metrics.max_latency, latency)
+                if error:
+                    self.metrics.failed_writes += 1
+                    if not future.done():
+                        future.set_exception(error)
+                    continue
+                if change:
+                    self.on_change(change)
+                if not future.done():
+                    future.set_result(result)
+
+    async def get_metrics(self):
+        return self.metrics.snapshot()
+
+    async def maintain(self, job):
+        """Runs a db/maintenance.py job on the writer's connection between two batches. Returns its report."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run_job, self.conn, job)
+
+    async def flush(self):
+        """Writes the in-memory database to disk between two batches. Does nothing for an on-disk database."""
+        if self.memory:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.memory.flush)
+
+    async def close(self):
+        if self.task:
+            # Let queued writes commit before stopping the writer task
+            while not self.queue.empty():
+                await asyncio.sleep(self.batch_window or 0.001)
+            self.task.cancel()
+        loop = asyncio.get_running_loop()
+        if self.memory:
+            await loop.run_in_executor(self.executor, self.memory.close)
+        await loop.run_in_executor(self.executor, self.conn.close)
+        self.executor.shutdown(wait=True)
+
+
+class WriterServer:
+    """Writer service: executes requests from worker processes and broadcasts their changes."""
+
+    def __init__(self, socket_path=SOCKET_PATH, db_path=DB_PATH):
+        self.socket_path = socket_path
+        self.writer = LocalWriter(db_path, on_change=self.broadcast)
+        self.clients = set()
+        self.requests = set()
+        self.server = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left behind by a previous run
+        self.server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        logger.info("Writer service listening on %s", self.socket_path)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                # Requests from one client are handled concurrently; the
+                # LocalWriter still runs them one at a time
+                task = asyncio.create_task(self.handle_request(writer, request))
+                self.requests.add(task)
+                task.add_done_callback(self.requests.discard)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning("Writer client disconnected: %s", e)
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def handle_request(self, writer, request):
+        """Answers one request. Every request gets a response, even a malformed one, so no caller waits forever."""
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if request.get("metrics"):
+                result = await self.writer.get_metrics()
+            elif request.get("maintenance"):
+                result = await self.writer.maintain(request["maintenance"])
+            else:
+                result = await self.writer.submit(request["op"], **request.get("args", {}))
+            self.send(writer, {"id": request_id, "result": result})
+        except (WriteError, sqlite3.Error, ValueError) as e:
+            self.send(writer, {"id": request_id, "error": str(e)})
+        except Exception as e:
+            # A malformed request, a result that is not JSON, a socket error...
+            logger.exception("Writer request failed", extra={"request_id": request_id})
+            self.send(writer, {"id": request_id, "error": f"{type(e).__name__}: {e}"})
+
+    def broadcast(self, change):
+        for client in list(self.clients):
+            self.send(client, {"change": change})
+
+    def send(self, writer, message):
+        if writer.is_closing():
+            return
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.writer.close()
+
+
+# A request the writer service has not answered by then fails instead of
+# leaving its command waiting; the write itself may still commit
+REQUEST_TIMEOUT = float(os.getenv("FIGHTBACK_WRITER_TIMEOUT_SECONDS", "60"))
+
+
+class RemoteWriter:
+    """Client for the writer service. Changes it broadcasts are dispatched to this process's listeners."""
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.socket_path = socket_path
+        self.reader = None
+        self.writer = None
+        self.pending = {}
+        self.next_id = 0
+        self.listen_task = None
+
+    async def connect(self, attempts=50, delay=0.2):
+        for _ in range(attempts):
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(delay)  # Writer service is still starting
+        else:
+            raise WriteError(f"Writer service not reachable at {self.socket_path}")
+        self.listen_task = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        try:
+            while line := await self.reader.readline():
+                message = json.loads(line)
+                if "change" in message:
+                    dispatch_change(message["change"])
+                    continue
+                future = self.pending.pop(message["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(WriteError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(WriteError("Lost connection to the writer service"))
+            self.pending.clear()
+
+    async def request(self, message):
+        if self.writer is None or self.writer.is_closing():
+            raise WriteError("Not connected to the writer service")
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        request_id = self.next_id
+        self.writer.write(json.dumps({"id": request_id, **message}).encode() + b"\n")
+        await self.writer.drain()
+        try:
+            return await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.pending.pop(request_id, None)
+            raise WriteError(f"The writer service did not answer within {REQUEST_TIMEOUT:g} seconds")
+
+    async def submit(self, op, **args):
+        return await self.request({"op": op, "args": args})
+
+    async def get_metrics(self):
+        """Write-queue metrics of the writer service."""
+        return await self.request({"metrics": True})
+
+    async def maintain(self, job):
+        """Runs a maintenance job in the writer service."""
+        return await self.request({"maintenance": job})
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+        if self.listen_task:
+            self.listen_task.cancel()
+
+
+# --- Module-level writer used by the cogs ---
+
+_writer = None
+
+def configure_writer(writer):
+    global _writer
+    _writer = writer
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = LocalWriter()
+    return _writer
+
+async def submit_write(op, **args):
+    """Runs a write operation from db/writes.py through the configured writer and returns its result."""
+    started = time.perf_counter()
+    try:
+        return await get_writer().submit(op, **args)
+    finally:
+        add_timing("write_ms", time.perf_counter() - started)
+
+async def flush_database():
+    """Writes the in-memory database to disk now; a no-op unless this process serves it from memory."""
+    writer = get_writer()
+    if isinstance(writer, LocalWriter):
+        await writer.flush()
+
+async def run_maintenance(job):
+    """Runs a db/maintenance.py job ("optimize" or "vacuum") on the process that owns writes. Returns its report."""
+    return await get_writer().maintain(job)
+
+async def get_write_metrics():
+    """Back-pressure metrics of the write queue (from the writer service in multi-process mode)."""
+    return await get_writer().get_metrics()
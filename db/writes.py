@@ -0,0 +1,543 @@
+# db/writes.py
+#
+# Every write to the database goes through one of these operations. They run
+# inside a transaction opened by the writer (db/writer.py) and return
+# (result, change): the result goes back to the caller and the change, if any,
+# is broadcast to every bot process so it can invalidate its caches.
+
+import datetime
+import sqlite3
+from db.database import get_current_season, snowflake, GUILD_SETTINGS_DEFAULTS
+from db.ranking import apply_matches, rank_case_sql, rank_thresholds
+from db.backup import copy_guild_rows
+from db.characters import record_characters, rebuild_character_stats
+from db.tournament import Bracket, SLOT_COLUMNS, MIN_ENTRANTS, load_bracket
+from utils.timestamps import now_ms
+
+
+def utc_now():
+    """The current UTC time as stored in the DATETIME columns."""
+    return datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _rank_thresholds(cursor, guild_id):
+    """The ladder's rank thresholds, read inside the write transaction."""
+    cursor.execute("SELECT rank_points FROM guild_settings WHERE guild_id = ?", (guild_id,))
+    row = cursor.fetchone()
+    return rank_thresholds(row[0] if row else GUILD_SETTINGS_DEFAULTS["rank_points"])
+
+
+def register_player(cursor, guild_id, discord_id, username):
+    """Registers a player. Returns False if they are already registered."""
+    discord_id = snowflake(discord_id)
+    try:
+        cursor.execute(
+            "INSERT INTO players (guild_id, discord_id, username) VALUES (?, ?, ?)",
+            (guild_id, discord_id, username)
+        )
+    except sqlite3.IntegrityError:
+        return False, None
+    return True, {"op": "register_player", "guild_id": guild_id, "players": [discord_id]}
+
+
+def rename_player(cursor, guild_id, discord_id, username):
+    """Changes a player's name. Returns False if they are not registered."""
+    discord_id = snowflake(discord_id)
+    cursor.execute(
+        "UPDATE players SET username = ? WHERE guild_id = ? AND discord_id = ?",
+        (username, guild_id, discord_id)
+    )
+    if cursor.rowcount == 0:
+        return False, None
+    return True, {"op": "rename_player", "guild_id": guild_id, "players": [discord_id]}
+
+
+def delete_player(cursor, guild_id, discord_id):
+    """Deletes a player's registration (not their match history)."""
+    discord_id = snowflake(discord_id)
+    cursor.execute("DELETE FROM players WHERE guild_id = ? AND discord_id = ?", (guild_id, discord_id))
+    if cursor.rowcount == 0:
+        return False, None
+    return True, {"op": "delete_player", "guild_id": guild_id, "players": [discord_id]}
+
+
+def record_match(cursor, guild_id, winner_id, loser_id, winner_score, loser_score, approved_by=None, winner_team=None, loser_team=None,
+                 now=None):
+    """Applies the rank-based point changes and stores an approved match.
+
+    Points are read inside the write transaction, so two matches committed
+    back to back always build on each other. The optional teams are lists of
+    character names (see db/characters.py). `now` is the match time in epoch
+    milliseconds. Returns None if either player is not registered."""
+    now = now or now_ms()
+    winner_id, loser_id, approved_by = snowflake(winner_id), snowflake(loser_id), snowflake(approved_by)
+    cursor.execute("SELECT points, rank FROM players WHERE guild_id = ? AND discord_id = ?", (guild_id, winner_id))
+    winner_data = cursor.fetchone()
+    cursor.execute("SELECT points, rank FROM players WHERE guild_id = ? AND discord_id = ?", (guild_id, loser_id))
+    loser_data = cursor.fetchone()
+    if not winner_data or not loser_data:
+        return None, None
+
+    standings = {winner_id: list(winner_data), loser_id: list(loser_data)}
+    [(gain, loss, _, _)] = apply_matches(
+        standings, [{"winner_id": winner_id, "loser_id": loser_id}], _rank_thresholds(cursor, guild_id)
+    )
+    new_winner_points, new_winner_rank = standings[winner_id]
+    new_loser_points, new_loser_rank = standings[loser_id]
+
+    cursor.execute("UPDATE players SET points = ?, rank = ?, last_played = datetime(? / 1000, 'unixepoch') WHERE guild_id = ? AND discord_id = ?", (new_winner_points, new_winner_rank, now, guild_id, winner_id))
+    cursor.execute("UPDATE players SET points = ?, rank = ?, last_played = datetime(? / 1000, 'unixepoch') WHERE guild_id = ? AND discord_id = ?", (new_loser_points, new_loser_rank, now, guild_id, loser_id))
+
+    season = get_current_season(cursor, guild_id, cached=False)
+    cursor.execute("""
+        INSERT INTO matches (guild_id, season, winner_id, loser_id, winner_score, loser_score, timestamp, approved, approved_by,
+                             winner_points_gained, loser_points_lost, winner_points_after, loser_points_after)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+    """, (guild_id, season, winner_id, loser_id, winner_score, loser_score, now, approved_by, gain, loss, new_winner_points, new_loser_points))
+
+    result = {
+        "match_id": cursor.lastrowid,
+        "gain": gain,
+        "loss": loss,
+        "winner_points": new_winner_points,
+        "winner_rank": new_winner_rank,
+        "loser_points": new_loser_points,
+        "loser_rank": new_loser_rank,
+    }
+    record_characters(cursor, guild_id, season, result["match_id"], winner_id, loser_id, winner_team, loser_team)
+    change = {
+        "op": "record_match", "guild_id": guild_id, "players": [winner_id, loser_id],
+        "match_id": result["match_id"], "approved_by": approved_by,
+    }
+    return result, change
+
+
+def reset_season(cursor, guild_id, now=None):
+    """Starts a new season for one guild: closes the current season and resets its players to 0 points and Bronze rank.
+
+    Matches are kept and stay tagged with the season they were played in.
+    Returns the new season number."""
+    season = get_current_season(cursor, guild_id, cached=False)
+    now = now or utc_now()
+
+    # The first season has no row until it ends; date it from its first match
+    cursor.execute("""
+        INSERT OR IGNORE INTO seasons (guild_id, season, started_at)
+        SELECT ?, ?, COALESCE(datetime(MIN(timestamp) / 1000, 'unixepoch'), ?) FROM matches WHERE guild_id = ? AND season = ?
+    """, (guild_id, season, now, guild_id, season))
+    cursor.execute(
+        "UPDATE seasons SET ended_at = ? WHERE guild_id = ? AND season = ?",
+        (now, guild_id, season)
+    )
+    cursor.execute(
+        "INSERT INTO seasons (guild_id, season, started_at) VALUES (?, ?, ?)",
+        (guild_id, season + 1, now)
+    )
+
+    # Reset leaderboard: all players of this guild start at 0 points and Bronze rank
+    cursor.execute("UPDATE players SET points = 0, rank = 'Bronze' WHERE guild_id = ?", (guild_id,))
+    return season + 1, {"op": "reset_season", "guild_id": guild_id, "season": season + 1}
+
+
+def update_guild_settings(cursor, guild_id, **fields):
+    """Creates or updates the guild's (or ladder's) settings row with the given fields. Returns the new settings.
+
+    New rank points re-rank the ladder's players in the same transaction."""
+    unknown = set(fields) - set(GUILD_SETTINGS_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown guild settings: {', '.join(sorted(unknown))}")
+    if "win_score" in fields and not 1 <= fields["win_score"] <= 99:
+        raise ValueError("The win score must be between 1 and 99")
+
+    columns = ", ".join(GUILD_SETTINGS_DEFAULTS)
+    cursor.execute(f"SELECT {columns} FROM guild_settings WHERE guild_id = ?", (guild_id,))
+    row = cursor.fetchone()
+    settings = dict(zip(GUILD_SETTINGS_DEFAULTS, row)) if row else dict(GUILD_SETTINGS_DEFAULTS)
+    settings.update(fields)
+
+    cursor.execute(f"""
+        INSERT INTO guild_settings (guild_id, {columns})
+        VALUES (?, {", ".join("?" for _ in settings)})
+        ON CONFLICT(guild_id) DO UPDATE SET {", ".join(f"{column} = excluded.{column}" for column in settings)}
+    """, (guild_id, *settings.values()))
+    if "rank_points" in fields:
+        cursor.execute(
+            f"UPDATE players SET rank = {rank_case_sql('points', rank_thresholds(fields['rank_points']))} WHERE guild_id = ?",
+            (guild_id,)
+        )
+        return settings, {"op": "update_guild_settings", "guild_id": guild_id, "ranks": True}
+    return settings, {"op": "update_guild_settings", "guild_id": guild_id}
+
+
+def import_matches(cursor, guild_id, matches, now=None):
+    """Stores a batch of already validated results in chronological order.
+
+    Point changes are applied in a single pass over the batch, the matches are
+    inserted with one executemany, and each player's final points are written
+    once. Returns the new match ids and every affected player's standing."""
+    matches = [
+        dict(match, winner_id=snowflake(match["winner_id"]), loser_id=snowflake(match["loser_id"])) for match in matches
+    ]
+    player_ids = sorted({match[key] for match in matches for key in ("winner_id", "loser_id")})
+    placeholders = ", ".join("?" for _ in player_ids)
+    cursor.execute(
+        f"SELECT discord_id, points, rank FROM players WHERE guild_id = ? AND discord_id IN ({placeholders})",
+        (guild_id, *player_ids)
+    )
+    standings = {discord_id: [points, rank] for discord_id, points, rank in cursor.fetchall()}
+    missing = [player_id for player_id in player_ids if player_id not in standings]
+    if missing:
+        raise ValueError(f"Players not registered: {', '.join(map(str, missing))}")
+    before = {player_id: standing[0] for player_id, standing in standings.items()}
+
+    deltas = apply_matches(standings, matches, _rank_thresholds(cursor, guild_id))
+    season = get_current_season(cursor, guild_id, cached=False)
+    now = now or now_ms()  # For matches without a time of their own
+    last_played = {}
+    for match in matches:
+        for key in ("winner_id", "loser_id"):
+            last_played[match[key]] = max(last_played.get(match[key], 0), match.get("timestamp") or now)
+    cursor.executemany("""
+        INSERT INTO matches (guild_id, season, winner_id, loser_id, winner_score, loser_score, timestamp, approved,
+                             winner_points_gained, loser_points_lost, winner_points_after, loser_points_after)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+    """, [
+        (guild_id, season, match["winner_id"], match["loser_id"], match["winner_score"], match["loser_score"],
+         match.get("timestamp") or now, gain, loss, winner_after, loser_after)
+        for match, (gain, loss, winner_after, loser_after) in zip(matches, deltas)
+    ])
+    cursor.executemany(
+        "UPDATE players SET points = ?, rank = ?, last_played = MAX(COALESCE(last_played, ''), datetime(? / 1000, 'unixepoch')) "
+        "WHERE guild_id = ? AND discord_id = ?",
+        [(points, rank, last_played[player_id], guild_id, player_id) for player_id, (points, rank) in standings.items()]
+    )
+
+    # One writer inserts the whole batch, so its AUTOINCREMENT ids are consecutive
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'matches'")
+    last_id = cursor.fetchone()[0]
+    first_id = last_id - len(matches) + 1
+
+    result = {
+        "first_match_id": first_id,
+        "last_match_id": last_id,
+        "players": {player_id: [before[player_id], *standings[player_id]] for player_id in player_ids},
+    }
+    change = {"op": "import_matches", "guild_id": guild_id, "players": player_ids, "match_ids": [first_id, last_id]}
+    return result, change
+
+
+def apply_decay(cursor, guild_id, now=None):
+    """Applies one week of the guild's inactivity decay with set-based statements.
+
+    Every player idle for longer than decay_idle_days loses decay_points
+    (never below 0). Each change is recorded in decay_ledger and ranks are
+    recomputed in the same statement. Does nothing if decay is disabled or
+    already ran in the last 7 days. Returns the number of players decayed."""
+    now = now or utc_now()
+    cursor.execute("""
+        SELECT decay_points, decay_idle_days FROM guild_settings
+        WHERE guild_id = ? AND decay_points > 0
+          AND (last_decay_at IS NULL OR last_decay_at <= datetime(?, '-7 days'))
+    """, (guild_id, now))
+    policy = cursor.fetchone()
+    if not policy:
+        return 0, None
+    decay_points, idle_days = policy
+    params = {"guild_id": guild_id, "decay_points": decay_points, "now": now, "idle": f"-{int(idle_days)} days"}
+
+    # Both statements select players through idx_players_guild_last_played
+    cursor.execute("""
+        INSERT INTO decay_ledger (guild_id, discord_id, points_before, points_after, decayed_at)
+        SELECT guild_id, discord_id, points, MAX(points - :decay_points, 0), :now
+        FROM players
+        WHERE guild_id = :guild_id AND last_played < datetime(:now, :idle) AND points > 0
+    """, params)
+    decayed = cursor.rowcount
+    cursor.execute(f"""
+        UPDATE players
+        SET points = MAX(points - :decay_points, 0),
+            rank = {rank_case_sql("MAX(points - :decay_points, 0)", _rank_thresholds(cursor, guild_id))}
+        WHERE guild_id = :guild_id AND last_played < datetime(:now, :idle) AND points > 0
+    """, params)
+    cursor.execute("UPDATE guild_settings SET last_decay_at = ? WHERE guild_id = ?", (now, guild_id))
+
+    if not decayed:
+        return 0, None
+    return decayed, {"op": "apply_decay", "guild_id": guild_id}
+
+
+def _active_tournament(cursor, guild_id, status=None):
+    """Returns (id, name, format, status, rounds) of the guild's unfinished tournament, or None."""
+    cursor.execute(
+        "SELECT id, name, format, status, rounds FROM tournaments WHERE guild_id = ? AND status != 'finished'",
+        (guild_id,)
+    )
+    tournament = cursor.fetchone()
+    if tournament and status and tournament[3] != status:
+        return None
+    return tournament
+
+
+def _save_bracket(cursor, guild_id, tournament_id, bracket):
+    """Inserts the bracket's new slots and writes back only the slots that changed."""
+    created = {slot.slot for slot in bracket.created}
+    cursor.executemany(
+        f"INSERT INTO tournament_slots (guild_id, tournament_id, {', '.join(SLOT_COLUMNS)}) "
+        f"VALUES (?, ?, {', '.join('?' for _ in SLOT_COLUMNS)})",
+        [(guild_id, tournament_id, *slot.row()) for slot in bracket.created]
+    )
+    cursor.executemany(
+        "UPDATE tournament_slots SET player1 = ?, player2 = ?, winner = ?, match_id = ? WHERE tournament_id = ? AND slot = ?",
+        [
+            (slot.player1, slot.player2, slot.winner, slot.match_id, tournament_id, slot.slot)
+            for slot in map(bracket.slots.get, sorted(bracket.changed - created))
+        ]
+    )
+
+
+def create_tournament(cursor, guild_id, name, format, rounds=None, now=None):
+    """Opens signups for a tournament. Returns its id, or None if the guild already has one running."""
+    if _active_tournament(cursor, guild_id):
+        return None, None
+    cursor.execute(
+        "INSERT INTO tournaments (guild_id, name, format, rounds, created_at) VALUES (?, ?, ?, ?, ?)",
+        (guild_id, name, format, rounds, now or utc_now())
+    )
+    return cursor.lastrowid, {"op": "create_tournament", "guild_id": guild_id}
+
+
+def join_tournament(cursor, guild_id, discord_id, leave=False):
+    """Signs a registered player up for (or, with leave, out of) the tournament taking signups.
+
+    Returns "joined", "left", "closed", "not_registered", "already_joined" or "not_joined"."""
+    discord_id = snowflake(discord_id)
+    tournament = _active_tournament(cursor, guild_id, status="signup")
+    if not tournament:
+        return "closed", None
+    if leave:
+        cursor.execute(
+            "DELETE FROM tournament_entrants WHERE tournament_id = ? AND discord_id = ?",
+            (tournament[0], discord_id)
+        )
+        if cursor.rowcount == 0:
+            return "not_joined", None
+        return "left", {"op": "join_tournament", "guild_id": guild_id, "players": [discord_id]}
+
+    cursor.execute("SELECT 1 FROM players WHERE guild_id = ? AND discord_id = ?", (guild_id, discord_id))
+    if not cursor.fetchone():
+        return "not_registered", None
+    # Signup order is kept in the seed column until the tournament is seeded
+    try:
+        cursor.execute("""
+            INSERT INTO tournament_entrants (guild_id, tournament_id, seed, discord_id)
+            SELECT ?, ?, COALESCE(MAX(seed), 0) + 1, ? FROM tournament_entrants WHERE tournament_id = ?
+        """, (guild_id, tournament[0], discord_id, tournament[0]))
+    except sqlite3.IntegrityError:
+        return "already_joined", None
+    return "joined", {"op": "join_tournament", "guild_id": guild_id, "players": [discord_id]}
+
+
+def start_tournament(cursor, guild_id):
+    """Closes signups, seeds the entrants by ladder points and builds the bracket.
+
+    Returns a dict with the tournament and its first playable matches, or a
+    string explaining why it could not start."""
+    tournament = _active_tournament(cursor, guild_id, status="signup")
+    if not tournament:
+        return "closed", None
+    tournament_id, name, format, _, rounds = tournament
+
+    # Entrants who left the ladder since signing up drop out through the join
+    cursor.execute("""
+        SELECT e.discord_id FROM tournament_entrants e
+        JOIN players p ON p.guild_id = e.guild_id AND p.discord_id = e.discord_id
+        WHERE e.tournament_id = ?
+        ORDER BY p.points DESC, e.seed
+    """, (tournament_id,))
+    entrants = [row[0] for row in cursor.fetchall()]
+    if len(entrants) < MIN_ENTRANTS[format]:
+        return "too_few", None
+
+    cursor.execute("DELETE FROM tournament_entrants WHERE tournament_id = ?", (tournament_id,))
+    cursor.executemany(
+        "INSERT INTO tournament_entrants (guild_id, tournament_id, seed, discord_id) VALUES (?, ?, ?, ?)",
+        [(guild_id, tournament_id, seed, discord_id) for seed, discord_id in enumerate(entrants, start=1)]
+    )
+    bracket = Bracket.create(format, len(entrants), rounds)
+    _save_bracket(cursor, guild_id, tournament_id, bracket)
+    cursor.execute(
+        "UPDATE tournaments SET status = 'running', rounds = ? WHERE id = ?",
+        (bracket.rounds, tournament_id)
+    )
+
+    result = {
+        "tournament_id": tournament_id,
+        "name": name,
+        "format": format,
+        "entrants": len(entrants),
+        "open": [(entrants[slot.player1 - 1], entrants[slot.player2 - 1]) for slot in bracket.open_slots()],
+    }
+    return result, {"op": "start_tournament", "guild_id": guild_id}
+
+
+def report_tournament_match(cursor, guild_id, winner_id, loser_id, winner_score, loser_score, approved_by=None, now=None):
+    """Records a tournament match like record_match, in the same transaction, and advances the bracket.
+
+    Only the slots the result moves players into are updated. Returns None if
+    the two players have no open match in the guild's running tournament."""
+    winner_id, loser_id = snowflake(winner_id), snowflake(loser_id)
+    tournament = _active_tournament(cursor, guild_id, status="running")
+    if not tournament:
+        return None, None
+    tournament_id, name, format, _, rounds = tournament
+    bracket, seeds = load_bracket(cursor, tournament_id, format, rounds)
+    by_player = {discord_id: seed for seed, discord_id in seeds.items()}
+    slot = bracket.find_open(by_player.get(winner_id), by_player.get(loser_id))
+    if not slot:
+        return None, None
+
+    match, change = record_match(cursor, guild_id, winner_id, loser_id, winner_score, loser_score, approved_by, now=now)
+    if match is None:
+        return None, None
+    playable_before = {open_slot.slot for open_slot in bracket.open_slots()}
+    bracket.report(slot.slot, by_player[winner_id], match["match_id"])
+    _save_bracket(cursor, guild_id, tournament_id, bracket)
+
+    champion = bracket.champion()
+    if champion is not None:
+        cursor.execute(
+            "UPDATE tournaments SET status = 'finished', champion_id = ? WHERE id = ?",
+            (seeds[champion], tournament_id)
+        )
+
+    result = {
+        "match": match,
+        "name": name,
+        "bracket": slot.bracket,
+        "round": slot.round,
+        "open": [
+            (seeds[open_slot.player1], seeds[open_slot.player2])
+            for open_slot in bracket.open_slots() if open_slot.slot not in playable_before
+        ],
+        "champion": seeds[champion] if champion is not None else None,
+    }
+    change["op"] = "report_tournament_match"
+    return result, change
+
+
+def cancel_tournament(cursor, guild_id):
+    """Deletes the guild's unfinished tournament. Matches already recorded stay on the ladder.
+
+    Returns its name, or None if there is none."""
+    tournament = _active_tournament(cursor, guild_id)
+    if not tournament:
+        return None, None
+    for table, column in (("tournament_slots", "tournament_id"), ("tournament_entrants", "tournament_id"), ("tournaments", "id")):
+        cursor.execute(f"DELETE FROM {table} WHERE {column} = ?", (tournament[0],))
+    return tournament[1], {"op": "cancel_tournament", "guild_id": guild_id}
+
+
+def set_live_leaderboard(cursor, guild_id, channel_id, message_id):
+    """Makes message_id the channel's live leaderboard. Returns the id of the message it replaces, if any."""
+    cursor.execute(
+        "SELECT message_id FROM live_leaderboards WHERE guild_id = ? AND channel_id = ?",
+        (guild_id, channel_id)
+    )
+    previous = cursor.fetchone()
+    cursor.execute("""
+        INSERT INTO live_leaderboards (guild_id, channel_id, message_id) VALUES (?, ?, ?)
+        ON CONFLICT(guild_id, channel_id) DO UPDATE SET message_id = excluded.message_id
+    """, (guild_id, channel_id, message_id))
+    return previous[0] if previous else None, {"op": "set_live_leaderboard", "guild_id": guild_id}
+
+
+def remove_live_leaderboard(cursor, guild_id, channel_id):
+    """Stops updating the channel's live leaderboard. Returns its message id, or None if there was none."""
+    cursor.execute(
+        "SELECT message_id FROM live_leaderboards WHERE guild_id = ? AND channel_id = ?",
+        (guild_id, channel_id)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None, None
+    cursor.execute("DELETE FROM live_leaderboards WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+    return row[0], {"op": "remove_live_leaderboard", "guild_id": guild_id}
+
+
+def create_ladder(cursor, guild_id, name, win_score=None):
+    """Adds a named ladder to the guild, starting from a copy of the guild's settings.
+
+    Returns the ladder's id, or None if the guild already has a ladder with that name."""
+    try:
+        cursor.execute("INSERT INTO ladders (guild_id, name) VALUES (?, ?)", (guild_id, name))
+    except sqlite3.IntegrityError:
+        return None, None
+    ladder_id = cursor.lastrowid
+    columns = ", ".join(GUILD_SETTINGS_DEFAULTS)
+    cursor.execute(
+        f"INSERT INTO guild_settings (guild_id, {columns}) SELECT ?, {columns} FROM guild_settings WHERE guild_id = ?",
+        (ladder_id, guild_id)
+    )
+    if win_score is not None:
+        update_guild_settings(cursor, ladder_id, win_score=win_score)
+    return ladder_id, {"op": "create_ladder", "guild_id": guild_id, "ladder_id": ladder_id}
+
+
+def set_ladder_channel(cursor, guild_id, channel_id, ladder_id=None):
+    """Makes commands in the channel use a named ladder, or the guild's own ladder when ladder_id is None."""
+    if ladder_id is None:
+        cursor.execute("DELETE FROM ladder_channels WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+    else:
+        cursor.execute("""
+            INSERT INTO ladder_channels (guild_id, channel_id, ladder_id) VALUES (?, ?, ?)
+            ON CONFLICT (guild_id, channel_id) DO UPDATE SET ladder_id = excluded.ladder_id
+        """, (guild_id, channel_id, ladder_id))
+    return True, {"op": "set_ladder_channel", "guild_id": guild_id}
+
+
+def restore_snapshot(cursor, guild_id, snapshot):
+    """Replaces the guild's ladders with their state in a backup snapshot. Other guilds are untouched.
+
+    Named ladders created since the snapshot are emptied along with the guild's
+    own ladder. Returns the number of rows restored per table."""
+    cursor.execute("SELECT id FROM ladders WHERE guild_id = ?", (guild_id,))
+    ladder_ids = {row[0] for row in cursor.fetchall()}
+    restored = copy_guild_rows(cursor, snapshot, guild_id)
+    cursor.execute("SELECT id FROM ladders WHERE guild_id = ?", (guild_id,))
+    ladder_ids.update(row[0] for row in cursor.fetchall())
+    for scope_id in [guild_id, *sorted(ladder_ids)]:
+        if scope_id != guild_id:
+            for table, count in copy_guild_rows(cursor, snapshot, scope_id).items():
+                restored[table] = restored.get(table, 0) + count
+        # The character counters are derived from the restored matches
+        rebuild_character_stats(cursor, scope_id)
+    return restored, {"op": "restore_snapshot", "guild_id": guild_id, "ladders": sorted(ladder_ids)}
+
+
+WRITE_OPS = {
+    op.__name__: op
+    for op in (
+        register_player, rename_player, delete_player, record_match, import_matches,
+        reset_season, update_guild_settings, apply_decay, restore_snapshot, create_ladder, set_ladder_channel,
+        create_tournament, join_tournament, start_tournament, report_tournament_match, cancel_tournament,
+        set_live_leaderboard, remove_live_leaderboard,
+    )
+}
+
+# Operations that read the clock take the time as `now`. The writer fills it in
+# before running them (see stamp_clock), so a journaled write replays exactly
+# as it first committed.
+CLOCK_OPS = {
+    "record_match": now_ms,
+    "report_tournament_match": now_ms,
+    "import_matches": now_ms,
+    "reset_season": utc_now,
+    "apply_decay": utc_now,
+    "create_tournament": utc_now,
+}
+
+
+def stamp_clock(op, args):
+    """Sets `now` in the args of a clock-reading operation that was not given one."""
+    if op in CLOCK_OPS and args.get("now") is None:
+        args["now"] = CLOCK_OPS[op]()
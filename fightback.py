@@ -1,9 +1,22 @@
 import discord
 from discord.ext import commands
 import os
+import sys
+import signal
+import argparse
 import asyncio
+import logging
+import subprocess
+import time
 from dotenv import load_dotenv
-from db.database import setup_database
+from db.database import setup_database, invalidate_cached
+from db.memory import MemoryDatabase, IN_MEMORY
+from db.writer import (
+    LocalWriter, RemoteWriter, WriterServer, SOCKET_PATH, add_change_listener, configure_writer
+)
+from utils.logs import setup_logging, start_command_timings
+
+logger = logging.getLogger("fightback")
 
 # Load environment variables
 load_dotenv()
@@ -15,13 +28,6 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!fb ', intents=intents)
-
-@bot.event
-async def on_ready():
-    print(f'✅ FightBack Bot is online as {bot.user}')
-    setup_database()
-
 # Load cogs asynchronously with console logs
 initial_extensions = [
     'cogs.register',
@@ -31,22 +37,178 @@ initial_extensions = [
     'cogs.stats',
     'cogs.leaderboard',
     'cogs.history',
-    'cogs.myhistory',
     'cogs.steamlink',
     'cogs.reset',
-    'cogs.leave'
+    'cogs.leave',
+    'cogs.admin',
+    'cogs.export',
+    'cogs.bulkimport',
+    'cogs.backup',
+    'cogs.graph',
+    'cogs.characters',
+    'cogs.matchmaking',
+    'cogs.tournament',
+    'cogs.farming',
+    'cogs.liveboard',
+    'cogs.ladders',
+    'cogs.maintenance',
+    'cogs.api'
 ]
 
-async def main():
-    async with bot:
-        for extension in initial_extensions:
-            try:
-                await bot.load_extension(extension)
-                print(f'✅ Loaded cog: {extension}')
-            except Exception as e:
-                print(f'❌ Failed to load cog: {extension} - Error: {e}')
-        
-        print("🚀 All cogs loaded successfully. Bot is starting...")
-        await bot.start(TOKEN)
-
-asyncio.run(main())
\ No newline at end of file
+def create_bot(shard_ids=None, shard_count=None):
+    """Creates the bot. Without shard arguments, discord.py picks the shard count and runs every shard here."""
+    bot = commands.AutoShardedBot(
+        command_prefix='!fb ', intents=intents, shard_ids=shard_ids, shard_count=shard_count
+    )
+
+    # Every ladder belongs to a server, so commands are not available in DMs
+    bot.add_check(commands.guild_only().predicate)
+
+    @bot.event
+    async def on_ready():
+        logger.info("FightBack Bot is online as %s (shards: %s)", bot.user, sorted(bot.shards))
+
+    # Every command is logged once with its latency and the time it spent on the database
+    @bot.before_invoke
+    async def start_command_timer(ctx):
+        ctx.started_at = time.perf_counter()
+        ctx.timings = start_command_timings()
+
+    def log_command(ctx, status, error=None):
+        name = ctx.command.qualified_name if ctx.command else ctx.invoked_with
+        started_at = getattr(ctx, "started_at", None)
+        timings = getattr(ctx, "timings", {})
+        logger.info(
+            "Command %s %s", name, status,
+            exc_info=error if isinstance(error, commands.CommandInvokeError) else None,
+            extra={
+                "command": name,
+                "status": status,
+                "error": type(error).__name__ if error else None,
+                "guild": ctx.guild.id if ctx.guild else None,
+                "user": ctx.author.id,
+                "latency_ms": round((time.perf_counter() - started_at) * 1000, 2) if started_at else None,
+                "db_ms": round(timings.get("db_ms", 0), 2),
+                "write_ms": round(timings.get("write_ms", 0), 2),
+            }
+        )
+
+    @bot.event
+    async def on_command_completion(ctx):
+        log_command(ctx, "completed")
+
+    @bot.event
+    async def on_command_error(ctx, error):
+        # Replaces discord.py's default handler, which printed these to stderr
+        if not isinstance(error, commands.CommandNotFound):
+            log_command(ctx, "failed", error)
+
+    # Writes made by any process reach every process: drop stale cache entries
+    # and let cogs react through `on_ladder_change` listeners
+    add_change_listener(invalidate_cached)
+    add_change_listener(lambda change: bot.dispatch("ladder_change", change))
+    return bot
+
+async def run_bot(writer, shard_ids=None, shard_count=None):
+    configure_writer(writer)
+    bot = create_bot(shard_ids, shard_count)
+    try:
+        async with bot:
+            for extension in initial_extensions:
+                try:
+                    await bot.load_extension(extension)
+                    logger.info("Loaded cog: %s", extension)
+                except Exception:
+                    logger.exception("Failed to load cog: %s", extension)
+
+            logger.info("All cogs loaded. Bot is starting...")
+            await bot.start(TOKEN)
+    finally:
+        await writer.close()
+
+async def run_single():
+    """One process: every shard, writes on a local writer thread."""
+    setup_database()
+    memory = None
+    if IN_MEMORY:
+        memory = MemoryDatabase()
+        memory.load()
+    await run_bot(LocalWriter(memory=memory))
+
+async def run_writer(socket_path):
+    """Writer service: owns the database and serves writes to the workers."""
+    setup_database()
+    server = WriterServer(socket_path)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+async def run_worker(socket_path, shard_ids, shard_count):
+    """Worker: runs a subset of the shards and sends every write to the writer service."""
+    writer = RemoteWriter(socket_path)
+    await writer.connect()
+    await run_bot(writer, shard_ids, shard_count)
+
+def run_cluster(workers, shard_count, socket_path):
+    """Starts a writer service and `workers` worker processes on this machine, splitting the shards between them."""
+    shard_count = shard_count or workers
+    script = os.path.abspath(__file__)
+    processes = [subprocess.Popen([sys.executable, script, "writer", "--socket", socket_path])]
+    for worker in range(workers):
+        shard_ids = [str(shard) for shard in range(worker, shard_count, workers)]
+        if not shard_ids:
+            continue
+        processes.append(subprocess.Popen([
+            sys.executable, script, "worker", "--socket", socket_path,
+            "--shard-count", str(shard_count), "--shard-ids", *shard_ids
+        ]))
+    logger.info("Cluster started: 1 writer and %s workers for %s shards", len(processes) - 1, shard_count)
+
+    def stop(signum, frame):
+        for process in processes:
+            process.terminate()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # If any process dies, take the whole cluster down so a supervisor can restart it
+    while all(process.poll() is None for process in processes):
+        try:
+            processes[0].wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+    stop(None, None)
+    for process in processes:
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="FightBack Discord bot")
+    parser.add_argument("mode", nargs="?", default="single", choices=["single", "writer", "worker", "cluster"])
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket of the writer service")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards across all workers")
+    parser.add_argument("--shard-ids", type=int, nargs="+", help="Shards run by this worker")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes started by cluster mode")
+    args = parser.parse_args()
+
+    if IN_MEMORY and args.mode != "single":
+        parser.error("FIGHTBACK_IN_MEMORY=1 is only supported in single mode: workers read the database file directly")
+
+    # Each process writes its own log file
+    if args.mode == "worker" and args.shard_ids:
+        setup_logging(f"worker-{'-'.join(map(str, args.shard_ids))}")
+    else:
+        setup_logging(args.mode)
+
+    if args.mode == "single":
+        asyncio.run(run_single())
+    elif args.mode == "writer":
+        asyncio.run(run_writer(args.socket))
+    elif args.mode == "worker":
+        if not args.shard_ids or not args.shard_count:
+            parser.error("worker mode needs --shard-ids and --shard-count")
+        asyncio.run(run_worker(args.socket, args.shard_ids, args.shard_count))
+    else:
+        run_cluster(args.workers, args.shard_count, args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+import pytest
+import cogs.match
+import db.database
+import db.writer
+import utils.approval
+from cogs.match import MatchCog
+from db.database import setup_database
+from db.writer import LocalWriter, submit_write
+from utils.outbox import Outbox
+
+GUILD_ID = 1001
+CHANNEL_ID = 2001
+
+_ids = itertools.count(1)
+
+
+class FakeMember:
+    def __init__(self, member_id):
+        self.id = member_id
+        self.mention = f"<@{member_id}>"
+
+
+class FakeMessage:
+    def __init__(self, channel, **kwargs):
+        self.id = next(_ids)
+        self.channel = channel
+        self.kwargs = kwargs
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+        self.kwargs.update(kwargs)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, channel_id=CHANNEL_ID):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, **kwargs):
+        message = FakeMessage(self, **kwargs)
+        self.sent.append(message)
+        return message
+
+
+class FakeGuild:
+    id = GUILD_ID
+
+
+class FakeContext:
+    def __init__(self, author, channel):
+        self.author = author
+        self.channel = channel
+        self.guild = FakeGuild()
+
+
+class FakeBot:
+    """Answers the approval prompt with `reply` from the player it is waiting on."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.members = {}
+
+    def get_user(self, user_id):
+        return self.members.setdefault(user_id, FakeMember(user_id))
+
+    async def wait_for(self, event, timeout=None, check=None):
+        for member in self.members.values():
+            message = FakeMessage(self.channel, content=self.reply)
+            message.author = member
+            message.content = self.reply
+            if check(message):
+                return message
+        raise asyncio.TimeoutError
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    outbox = Outbox()
+    monkeypatch.setattr(cogs.match, "outbox", outbox)
+    monkeypatch.setattr(utils.approval, "outbox", outbox)
+    return outbox
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh database in tmp_path, with the per-process caches of db/database.py emptied for the test."""
+    monkeypatch.chdir(tmp_path)
+    for cache in ("_season_cache", "_guild_settings_cache", "_ladders_cache"):
+        monkeypatch.setattr(db.database, cache, {})
+    monkeypatch.setattr(db.database, "_ladder_guilds", None)
+    setup_database()
+
+
+@pytest.fixture
+def writer(database, monkeypatch):
+    """A LocalWriter on the fresh database, installed for submit_write. The previous writer is put back afterwards."""
+    writer = LocalWriter()
+    monkeypatch.setattr(db.writer, "_writer", writer)
+    return writer
+
+
+async def play_match(writer, reply):
+    # Closed inside the event loop its writer task runs on
+    try:
+        winner, loser = FakeMember(11), FakeMember(12)
+        for player in (winner, loser):
+            await submit_write("register_player", guild_id=GUILD_ID, discord_id=player.id, username=f"p{player.id}")
+
+        channel = FakeChannel()
+        bot = FakeBot(reply)
+        bot.channel = channel
+        bot.members[loser.id] = loser
+        cog = MatchCog(bot)
+        await MatchCog.match.callback(cog, FakeContext(winner, channel), winner, loser, 5, 3)
+        return channel
+    finally:
+        await writer.close()
+
+
+def test_approved_match_takes_two_api_calls(outbox, writer):
+    channel = asyncio.run(play_match(writer, "approve"))
+
+    # The approval prompt, then one edit of it into the result
+    assert outbox.api_calls == 2
+    assert len(channel.sent) == 1
+    prompt = channel.sent[0]
+    assert len(prompt.edits) == 1
+    assert prompt.kwargs["embed"].title == "🏅 Match Recorded"
+
+
+def test_cancelled_match_edits_the_prompt(outbox, writer):
+    channel = asyncio.run(play_match(writer, "cancel"))
+
+    assert outbox.api_calls == 2
+    assert channel.sent[0].kwargs["embed"].title == "❌ Match Cancelled"
+
+
+def test_pending_edits_of_a_message_are_coalesced(outbox):
+    async def edit_three_times():
+        message = FakeMessage(FakeChannel())
+        futures = [
+            outbox.edit(message, content="first"),
+            outbox.edit(message, content="second"),
+            outbox.edit(message, embed="final"),
+        ]
+        results = await asyncio.gather(*futures)
+        return message, results
+
+    message, results = asyncio.run(edit_three_times())
+
+    assert outbox.api_calls == 1
+    assert outbox.coalesced_edits == 2
+    assert message.edits == [{"content": "second", "embed": "final"}]
+    assert results == [message, message, message]
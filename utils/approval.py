@@ -0,0 +1,58 @@
+# utils/approval.py
+#
+# The approval prompt every reported result goes through: the opponent of the
+# player who submitted it has 60 seconds to type `approve` or `cancel`.
+
+import asyncio
+import discord
+from utils.outbox import outbox, PRIORITY_HIGH
+
+
+def format_team(team):
+    """Suffix for a player line: ` — Painwheel / Valentine`, or nothing without a team."""
+    return f" — {' / '.join(team)}" if team else ""
+
+
+async def request_approval(bot, ctx, winner, loser, winner_score, loser_score, title="⚔️ Match Approval Required",
+                           winner_team=None, loser_team=None):
+    """Asks the submitter's opponent to approve a result.
+
+    Returns (prompt, approval message). The prompt is then edited through the
+    result's states instead of sending a new message for each one. On timeout
+    or cancel the prompt is already updated and the message is None."""
+    expected_responder = loser.id if ctx.author.id == winner.id else winner.id
+    embed = discord.Embed(
+        title=title,
+        description=(
+            f"{bot.get_user(expected_responder).mention}, do you approve this match submitted by {ctx.author.mention}?\n"
+            f"🏆 **Winner:** {winner.mention} ({winner_score}){format_team(winner_team)}\n"
+            f"💔 **Loser:** {loser.mention} ({loser_score}){format_team(loser_team)}\n\n"
+            "**Type `approve` or `cancel` within 60 seconds.**"
+        ),
+        color=discord.Color.blue()
+    )
+    prompt = await outbox.send(ctx.channel, priority=PRIORITY_HIGH, embed=embed)
+
+    def check(m):
+        return m.author.id == expected_responder and m.channel == ctx.channel and m.content.lower() in ["approve", "cancel"]
+
+    try:
+        msg = await bot.wait_for("message", timeout=60.0, check=check)
+    except asyncio.TimeoutError:
+        embed = discord.Embed(
+            title="⌛ Timeout",
+            description="Match approval timed out.",
+            color=discord.Color.red()
+        )
+        await outbox.edit(prompt, embed=embed)
+        return prompt, None
+
+    if msg.content.lower() == "cancel":
+        embed = discord.Embed(
+            title="❌ Match Cancelled",
+            description="The match was not recorded.",
+            color=discord.Color.red()
+        )
+        await outbox.edit(prompt, embed=embed)
+        return prompt, None
+    return prompt, msg
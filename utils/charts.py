@@ -0,0 +1,44 @@
+# utils/charts.py
+#
+# Rating charts rendered with matplotlib. Rendering is CPU-bound, so the bot
+# calls render_rating_chart in a worker process; it only takes and returns
+# plain data so it can be pickled across the process boundary.
+
+import io
+import re
+from db.ranking import RANK_THRESHOLDS
+
+
+def render_rating_chart(title, points, thresholds=RANK_THRESHOLDS):
+    """Renders a player's points after each match as a PNG and returns its bytes.
+
+    points is the list of points after every match, oldest first; the chart
+    starts from the 0 points every season starts with. thresholds are the
+    ladder's rank thresholds, drawn as bands."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    values = [0, *points]
+    figure, axes = pyplot.subplots(figsize=(8, 4), dpi=100)
+    try:
+        axes.plot(range(len(values)), values, color="#5865F2", linewidth=2, marker="o" if len(values) <= 40 else None)
+        top = max(values)
+        for minimum, rank in thresholds[:-1]:
+            if minimum <= top * 1.25:
+                # Rank names carry emoji the default font cannot draw
+                label = re.sub(r"[^\w ]", "", rank).strip()
+                axes.axhline(minimum, color="#99AAB5", linestyle="--", linewidth=1)
+                axes.annotate(label, (0, minimum), xytext=(2, 2), textcoords="offset points", fontsize=8, color="#99AAB5")
+        axes.set_title(title)
+        axes.set_xlabel("Matches played")
+        axes.set_ylabel("Points")
+        axes.set_ylim(bottom=0)
+        axes.grid(axis="y", alpha=0.3)
+        figure.tight_layout()
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        pyplot.close(figure)
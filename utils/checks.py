@@ -0,0 +1,13 @@
+# The bot owner can always run admin commands, in every guild
+OWNER_ID = 215296697704644608
+
+def is_ladder_admin(member):
+    """Returns True for the bot owner or a member who can manage the guild."""
+    if member.id == OWNER_ID:
+        return True
+    permissions = getattr(member, "guild_permissions", None)
+    return bool(permissions and permissions.manage_guild)
+
+def runs_global_tasks(bot):
+    """Jobs that touch the whole database (backups, maintenance) run in one process only: the one with shard 0."""
+    return bot.shard_ids is None or 0 in bot.shard_ids
@@ -0,0 +1,112 @@
+# utils/farming.py
+#
+# Win-farming detection. Every committed match is fed to a FarmingDetector,
+# which keeps sliding-window counters per player pair and per approver and
+# returns the patterns the match completes. Each match costs O(1) amortized:
+# it appends to a couple of deques and drops the entries that fell out of
+# the window. The same detector replays past seasons for the batch scan.
+
+import collections
+
+WINDOW = 24 * 3600              # Seconds a match counts towards the pair and approver windows
+PAIR_LIMIT = 10                 # Matches between the same two players within the window
+ALTERNATION_RUN = 6             # Consecutive matches of a pair whose winner flips every time
+APPROVER_LIMIT = 15             # Matches one player approved within the window
+RESET_BURST_WINDOW = 6 * 3600   # Seconds after a season reset watched for bursts
+RESET_BURST_LIMIT = 5           # Matches between the same two players in that time
+MAX_TRACKED = 50000             # Pair/approver windows kept before idle ones are dropped
+
+RULES = {
+    "repeated_pair": "🔁 Repeated pairing",
+    "alternating_wins": "🔀 Alternating wins",
+    "approver_volume": "🖊️ Approval volume",
+    "reset_burst": "⏱️ Burst after reset",
+}
+
+
+class _PairWindow:
+    __slots__ = ("times", "last_winner", "alternations", "season_start", "since_reset")
+
+    def __init__(self):
+        self.times = collections.deque()
+        self.last_winner = None
+        self.alternations = 0
+        self.season_start = None
+        self.since_reset = 0
+
+
+class FarmingDetector:
+    def __init__(self):
+        self.pairs = {}           # (guild id, player, player) -> _PairWindow, players sorted
+        self.approvers = {}       # (guild id, approver) -> deque of match times
+        self.season_starts = {}   # guild id -> time its current season started
+        self.flagged = {}         # (guild id, rule, subject) -> time it was last flagged
+        self.pruned_at = 0
+
+    def season_started(self, guild_id, timestamp):
+        self.season_starts[guild_id] = timestamp
+
+    def observe(self, guild_id, winner_id, loser_id, approved_by, timestamp):
+        """Counts one committed match. Returns the flags it raised as (rule, subject, count) tuples,
+        where subject is the pair of players or the approver."""
+        flags = []
+        subject = tuple(sorted((winner_id, loser_id)))
+        pair = self.pairs.get((guild_id,) + subject)
+        if pair is None:
+            self._prune(timestamp)
+            pair = self.pairs[(guild_id,) + subject] = _PairWindow()
+
+        times = pair.times
+        while times and timestamp - times[0] > WINDOW:
+            times.popleft()
+        if not times:
+            pair.alternations = 0
+        times.append(timestamp)
+        pair.alternations = pair.alternations + 1 if pair.last_winner not in (None, winner_id) else 1
+        pair.last_winner = winner_id
+
+        if len(times) >= PAIR_LIMIT:
+            flags.append(("repeated_pair", subject, len(times)))
+        if pair.alternations >= ALTERNATION_RUN:
+            flags.append(("alternating_wins", subject, pair.alternations))
+
+        season_start = self.season_starts.get(guild_id)
+        if season_start is not None and 0 <= timestamp - season_start <= RESET_BURST_WINDOW:
+            if pair.season_start != season_start:
+                pair.season_start, pair.since_reset = season_start, 0
+            pair.since_reset += 1
+            if pair.since_reset >= RESET_BURST_LIMIT:
+                flags.append(("reset_burst", subject, pair.since_reset))
+
+        if approved_by:
+            approvals = self.approvers.setdefault((guild_id, approved_by), collections.deque())
+            while approvals and timestamp - approvals[0] > WINDOW:
+                approvals.popleft()
+            approvals.append(timestamp)
+            if len(approvals) >= APPROVER_LIMIT:
+                flags.append(("approver_volume", (approved_by,), len(approvals)))
+
+        return [flag for flag in flags if self._first_in_window(guild_id, flag, timestamp)]
+
+    def _first_in_window(self, guild_id, flag, timestamp):
+        """Each pattern is reported once per window, not on every match that extends it."""
+        key = (guild_id, flag[0], flag[1])
+        last = self.flagged.get(key)
+        if last is not None and timestamp - last <= WINDOW:
+            return False
+        self.flagged[key] = timestamp
+        return True
+
+    def _prune(self, timestamp):
+        """Drops windows with no match in the last WINDOW seconds once too many are tracked."""
+        if len(self.pairs) + len(self.approvers) < MAX_TRACKED or timestamp - self.pruned_at < WINDOW / 24:
+            return
+        self.pruned_at = timestamp
+        for table in (self.pairs, self.approvers):
+            for key, value in list(table.items()):
+                times = value.times if isinstance(value, _PairWindow) else value
+                if not times or timestamp - times[-1] > WINDOW:
+                    del table[key]
+        for key, last in list(self.flagged.items()):
+            if timestamp - last > WINDOW:
+                del self.flagged[key]
@@ -0,0 +1,33 @@
+# utils/ladders.py
+#
+# Which ladder a command acts on. `!fb on <ladder> <command>` names one
+# explicitly; otherwise a channel bound with `!fb ladder channel` uses its
+# ladder, and every other channel uses the guild's own ("main") ladder. The
+# result is the scope id cogs pass wherever they used to pass the guild id.
+
+from db.database import get_ladders
+
+MAIN_LADDER = "main"
+
+
+def ladder_scope(ctx):
+    """Scope id of the ladder the command in `ctx` acts on."""
+    scope = getattr(ctx, "ladder_id", None)
+    if scope is not None:
+        return scope
+    return get_ladders(ctx.guild.id)["channels"].get(ctx.channel.id, ctx.guild.id)
+
+
+def find_ladder(guild_id, name):
+    """Scope id of the guild's ladder called `name` (case-insensitive), or None."""
+    if name.lower() == MAIN_LADDER:
+        return guild_id
+    for ladder_id, ladder_name in get_ladders(guild_id)["ladders"].items():
+        if ladder_name.lower() == name.lower():
+            return ladder_id
+    return None
+
+
+def ladder_name(guild_id, scope):
+    """Display name of a ladder scope."""
+    return get_ladders(guild_id)["ladders"].get(scope, MAIN_LADDER)
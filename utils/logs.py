@@ -0,0 +1,104 @@
+# utils/logs.py
+#
+# Logging for every bot process. Loggers only put records on a queue; a
+# QueueListener thread formats them and does the file and console I/O, so the
+# event loop never waits on a write. Log files hold one JSON object per line,
+# including any `extra=` fields (command, guild, user, latency_ms, db_ms, ...)
+# so they can be loaded straight into analysis tools.
+#
+# Levels are set per logger name, e.g.
+#   FIGHTBACK_LOG_LEVELS="db=DEBUG,cogs.match=DEBUG,discord=INFO"
+
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_DIR = os.getenv("FIGHTBACK_LOG_DIR", "data/logs")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+DEFAULT_LEVELS = {"discord": "WARNING", "discord.ext.commands": "INFO"}
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.processName,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(value):
+    """Parses "name=LEVEL,name=LEVEL" into a dict."""
+    levels = dict(DEFAULT_LEVELS)
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(process_name, level=logging.INFO):
+    """Routes every logger of this process through a queue to data/logs/<process_name>.log and the console."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(LOG_DIR, f"{process_name}.log"), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    for name, name_level in parse_levels(os.getenv("FIGHTBACK_LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(name_level)
+
+    global _listener
+    stop_logging()
+    _listener = logging.handlers.QueueListener(records, file_handler, console_handler)
+    _listener.start()
+
+
+def stop_logging():
+    """Writes out every queued record and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+
+# --- Per-command timings ---
+# A command's DB and writer time are added to the dict in this context
+# variable, which is set when the command starts.
+
+_command_timings = contextvars.ContextVar("command_timings", default=None)
+
+def start_command_timings():
+    timings = {"db_ms": 0.0, "write_ms": 0.0}
+    _command_timings.set(timings)
+    return timings
+
+def add_timing(kind, seconds):
+    """Adds seconds spent in the database ("db_ms") or waiting on the writer ("write_ms") to the running command."""
+    timings = _command_timings.get()
+    if timings is not None:
+        timings[kind] += seconds * 1000
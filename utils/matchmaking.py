@@ -0,0 +1,118 @@
+# utils/matchmaking.py
+#
+# In-memory matchmaking queue of one guild. Waiting players are kept in a list
+# sorted by points, so the closest-rated opponent of a player is always one of
+# their two neighbours and is found with a binary search. A player's search
+# window starts narrow and widens the longer they wait.
+
+import bisect
+import itertools
+
+MATCH_WINDOW_BASE = 10       # Points apart two players may be as soon as they queue
+MATCH_WINDOW_GROWTH = 10     # Extra points of tolerance per minute waited
+QUEUE_TIMEOUT = 30 * 60      # Seconds before a waiting player is dropped from the queue
+
+
+class QueuedPlayer:
+    __slots__ = ("discord_id", "points", "sequence", "joined_at", "channel_id")
+
+    def __init__(self, discord_id, points, sequence, joined_at, channel_id):
+        self.discord_id = discord_id
+        self.points = points
+        self.sequence = sequence
+        self.joined_at = joined_at
+        self.channel_id = channel_id
+
+    @property
+    def key(self):
+        return (self.points, self.sequence)
+
+    def window(self, now):
+        """Largest point difference this player currently accepts."""
+        return MATCH_WINDOW_BASE + MATCH_WINDOW_GROWTH * (now - self.joined_at) / 60
+
+
+class MatchQueue:
+    def __init__(self):
+        self.keys = []     # Sorted (points, sequence) of every waiting player
+        self.waiting = []  # QueuedPlayer at the same index as its key
+        self.players = {}  # discord id -> QueuedPlayer
+        self.sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.waiting)
+
+    def __contains__(self, discord_id):
+        return discord_id in self.players
+
+    def add(self, discord_id, points, channel_id, now):
+        """Queues a player, or pairs them right away with the closest-rated waiting player in range.
+
+        Returns the opponent's QueuedPlayer and the new player's, or None if the player now waits."""
+        player = QueuedPlayer(discord_id, points, next(self.sequence), now, channel_id)
+        index = bisect.bisect_left(self.keys, player.key)
+
+        best = None
+        for neighbour_index in (index - 1, index):
+            if 0 <= neighbour_index < len(self.waiting):
+                neighbour = self.waiting[neighbour_index]
+                difference = abs(neighbour.points - points)
+                if difference <= max(player.window(now), neighbour.window(now)):
+                    if best is None or difference < abs(self.waiting[best].points - points):
+                        best = neighbour_index
+        if best is not None:
+            opponent = self._pop(best)
+            return opponent, player
+
+        self.keys.insert(index, player.key)
+        self.waiting.insert(index, player)
+        self.players[discord_id] = player
+        return None
+
+    def remove(self, discord_id):
+        """Takes a player out of the queue. Returns their QueuedPlayer, or None if they were not queued."""
+        player = self.players.get(discord_id)
+        if player is None:
+            return None
+        return self._pop(bisect.bisect_left(self.keys, player.key))
+
+    def pair_waiting(self, now):
+        """Pairs waiting players whose windows have widened enough, closest ratings first.
+
+        Only sorted neighbours can be each other's closest opponent, so the
+        candidates are the adjacent pairs. Returns a list of (player, player)."""
+        candidates = sorted(
+            (self.waiting[index + 1].points - self.waiting[index].points, index)
+            for index in range(len(self.waiting) - 1)
+        )
+        paired = set()
+        pairs = []
+        for difference, index in candidates:
+            if index in paired or index + 1 in paired:
+                continue
+            first, second = self.waiting[index], self.waiting[index + 1]
+            if difference <= max(first.window(now), second.window(now)):
+                paired.update((index, index + 1))
+                pairs.append((first, second))
+        if paired:
+            self._rebuild(lambda index, player: index not in paired)
+        return pairs
+
+    def expire(self, now, timeout=QUEUE_TIMEOUT):
+        """Drops players who waited longer than timeout. Returns them."""
+        expired = [player for player in self.waiting if now - player.joined_at >= timeout]
+        if expired:
+            self._rebuild(lambda index, player: now - player.joined_at < timeout)
+        return expired
+
+    def _pop(self, index):
+        del self.keys[index]
+        player = self.waiting.pop(index)
+        del self.players[player.discord_id]
+        return player
+
+    def _rebuild(self, keep):
+        """Keeps only the players for which keep(index, player) is true, in one pass."""
+        self.waiting = [player for index, player in enumerate(self.waiting) if keep(index, player)]
+        self.keys = [player.key for player in self.waiting]
+        self.players = {player.discord_id: player for player in self.waiting}
@@ -0,0 +1,97 @@
+# utils/memprofile.py
+#
+# Helpers behind `!fb memprofile`: tracemalloc snapshots compared against a
+# baseline and grouped by the bot module that made each allocation, plus a
+# census of the long-lived objects (views, embeds, caches) that usually
+# explain slow growth. Snapshots are also dumped to data/memprofile/ for
+# offline analysis with `tracemalloc.Snapshot.load()`.
+
+import datetime
+import gc
+import os
+import tracemalloc
+import discord
+
+MEMPROFILE_DIR = "data/memprofile"
+TRACEBACK_FRAMES = 25  # Deep enough to reach the bot's own frames from inside discord.py
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def take_snapshot():
+    """Snapshot of the traced allocations, without the profiler's own. Blocking: run it in a worker thread."""
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def owner(traceback):
+    """Module an allocation is charged to: the most recent frame in the bot's code
+    (e.g. "cogs/stats.py"), else the third-party package or "stdlib"."""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(_ROOT + os.sep) and "site-packages" not in frame.filename:
+            return os.path.relpath(frame.filename, _ROOT)
+    filename = traceback[-1].filename
+    if "site-packages" in filename:
+        return filename.split("site-packages" + os.sep, 1)[1].split(os.sep, 1)[0]
+    return "stdlib"
+
+
+def _location(frame):
+    filename = frame.filename
+    filename = os.path.relpath(filename, _ROOT) if filename.startswith(_ROOT + os.sep) else os.path.basename(filename)
+    return f"{filename}:{frame.lineno}"
+
+
+def diff_by_module(baseline, snapshot, limit=10):
+    """Returns ([(module, size diff, count diff)], [(file:line, size diff, count diff)]) for the largest growth since the baseline."""
+    differences = snapshot.compare_to(baseline, "traceback")
+    modules = {}
+    for difference in differences:
+        module = owner(difference.traceback)
+        size, count = modules.get(module, (0, 0))
+        modules[module] = (size + difference.size_diff, count + difference.count_diff)
+    top_modules = sorted(
+        (item for item in modules.items() if item[1] != (0, 0)), key=lambda item: item[1][0], reverse=True
+    )[:limit]
+
+    top_sites = [
+        (_location(site.traceback[0]), site.size_diff, site.count_diff)
+        for site in snapshot.compare_to(baseline, "lineno")[:limit]
+    ]
+    return [(module, size, count) for module, (size, count) in top_modules], top_sites
+
+
+def dump_snapshot(snapshot):
+    """Writes a snapshot to data/memprofile/ and returns its path. Blocking: run it in a worker thread."""
+    os.makedirs(MEMPROFILE_DIR, exist_ok=True)
+    path = os.path.join(MEMPROFILE_DIR, f"memprofile-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.pickle")
+    snapshot.dump(path)
+    return path
+
+
+def live_objects():
+    """Counts live discord.ui.View objects per class and discord.Embed objects."""
+    views, embeds = {}, 0
+    for obj in gc.get_objects():
+        if isinstance(obj, discord.ui.View):
+            name = type(obj).__name__
+            views[name] = views.get(name, 0) + 1
+        elif isinstance(obj, discord.Embed):
+            embeds += 1
+    return views, embeds
+
+
+def format_size(size, signed=True):
+    """Human-readable byte count, with a sign for differences."""
+    sign = ("-" if size < 0 else "+") if signed else ""
+    size = abs(size)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GB"
@@ -0,0 +1,138 @@
+# utils/outbox.py
+#
+# Per-channel outbound message queue. Every channel gets a token bucket sized
+# to Discord's per-channel message limit, pending messages are sent in
+# priority order, and pending edits of the same message are coalesced so only
+# the latest state is sent.
+
+import asyncio
+import heapq
+import itertools
+import time
+
+PRIORITY_HIGH = 0    # Prompts a user is waiting to answer
+PRIORITY_NORMAL = 1  # Command results
+PRIORITY_LOW = 2     # Announcements and cosmetic updates
+
+# Discord allows about 5 messages per 5 seconds in a channel
+CHANNEL_RATE = 5
+CHANNEL_PER = 5.0
+MAX_IDLE_CHANNELS = 1000
+
+
+class _Pending:
+    __slots__ = ("kind", "target", "kwargs", "futures")
+
+    def __init__(self, kind, target, kwargs, future):
+        self.kind = kind
+        self.target = target
+        self.kwargs = kwargs
+        self.futures = [future]
+
+
+class _ChannelQueue:
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.heap = []
+        self.edits = {}  # message id -> pending edit, so later edits can be merged into it
+        self.task = None
+
+    async def acquire(self):
+        """Waits for a token of the channel's rate-limit bucket."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class Outbox:
+    def __init__(self, rate=CHANNEL_RATE, per=CHANNEL_PER):
+        self.rate = rate
+        self.per = per
+        self.channels = {}
+        self.sequence = itertools.count()
+        self.api_calls = 0
+        self.coalesced_edits = 0
+
+    def send(self, channel, priority=PRIORITY_NORMAL, **kwargs):
+        """Queues channel.send(**kwargs). Returns a future for the sent discord.Message."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queue(channel.id)
+        heapq.heappush(queue.heap, (priority, next(self.sequence), _Pending("send", channel, kwargs, future)))
+        self._wake(queue)
+        return future
+
+    def edit(self, message, priority=PRIORITY_NORMAL, **kwargs):
+        """Queues message.edit(**kwargs), merged into an edit of the same message that is still pending.
+
+        Returns a future that resolves once the (merged) edit is delivered."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queue(message.channel.id)
+        pending = queue.edits.get(message.id)
+        if pending:
+            pending.kwargs.update(kwargs)
+            pending.futures.append(future)
+            self.coalesced_edits += 1
+            # Move the merged edit up if the new state is more urgent
+            for index, (entry_priority, sequence, entry) in enumerate(queue.heap):
+                if entry is pending and priority < entry_priority:
+                    queue.heap[index] = (priority, sequence, entry)
+                    heapq.heapify(queue.heap)
+                    break
+            return future
+
+        pending = _Pending("edit", message, kwargs, future)
+        queue.edits[message.id] = pending
+        heapq.heappush(queue.heap, (priority, next(self.sequence), pending))
+        self._wake(queue)
+        return future
+
+    def _queue(self, channel_id):
+        if channel_id not in self.channels:
+            if len(self.channels) >= MAX_IDLE_CHANNELS:
+                self._prune()
+            self.channels[channel_id] = _ChannelQueue(self.rate, self.per)
+        return self.channels[channel_id]
+
+    def _wake(self, queue):
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._drain(queue))
+
+    async def _drain(self, queue):
+        while queue.heap:
+            await queue.acquire()
+            _, _, pending = heapq.heappop(queue.heap)
+            if pending.kind == "edit":
+                queue.edits.pop(pending.target.id, None)
+            try:
+                self.api_calls += 1
+                if pending.kind == "send":
+                    result = await pending.target.send(**pending.kwargs)
+                else:
+                    result = await pending.target.edit(**pending.kwargs)
+            except Exception as e:
+                for future in pending.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    def _prune(self):
+        """Forgets idle channels whose bucket has fully refilled."""
+        now = time.monotonic()
+        for channel_id, queue in list(self.channels.items()):
+            idle = not queue.heap and (queue.task is None or queue.task.done())
+            if idle and now - queue.updated >= self.per:
+                del self.channels[channel_id]
+
+
+outbox = Outbox()
@@ -0,0 +1,33 @@
+# utils/state.py
+#
+# State that must survive `!fb reload`. A reload throws the cog instance away
+# and builds a new one from the reloaded module, so queues, detectors, caches
+# and cooldown dicts live in a registry on the bot instead of on the cog, and
+# the new instance picks them up where the old one left them.
+#
+# Pending approvals (`bot.wait_for`) and open paginator views are held by the
+# bot itself and keep running the code they started with.
+
+
+def shared_state(bot, name, factory):
+    """Returns the object registered on the bot under `name`, created with `factory()` on first use."""
+    registry = bot.__dict__.setdefault("shared_state", {})
+    if name not in registry:
+        registry[name] = factory()
+    return registry[name]
+
+
+def carry_over_cooldowns(old_commands, cog):
+    """Gives the reloaded cog's commands the cooldown buckets of the commands they replace.
+
+    `old_commands` maps qualified names to the commands before the reload. A
+    command whose cooldown settings changed starts with fresh buckets."""
+    for command in cog.walk_commands():
+        old = old_commands.get(command.qualified_name)
+        if old is None:
+            continue
+        # discord.py keeps a command's cooldown buckets in a private CooldownMapping
+        old_cooldown, new_cooldown = old._buckets._cooldown, command._buckets._cooldown
+        same_rate = (old_cooldown and (old_cooldown.rate, old_cooldown.per)) == (new_cooldown and (new_cooldown.rate, new_cooldown.per))
+        if same_rate and old._buckets.type == command._buckets.type:
+            command._buckets = old._buckets
@@ -0,0 +1,19 @@
+# utils/timestamps.py
+#
+# Match times are stored as UTC epoch milliseconds (matches.timestamp) and
+# rendered with Discord's timestamp markup, which every client shows in its
+# own timezone and language, so the bot never formats dates itself.
+
+import time
+
+
+def now_ms():
+    """The current time as epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+def discord_timestamp(ms, style="R"):
+    """Markup for an epoch-ms time. "R" renders relative ("3 hours ago"), "f" as a full date and time."""
+    if ms is None:
+        return "unknown"
+    return f"<t:{ms // 1000}:{style}>"